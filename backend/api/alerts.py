@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from models.user import User
 
 alerts_bp = Blueprint('alerts', __name__)
@@ -15,6 +15,34 @@ def create_alert(user_id):
     data = request.json
     user = User.get_user_by_id(user_id)
     if user:
-        user.set_price_alert(data['currency'], data['target_price'])
-        return jsonify({"message": "Alert set successfully"}), 201
+        if data.get('currency') not in current_app.extensions['price_cache'].symbols:
+            return jsonify({"error": "Unknown currency"}), 400
+        engine = current_app.extensions['price_alerts']
+        current_price = None
+        if data.get('direction') is None:
+            # The side of the current price decides which way the alert fires
+            try:
+                current_price = current_app.extensions['price_cache'].get(data['currency'])
+            except Exception:
+                return jsonify({"error": "No price available for currency"}), 400
+        try:
+            alert = engine.add(user_id, data['currency'], data['target_price'],
+                               direction=data.get('direction'), current_price=current_price)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        user.set_price_alert(data['currency'], data['target_price'], alert.alert_id, alert.direction)
+        return jsonify({"message": "Alert set successfully", "alert": alert.to_dict()}), 201
+    return jsonify({"error": "User  not found"}), 404
+
+@alerts_bp.route('/api/alerts/<user_id>/<int:alert_id>', methods=['DELETE'])
+def delete_alert(user_id, alert_id):
+    user = User.get_user_by_id(user_id)
+    if user:
+        engine = current_app.extensions['price_alerts']
+        alert = engine.get(alert_id)
+        if alert is None or alert.user_id != user_id:
+            return jsonify({"error": "Alert not found"}), 404
+        engine.cancel(alert_id)
+        user.clear_price_alert(alert_id)
+        return jsonify({"message": "Alert removed"}), 200
     return jsonify({"error": "User  not found"}), 404
@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from models.user import User
 
 analytics_bp = Blueprint('analytics', __name__)
@@ -7,11 +7,19 @@ analytics_bp = Blueprint('analytics', __name__)
 def get_user_analytics(user_id):
     user = User.get_user_by_id(user_id)
     if user:
-        # Example analytics data
-        analytics_data = {
-            "total_transactions": user.get_total_transactions(),
+        # Rollups are maintained per transaction; only the history page touches the index
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+            days = min(max(int(request.args.get('days', 30)), 1), 90)
+            weeks = min(max(int(request.args.get('weeks', 12)), 1), 104)
+            history, next_cursor = user.get_transaction_history(limit, request.args.get('cursor'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        analytics_data = user.get_analytics(days, weeks)
+        analytics_data.update({
             "total_balance": user.get_total_balance(),
-            "transaction_history": user.get_transaction_history()
-        }
+            "transaction_history": history,
+            "next_cursor": next_cursor
+        })
         return jsonify(analytics_data), 200
     return jsonify({"error": "User  not found"}), 404
@@ -1,15 +1,60 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from api.streaming import stream_format, stream_response
 from models.chat import Chat
 
 chat_bp = Blueprint('chat', __name__)
 
+MAX_PAGE = 200
+MAX_WAIT = 30
+KEEPALIVE_INTERVAL = 15
+
 @chat_bp.route('/api/chat', methods=['GET'])
 def get_chat_history():
-    chat_history = Chat.get_all_messages()
-    return jsonify(chat_history), 200
+    channel = request.args.get('channel')
+    since = request.args.get('since', type=int)
+    stream = stream_format()
+    # A streamed export may take the whole ring
+    limit = min(request.args.get('limit', 50, type=int), Chat.capacity if stream else MAX_PAGE)
+    wait = min(request.args.get('wait', 0, type=float), MAX_WAIT)
+    if wait > 0 and since is not None:
+        # Long-poll: hold the request until something newer than `since` arrives
+        entries = Chat.wait_for_messages(channel, since, timeout=wait, limit=limit)
+        chat_history = [message for message, _ in entries]
+    else:
+        chat_history = Chat.get_all_messages(channel, since=since, limit=limit)
+    response = stream_response(chat_history, stream) if stream else jsonify(chat_history)
+    if chat_history:
+        response.headers['X-Chat-Cursor'] = str(chat_history[-1]['id'])
+    return response, 200
+
+@chat_bp.route('/api/chat/stream', methods=['GET'])
+def stream_chat():
+    channel = request.args.get('channel')
+    # EventSource sends Last-Event-ID on reconnect, so nothing is missed
+    cursor = request.headers.get('Last-Event-ID', type=int)
+    if cursor is None:
+        cursor = request.args.get('since', type=int)
+    if cursor is None:
+        cursor = Chat.get_channel(channel).next_id - 1
+
+    def events(cursor):
+        yield b"retry: 3000\n\n"
+        while True:
+            entries = Chat.wait_for_messages(channel, cursor, timeout=KEEPALIVE_INTERVAL)
+            if not entries:
+                yield b': keep-alive\n\n'
+                continue
+            for message, frame in entries:
+                yield frame
+            cursor = entries[-1][0]['id']
+
+    response = Response(stream_with_context(events(cursor)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @chat_bp.route('/api/chat', methods=['POST'])
 def send_message():
     data = request.json
-    message = Chat.send_message(data['user_id'], data['message'])
+    message = Chat.send_message(data['user_id'], data['message'], data.get('channel'))
     return jsonify(message), 201
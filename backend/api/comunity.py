@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
-from models.community import Community
+from api.streaming import stream_format, stream_response
+from models.comunity import Community
 
 community_bp = Blueprint('community', __name__)
 
@@ -7,6 +8,9 @@ community_bp = Blueprint('community', __name__)
 def get_posts():
     # Logic to retrieve community posts
     posts = Community.get_all_posts()
+    stream = stream_format()
+    if stream:
+        return stream_response(posts, stream)
     return jsonify(posts), 200
 
 @community_bp.route('/api/community/posts', methods=['POST'])
@@ -1,4 +1,7 @@
-from flask import Blueprint, jsonify, request
+import math
+
+from flask import Blueprint, current_app, jsonify, request
+from services.cross_chain import ASSET_NETWORKS
 
 cross_chain_swaps_bp = Blueprint('cross_chain_swaps', __name__)
 
@@ -8,5 +11,31 @@ def swap_assets():
     from_asset = data.get('from_asset')
     to_asset = data.get('to_asset')
     amount = data.get('amount')
-    # Logic to perform cross-chain swap
-    return jsonify({"message": "Assets swapped successfully"}), 200
+    if from_asset not in ASSET_NETWORKS or to_asset not in ASSET_NETWORKS or from_asset == to_asset:
+        return jsonify({"error": "Unsupported asset pair"}), 400
+    try:
+        amount = float(amount)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid amount"}), 400
+    if not math.isfinite(amount) or amount <= 0:
+        return jsonify({"error": "Invalid amount"}), 400
+    # Executed asynchronously by the swap engine; poll the status route
+    try:
+        swap = current_app.extensions['swap_engine'].create(
+            from_asset, to_asset, amount,
+            user_id=data.get('user_id'),
+            recipient=data.get('recipient'),
+            wallet_id=data.get('wallet_id')
+        )
+    except KeyError:
+        return jsonify({"error": "Wallet not found"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"message": "Cross-chain swap started", "swap": swap}), 202
+
+@cross_chain_swaps_bp.route('/api/cross-chain/swap/<swap_id>', methods=['GET'])
+def get_swap(swap_id):
+    swap = current_app.extensions['swap_engine'].get(swap_id)
+    if swap:
+        return jsonify(swap), 200
+    return jsonify({"error": "Swap not found"}), 404
@@ -0,0 +1,14 @@
+from flask import Blueprint, Response, current_app, request
+from services.metrics import ROUTE_KEY
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.before_app_request
+def label_route():
+    # The middleware labels requests by route template, not by raw path
+    if request.url_rule is not None:
+        request.environ[ROUTE_KEY] = request.url_rule.rule
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(current_app.extensions['metrics'].render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,69 @@
+from flask import Blueprint, current_app, jsonify, request, send_file
+from io import BytesIO
+from services.media import CONTENT_TYPES, InvalidImage
+
+nft_images_bp = Blueprint('nft_images', __name__)
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, no-cache'
+
+def _not_modified(etag, cache_control):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+@nft_images_bp.route('/api/nft/image/<image_id>', methods=['GET'])
+def get_nft_image(image_id):
+    media = current_app.extensions['media']
+    digest = media.resolve(image_id)
+    if digest is None:
+        return jsonify({"error": "Image not found"}), 404
+    size = request.args.get('size', type=int)
+    if size is not None and size not in media.sizes:
+        return jsonify({"error": f"size must be one of {list(media.sizes)}"}), 400
+
+    # A digest URL always names the same bytes; a name may be repointed
+    cache_control = IMMUTABLE if digest == image_id else REVALIDATE
+    etag = f'{digest}-{size}' if size else digest
+    if etag in request.if_none_match:
+        return _not_modified(etag, cache_control)
+
+    if size:
+        data = media.thumbnail(digest, size)
+        if data is None:
+            return jsonify({"error": "Image not found"}), 404
+        response = send_file(BytesIO(data), mimetype='image/webp', etag=etag, conditional=True)
+    else:
+        path = media.original_path(digest)
+        if path is None:
+            return jsonify({"error": "Image not found"}), 404
+        # Streamed by the server (wsgi.file_wrapper / X-Sendfile), not read here
+        response = send_file(path, mimetype=CONTENT_TYPES[path.rsplit('.', 1)[1]], etag=etag, conditional=True)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+@nft_images_bp.route('/api/nft/image', methods=['POST'])
+def upload_nft_image():
+    media = current_app.extensions['media']
+    if request.content_length is not None and request.content_length > current_app.config['MAX_IMAGE_BYTES']:
+        return jsonify({"error": "Image too large"}), 413
+    upload = request.files.get('file')
+    data = upload.read() if upload is not None else request.get_data()
+    if not data:
+        return jsonify({"error": "No image data"}), 400
+    if len(data) > current_app.config['MAX_IMAGE_BYTES']:
+        return jsonify({"error": "Image too large"}), 413
+    try:
+        digest = media.put(data, name=request.args.get('name') or request.form.get('name'))
+    except (InvalidImage, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "digest": digest,
+        "url": f'/api/nft/image/{digest}',
+        "thumbnails": {size: f'/api/nft/image/{digest}?size={size}' for size in media.sizes}
+    }), 201
+
+@nft_images_bp.route('/api/nft/image/stats', methods=['GET'])
+def get_media_stats():
+    return jsonify(current_app.extensions['media'].performance()), 200
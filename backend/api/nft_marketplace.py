@@ -8,7 +8,10 @@ def mint_nft():
     data = request.json
     user_id = data.get('user_id')
     nft_data = data.get('nft_data')
-    # Logic to mint NFT
+    if not user_id or not isinstance(nft_data, dict) or not nft_data.get('name'):
+        return jsonify({"message": "user_id and nft_data with a name are required"}), 400
+    # Ids come from the store, so only the owner is taken from the request
+    nft_data = {key: value for key, value in nft_data.items() if key not in ('id', 'owner', 'user_id', 'created_at')}
     nft = NFT(user_id=user_id, **nft_data)
     nft.save()
     return jsonify({"message": "NFT minted successfully", "nft_id": nft.id}), 201
@@ -18,5 +21,14 @@ def trade_nft():
     data = request.json
     nft_id = data.get('nft_id')
     buyer_id = data.get('buyer_id')
-    # Logic to trade NFT
-    return jsonify({"message": "NFT traded successfully"}), 200
+    if not isinstance(nft_id, int) or not buyer_id:
+        return jsonify({"message": "nft_id and buyer_id are required"}), 400
+    # Ownership and the owner index change together; a stale seller_id is rejected
+    try:
+        seller_id = NFT.transfer(nft_id, buyer_id, data.get('seller_id'))
+    except KeyError:
+        return jsonify({"message": "NFT not found"}), 404
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 409
+    return jsonify({"message": "NFT traded successfully", "nft_id": nft_id, "seller_id": seller_id,
+                    "buyer_id": buyer_id}), 200
@@ -1,15 +1,45 @@
 from flask import Blueprint, jsonify, request
+from api.streaming import stream_format, stream_response
 from models.nft import NFT
 
 nfts_bp = Blueprint('nfts', __name__)
 
 @nfts_bp.route('/api/nfts', methods=['GET'])
 def get_nfts():
-    nfts = NFT.get_all_nfts()
-    return jsonify(nfts), 200
+    # Cursor-paged catalogue; owner/collection/rarity filters use the indexes
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        cursor = request.args.get('cursor')
+        cursor = int(cursor) if cursor else None
+    except ValueError:
+        return jsonify({"error": "limit and cursor must be integers"}), 400
+    filters = {field: request.args.get(field) for field in ('owner', 'collection', 'rarity')}
+    stream = stream_format()
+    if stream:
+        # Export everything after the cursor without holding it in memory
+        total = NFT.store.count(**filters)
+        return stream_response((nft.to_dict() for nft in NFT.store.iter(cursor, **filters)), stream,
+                               key="nfts", head={"total": total}, total=None if cursor else total)
+    nfts, next_cursor = NFT.get_all_nfts(limit, cursor, **filters)
+    return jsonify({
+        "nfts": [nft.to_dict() for nft in nfts],
+        "count": len(nfts),
+        "total": NFT.store.count(**filters),
+        "next_cursor": str(next_cursor) if next_cursor is not None else None
+    }), 200
+
+@nfts_bp.route('/api/nfts/<int:nft_id>', methods=['GET'])
+def get_nft(nft_id):
+    nft = NFT.get_by_id(nft_id)
+    if nft:
+        return jsonify(nft.to_dict()), 200
+    return jsonify({"error": "NFT not found"}), 404
 
 @nfts_bp.route('/api/nfts', methods=['POST'])
 def create_nft():
     data = request.json
-    nft = NFT.create_nft(data)
+    try:
+        nft = NFT.create_nft(data)
+    except KeyError as e:
+        return jsonify({"error": f"Missing field {e.args[0]}"}), 400
     return jsonify(nft), 201
@@ -1,11 +1,40 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify, request
 from models.user import User
 
 notifications_bp = Blueprint('notifications', __name__)
 
+MAX_PAGE = 100
+
 @notifications_bp.route('/api/notifications/<user_id>', methods=['GET'])
 def get_notifications(user_id):
     user = User.get_user_by_id(user_id)
     if user:
-        return jsonify(user.notifications), 200
+        center = current_app.extensions['notifications']
+        notifications = center.since(
+            user_id,
+            after_id=request.args.get('since', 0, type=int),
+            limit=min(request.args.get('limit', 50, type=int), MAX_PAGE),
+            unread_only=request.args.get('unread') in ('1', 'true')
+        )
+        return jsonify({
+            "notifications": notifications,
+            "unread_count": center.unread_count(user_id),
+            "last_id": notifications[-1]['id'] if notifications else center.last_id(user_id)
+        }), 200
+    return jsonify({"error": "User  not found"}), 404
+
+@notifications_bp.route('/api/notifications/<user_id>/read', methods=['POST'])
+def mark_notifications_read(user_id):
+    user = User.get_user_by_id(user_id)
+    if user:
+        data = request.get_json(silent=True) or {}
+        up_to = data.get('up_to')
+        if up_to is not None:
+            try:
+                up_to = int(up_to)
+            except (TypeError, ValueError):
+                return jsonify({"error": "up_to must be an integer"}), 400
+        center = current_app.extensions['notifications']
+        read_id = center.mark_read(user_id, up_to)
+        return jsonify({"read_id": read_id, "unread_count": center.unread_count(user_id)}), 200
     return jsonify({"error": "User  not found"}), 404
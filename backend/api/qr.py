@@ -0,0 +1,31 @@
+import re
+
+from flask import Blueprint, current_app, jsonify, request
+from services.qr import FORMATS
+
+qr_bp = Blueprint('qr', __name__)
+
+ADDRESS = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+@qr_bp.route('/api/qr/<address>', methods=['GET'])
+def get_address_qr(address):
+    if not ADDRESS.match(address):
+        return jsonify({"error": "Invalid address"}), 400
+    renderer = current_app.extensions['qr']
+    image_format = request.args.get('format', 'png').lower()
+    size = request.args.get('size', 256, type=int)
+
+    # An address's QR never changes: revalidations never need a render
+    etag = renderer.etag(address, size, image_format)
+    if etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+    else:
+        try:
+            data = renderer.get(address, size, image_format)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        response = current_app.response_class(data, mimetype=FORMATS[image_format])
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = IMMUTABLE
+    return response
@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from models.user import User
 
 social_trading_bp = Blueprint('social_trading', __name__)
@@ -8,6 +8,62 @@ def follow_user():
     data = request.json
     follower_id = data.get('follower_id')
     followed_id = data.get('followed_id')
-    # Logic to follow another user
-    User.follow(follower_id, followed_id)
+    if not follower_id or not followed_id:
+        return jsonify({"error": "follower_id and followed_id are required"}), 400
+    # Only known users get a slot in the follow graph
+    if follower_id not in User.users or followed_id not in User.users:
+        return jsonify({"error": "User not found"}), 404
+    try:
+        User.follow(follower_id, followed_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify({"message": "Now following user"}), 200
+
+@social_trading_bp.route('/api/social-trading/unfollow', methods=['POST'])
+def unfollow_user():
+    data = request.json
+    if not User.unfollow(data.get('follower_id'), data.get('followed_id')):
+        return jsonify({"error": "Not following user"}), 404
+    return jsonify({"message": "Unfollowed user"}), 200
+
+@social_trading_bp.route('/api/social-trading/<user_id>/followers', methods=['GET'])
+def get_followers(user_id):
+    offset = request.args.get('offset', 0, type=int)
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    return jsonify({
+        "followers": User.graph.get_followers(user_id, offset, limit),
+        "follower_count": User.graph.follower_count(user_id),
+        "following_count": User.graph.following_count(user_id)
+    }), 200
+
+@social_trading_bp.route('/api/social-trading/copy-ratio', methods=['POST'])
+def set_copy_ratio():
+    data = request.json or {}
+    if data.get('user_id') not in User.users:
+        return jsonify({"error": "User not found"}), 404
+    try:
+        current_app.extensions['copy_trading'].set_copy_ratio(data['user_id'], float(data['ratio']))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"message": "Copy ratio updated"}), 200
+
+@social_trading_bp.route('/api/social-trading/<leader_id>/trade', methods=['POST'])
+def publish_trade(leader_id):
+    data = request.json or {}
+    if leader_id not in User.users:
+        return jsonify({"error": "User not found"}), 404
+    try:
+        amount = float(data.get('amount', 0))
+    except (TypeError, ValueError):
+        amount = 0
+    if amount <= 0:
+        return jsonify({"error": "A positive amount is required"}), 400
+    trade = {
+        "leader_id": leader_id,
+        "symbol": data.get('symbol'),
+        "side": data.get('side', 'buy'),
+        "amount": amount
+    }
+    # Fan-out runs on the copy-trade worker pool; respond once it is queued
+    fan_out = current_app.extensions['copy_trading'].on_trade(leader_id, trade)
+    return jsonify(fan_out.summary()), 202
@@ -0,0 +1,96 @@
+"""
+Streamed list responses.
+
+Instead of building the whole list and ``jsonify``-ing it into one string,
+items are pulled from a generator, encoded one at a time and written in
+chunks of about ``CHUNK_BYTES``.  Memory stays flat however long the list
+is.  A small first chunk gets the headers and the first items out straight
+away.  Chunks are big enough that the server isn't making a syscall per
+item, and small enough that a slow client holds back the generator (the
+server only asks for the next chunk once it has written the previous one).
+
+Two formats:
+
+* ``?stream=json``: the usual JSON document, with the list written
+  incrementally.  Fields known only at the end (``count``) come after it.
+* ``?stream=ndjson`` (or ``Accept: application/x-ndjson``): one item per line.
+
+Once the first chunk is sent the status can't change.  An error part-way
+through ends the response early: a JSON document that doesn't parse, or
+fewer NDJSON lines than ``X-Total-Count`` promised, means the export failed.
+"""
+
+import json
+
+from flask import Response, request
+
+FIRST_CHUNK_BYTES = 4 * 1024
+CHUNK_BYTES = 64 * 1024
+NDJSON = 'application/x-ndjson'
+
+_encode = json.JSONEncoder(separators=(',', ':')).encode
+
+
+def stream_format():
+    """``'json'`` or ``'ndjson'`` when the client asked for a stream, else None"""
+    stream = request.args.get('stream')
+    if stream == 'ndjson' or (stream is None and NDJSON in request.headers.get('Accept', '')):
+        return 'ndjson'
+    if stream in ('json', '1', 'true'):
+        return 'json'
+    return None
+
+
+def _chunks(parts):
+    buffer = []
+    size = 0
+    limit = FIRST_CHUNK_BYTES
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= limit:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+            limit = CHUNK_BYTES
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def _json_parts(items, key, head, tail):
+    count = 0
+    if key is None:
+        yield '['
+    else:
+        yield '{' + ''.join(f'{_encode(k)}:{_encode(v)},' for k, v in head.items()) + _encode(key) + ':['
+    for item in items:
+        yield _encode(item) if not count else ',' + _encode(item)
+        count += 1
+    if key is None:
+        yield ']'
+    else:
+        yield ']' + ''.join(f',{_encode(k)}:{_encode(v)}' for k, v in tail(count).items()) + '}'
+
+
+def _ndjson_parts(items):
+    for item in items:
+        yield _encode(item) + '\n'
+
+
+def stream_response(items, fmt, key=None, head=None, tail=None, total=None):
+    """Stream ``items`` (an iterable of JSON-able values).
+
+    With ``key`` the JSON form is an object: ``head`` fields, then ``key``
+    holding the list, then the fields returned by ``tail(count)``; without
+    it, a bare array.  NDJSON is just the items.  ``total`` (if known up
+    front) is sent as ``X-Total-Count``.
+    """
+    if fmt == 'ndjson':
+        response = Response(_chunks(_ndjson_parts(items)), mimetype=NDJSON)
+    else:
+        response = Response(_chunks(_json_parts(items, key, head or {}, tail or (lambda count: {'count': count}))),
+                            mimetype='application/json')
+    if total is not None:
+        response.headers['X-Total-Count'] = str(total)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
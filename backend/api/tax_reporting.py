@@ -3,11 +3,48 @@ from models.tax_report import TaxReport
 
 tax_reporting_bp = Blueprint('tax_reporting', __name__)
 
+def _year(value):
+    try:
+        year = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("year must be an integer")
+    if not 1970 <= year <= 9999:
+        raise ValueError("year must be between 1970 and 9999")
+    return year
+
 @tax_reporting_bp.route('/api/tax/report', methods=['POST'])
 def generate_tax_report():
     data = request.json
     user_id = data.get('user_id')
-    year = data.get('year')
-    # Logic to generate tax report
-    report = TaxReport.generate_report(user_id, year)
+    try:
+        year = _year(data.get('year'))
+        report = TaxReport.generate_report(user_id, year, data.get('method', 'fifo'))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     return jsonify({"message": "Tax report generated successfully", "report": report}), 201
+
+@tax_reporting_bp.route('/api/tax/trades', methods=['POST'])
+def record_trades():
+    data = request.json
+    user_id = data.get('user_id')
+    trades = data.get('trades')
+    if not user_id or not isinstance(trades, list):
+        return jsonify({"message": "user_id and a list of trades are required"}), 400
+    try:
+        recorded = TaxReport.record_trades(user_id, trades)
+    except (AttributeError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify({"message": "Trades recorded successfully", "recorded": recorded}), 201
+
+@tax_reporting_bp.route('/api/tax/close-year', methods=['POST'])
+def close_tax_year():
+    data = request.json
+    user_id = data.get('user_id')
+    try:
+        year = _year(data.get('year'))
+        TaxReport.close_year(user_id, year)
+    except KeyError:
+        return jsonify({"message": "No trades recorded for user"}), 404
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify({"message": f"Tax year {year} closed", "ledger": TaxReport.engine.ledger_stats(user_id)}), 200
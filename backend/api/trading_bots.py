@@ -1,5 +1,10 @@
-from flask import Blueprint, jsonify, request
+import math
+import time
+
+from flask import Blueprint, current_app, jsonify, request
 from models.trading_bot import TradingBot
+from services.backtest import MINUTES_PER_YEAR, as_bars
+from services.strategies import create_strategy
 
 trading_bots_bp = Blueprint('trading_bots', __name__)
 
@@ -9,27 +14,98 @@ def create_trading_bot():
     user_id = data.get('user_id')
     strategy = data.get('strategy')
     parameters = data.get('parameters')
-    
-    # Logic to create a trading bot
+
+    # Reject unknown strategies and bad parameters before the bot is saved
+    try:
+        create_strategy(strategy, parameters)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     trading_bot = TradingBot(user_id=user_id, strategy=strategy, parameters=parameters)
     trading_bot.save()
     
     return jsonify({"message": "Trading bot created successfully", "bot_id": trading_bot.id}), 201
 
+@trading_bots_bp.route('/api/trading-bots/<int:bot_id>', methods=['GET'])
+def get_trading_bot(bot_id):
+    trading_bot = TradingBot.get_by_id(bot_id)
+    if trading_bot:
+        return jsonify(trading_bot.to_dict()), 200
+    return jsonify({"message": "Trading bot not found"}), 404
+
 @trading_bots_bp.route('/api/trading-bots/<int:bot_id>/execute', methods=['POST'])
 def execute_trading_bot(bot_id):
-    # Logic to execute the trading bot
     trading_bot = TradingBot.get_by_id(bot_id)
     if trading_bot:
-        trading_bot.execute()
+        try:
+            trading_bot.execute()
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
         return jsonify({"message": "Trading bot executed successfully"}), 200
     return jsonify({"message": "Trading bot not found"}), 404
 
 @trading_bots_bp.route('/api/trading-bots/<int:bot_id>/stop', methods=['POST'])
 def stop_trading_bot(bot_id):
-    # Logic to stop the trading bot
     trading_bot = TradingBot.get_by_id(bot_id)
     if trading_bot:
         trading_bot.stop()
         return jsonify({"message": "Trading bot stopped successfully"}), 200
     return jsonify({"message": "Trading bot not found"}), 404
+
+@trading_bots_bp.route('/api/trading-bots/runtime', methods=['GET'])
+def get_runtime_performance():
+    return jsonify(TradingBot.runtime.performance()), 200
+
+def _backtest_bars(data):
+    # Bars come from the request body, or from the history store by symbol
+    if data.get('ohlcv') is not None:
+        return as_bars(data['ohlcv'])
+    bars = int(data.get('bars', MINUTES_PER_YEAR))
+    if not 2 <= bars <= current_app.config['MAX_BACKTEST_BARS']:
+        raise ValueError(f"bars must be between 2 and {current_app.config['MAX_BACKTEST_BARS']}")
+    try:
+        return current_app.extensions['backtest_history'].get(data.get('symbol', 'SOL'), bars)
+    except KeyError:
+        raise ValueError(f"No price history for {data.get('symbol')}")
+
+def _backtest_costs(data):
+    """``(fee, initial_capital)`` from the request; None keeps the backtester's default"""
+    fee, initial_capital = data.get('fee'), data.get('initial_capital')
+    if fee is not None:
+        fee = float(fee)
+        if not math.isfinite(fee) or fee < 0:
+            raise ValueError('fee must be a finite, non-negative number')
+    if initial_capital is not None:
+        initial_capital = float(initial_capital)
+        if not math.isfinite(initial_capital) or initial_capital <= 0:
+            raise ValueError('initial_capital must be a finite, positive number')
+    return fee, initial_capital
+
+@trading_bots_bp.route('/api/trading-bots/backtest', methods=['POST'])
+def backtest_strategy():
+    data = request.json or {}
+    started = time.perf_counter()
+    try:
+        bars = _backtest_bars(data)
+        fee, initial_capital = _backtest_costs(data)
+        result = current_app.extensions['backtester'].run(
+            data.get('strategy'), data.get('parameters'), bars,
+            fee=fee, initial_capital=initial_capital, points=int(data.get('points', 500)))
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+    result['elapsed_ms'] = (time.perf_counter() - started) * 1e3
+    return jsonify(result), 200
+
+@trading_bots_bp.route('/api/trading-bots/backtest/sweep', methods=['POST'])
+def sweep_strategy():
+    data = request.json or {}
+    started = time.perf_counter()
+    try:
+        bars = _backtest_bars(data)
+        fee, initial_capital = _backtest_costs(data)
+        result = current_app.extensions['backtester'].sweep(
+            data.get('strategy'), data.get('grid'), bars, parameters=data.get('parameters'),
+            fee=fee, initial_capital=initial_capital, top=int(data.get('top', 10)))
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+    result['elapsed_ms'] = (time.perf_counter() - started) * 1e3
+    return jsonify(result), 200
@@ -9,10 +9,52 @@ from flask_cors import CORS
 import json
 import time
 import hashlib
+import math
 import secrets
 import os
 from datetime import datetime, timedelta
 import requests
+import zlib
+
+from storage.engine import create_engine
+from storage.history import InvalidCursor, TransactionIndex, fetch_page, iter_transactions
+from services.price_cache import HttpPriceSource, PriceCache, StaticPriceSource
+from services.valuation import HoldingsMatrix
+from services.chain_client import ChainClients, RpcError
+from services.locks import StripedLock
+from services.confirmations import ConfirmationTracker, RpcConfirmationSource, SimulatedChain
+from services.routing import Pool, SwapRouter
+from services.cross_chain import SimulatedBridge, SwapEngine
+from services.price_alerts import PriceAlertEngine
+from services.notifications import NotificationCenter, NotificationStreamServer
+from services.copy_trading import CopyTradeEngine
+from services.bot_runtime import BotRuntime
+from services.backtest import Backtester, HistoryStore
+from services.tax_engine import TaxEngine
+from services.analytics import AnalyticsRollups
+from services.media import MediaStore
+from services.qr import QrRenderer
+from services.response_cache import ResponseCache
+from services.rate_limit import AdmissionControl, LocalBuckets, RedisBuckets
+from services.metrics import Metrics, MetricsMiddleware
+from api.cross_chain_swaps import cross_chain_swaps_bp
+from api.chat import chat_bp
+from api.comunity import community_bp
+from api.alerts import alerts_bp
+from api.notifications import notifications_bp
+from api.social_trading import social_trading_bp
+from api.trading_bots import trading_bots_bp
+from api.tax_reporting import tax_reporting_bp
+from api.analytics import analytics_bp
+from api.nfts import nfts_bp
+from api.nft_marketplace import nft_marketplace_bp
+from api.nft_images import nft_images_bp
+from api.qr import qr_bp
+from api.streaming import stream_format, stream_response
+from api.metrics import metrics_bp
+from models.trading_bot import TradingBot
+from models.tax_report import TaxReport
+from models.user import User
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -20,10 +62,35 @@ CORS(app)  # Enable CORS for all routes
 # Configuration
 app.config['SECRET_KEY'] = secrets.token_hex(32)
 app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['STORAGE_DIR'] = os.environ.get('TEOS_STORAGE_DIR')
+app.config['PRICE_FEED_URL'] = os.environ.get('TEOS_PRICE_FEED_URL')
+app.config['PRICE_TTL'] = float(os.environ.get('TEOS_PRICE_TTL', 10))
+app.config['MAX_BATCH_WALLETS'] = 10000
+app.config['RPC_TIMEOUT'] = float(os.environ.get('TEOS_RPC_TIMEOUT', 5))
+app.config['CONFIRMATION_SOURCE'] = os.environ.get('TEOS_CONFIRMATION_SOURCE', 'simulator')
+app.config['NOTIFICATION_STREAM_PORT'] = int(os.environ.get('TEOS_NOTIFICATION_STREAM_PORT', 0))
+app.config['HISTORY_DIR'] = os.environ.get('TEOS_HISTORY_DIR')
+app.config['MAX_BACKTEST_BARS'] = 4 * 525600
+app.config['MEDIA_DIR'] = os.environ.get('TEOS_MEDIA_DIR', os.path.join(app.config['UPLOAD_FOLDER'], 'media'))
+app.config['MEDIA_CACHE_MB'] = int(os.environ.get('TEOS_MEDIA_CACHE_MB', 64))
+app.config['MAX_IMAGE_BYTES'] = 20 * 2 ** 20
+app.config['RATE_LIMIT'] = os.environ.get('TEOS_RATE_LIMIT', '1') != '0'
+app.config['RATE_LIMIT_REDIS_URL'] = os.environ.get('TEOS_RATE_LIMIT_REDIS_URL')
+app.config['TRUSTED_PROXIES'] = int(os.environ.get('TEOS_TRUSTED_PROXIES', 0))
+
+# Per-route latency histograms, status counts and hot-path timers, served
+# at /metrics; the middleware is installed last so it wraps everything
+metrics = Metrics()
+app.extensions['metrics'] = metrics
+app.register_blueprint(metrics_bp)
+
+# Wallet/transaction storage: in-memory by default, journaled to disk when
+# TEOS_STORAGE_DIR is set. Mutated records must be assigned back to be saved.
+storage = create_engine(app.config['STORAGE_DIR'])
+wallets = storage.table('wallets')
+transactions = storage.table('transactions')
+
 
-# In-memory storage (use database in production)
-wallets = {}
-transactions = {}
 networks = {
     'solana': {
         'name': 'Solana',
@@ -56,6 +123,241 @@ networks = {
     }
 }
 
+# RPC endpoints can be overridden per deployment
+for _network, _env in (('solana', 'SOLANA_RPC_URL'), ('teos', 'SOLANA_RPC_URL'),
+                       ('ethereum', 'ETHEREUM_RPC_URL'), ('bitcoin', 'BITCOIN_RPC_URL')):
+    if os.environ.get(_env):
+        networks[_network]['rpc_url'] = os.environ[_env]
+
+# Pooled, batched JSON-RPC clients (connections are opened on first use)
+chain_clients = ChainClients(networks, timeout=app.config['RPC_TIMEOUT'])
+
+# Mock prices, served through the cache when no upstream feed is configured
+mock_prices = {
+    'SOL': 98.32,
+    'ETH': 2847.52,
+    'BTC': 43250.00,
+    'TEOS': 0.0045
+}
+
+price_cache = PriceCache(
+    HttpPriceSource(app.config['PRICE_FEED_URL']) if app.config['PRICE_FEED_URL'] else StaticPriceSource(mock_prices),
+    symbols=mock_prices.keys(),
+    ttl=app.config['PRICE_TTL']
+)
+
+# Pre-encoded bodies (plus gzip and ETags) for the endpoints clients poll:
+# rebuilt only after invalidate(), otherwise answered (or 304'd) before Flask
+response_cache = ResponseCache()
+app.extensions['response_cache'] = response_cache
+app.wsgi_app = response_cache.middleware(app.wsgi_app)
+
+# Admission control in front of everything else (cached responses included):
+# (rate per second, burst) token buckets per client, per route and overall.
+# Buckets are per worker unless TEOS_RATE_LIMIT_REDIS_URL shares them.
+route_limits = {
+    'POST /api/wallet/create': (0.2, 5),
+    'POST /api/wallet/<wallet_id>/send': (1, 5),
+    'POST /api/wallets/balance': (2, 5),
+    'POST /api/swap/quote': (5, 20),
+    'POST /api/cross-chain/swap': (1, 5),
+    'POST /api/nft/image': (0.5, 5),
+    'POST /api/nft/mint': (0.5, 5),
+    'POST /api/tax/report': (1, 5),
+    'POST /api/trading-bots/backtest': (1, 3),
+    'POST /api/trading-bots/backtest/sweep': (0.1, 2)
+}
+if app.config['RATE_LIMIT']:
+    admission = AdmissionControl(
+        app.wsgi_app,
+        client=(50, 100),
+        default=(20, 40),
+        routes=route_limits,
+        backend=(RedisBuckets.from_url(app.config['RATE_LIMIT_REDIS_URL']) if app.config['RATE_LIMIT_REDIS_URL']
+                 else LocalBuckets()),
+        trusted_proxies=app.config['TRUSTED_PROXIES']
+    )
+    app.wsgi_app = admission
+    app.extensions['admission'] = admission
+
+app.wsgi_app = MetricsMiddleware(app.wsgi_app, metrics)
+
+def apply_confirmation(tx_hash, status, confirmations):
+    """Store a status/confirmation change pushed by the confirmation tracker"""
+    transaction = transactions.get(tx_hash)
+    if transaction is None:
+        return
+    previous = dict(transaction)
+    transaction['status'] = status
+    transaction['confirmations'] = confirmations
+    transactions[tx_hash] = transaction
+    transaction_index.update(previous, transaction)
+    analytics.update(previous, transaction)
+
+# Polls pending transactions in batches (simulated chain unless configured for RPC)
+confirmation_tracker = ConfirmationTracker(
+    RpcConfirmationSource(chain_clients) if app.config['CONFIRMATION_SOURCE'] == 'rpc' else SimulatedChain(),
+    on_update=apply_confirmation
+)
+
+# Per-address history index and analytics rollups, maintained per transaction.
+# They are storage views: a journaled restart loads the copies saved with the
+# latest snapshot and applies only the journal tail, not the whole history.
+transaction_index = storage.attach_view('transaction_index', 'transactions', TransactionIndex(), TransactionIndex)
+analytics = storage.attach_view('analytics', 'transactions', AnalyticsRollups(transaction_index, transactions),
+                                lambda: AnalyticsRollups(None, None))
+User.analytics = analytics
+# Re-queue the transactions still waiting for confirmations
+for _tx_hash in transaction_index.hashes_where('status', 'pending'):
+    confirmation_tracker.track(transactions[_tx_hash])
+
+# Serializes balance read-check-write per wallet (striped, not global)
+wallet_locks = StripedLock()
+
+# Mock liquidity pools (USD depth per pool) seeded at the mock prices
+mock_pools = [
+    ('SOL', 'USDC', 20000000),
+    ('ETH', 'USDC', 50000000),
+    ('BTC', 'USDC', 40000000),
+    ('TEOS', 'USDC', 1000000),
+    ('TEOS', 'SOL', 2000000),
+    ('SOL', 'ETH', 10000000),
+    ('ETH', 'BTC', 30000000)
+]
+
+swap_router = SwapRouter()
+for _token_a, _token_b, _liquidity in mock_pools:
+    _prices = dict(mock_prices, USDC=1.0)
+    swap_router.add_pool(Pool(
+        f'{_token_a}-{_token_b}', _token_a, _token_b,
+        _liquidity / 2 / _prices[_token_a], _liquidity / 2 / _prices[_token_b]
+    ))
+
+def move_funds(wallet_id, symbol, delta):
+    """Add ``delta`` (negative to debit) to a wallet balance; raises KeyError or ValueError"""
+    with wallet_locks.hold(wallet_id):
+        wallet = wallets[wallet_id]
+        if symbol not in wallet['balance']:
+            raise ValueError('Unsupported asset')
+        if wallet['balance'][symbol] + delta < 0:
+            raise ValueError('Insufficient balance')
+        wallet['balance'][symbol] += delta
+        wallets[wallet_id] = wallet
+        holdings.set(wallet_id, wallet['balance'])
+
+# Cross-chain swaps: persisted state machines driven by a worker pool; the
+# source wallet is debited up front and credited back if the swap is refunded
+swap_engine = SwapEngine(storage.table('swaps'), {network: SimulatedBridge(network) for network in networks},
+                         funds=move_funds)
+swap_engine.resume()
+app.extensions['swap_engine'] = swap_engine
+app.register_blueprint(cross_chain_swaps_bp)
+
+# Chat: bounded per-channel history with SSE / long-poll delivery
+app.register_blueprint(chat_bp)
+app.register_blueprint(community_bp)
+
+# Notifications: bounded per-user inboxes, streamed from an asyncio server
+notifications = NotificationCenter()
+notification_streams = NotificationStreamServer(
+    notifications, port=app.config['NOTIFICATION_STREAM_PORT'], reuse_port=True
+)
+app.extensions['notifications'] = notifications
+app.register_blueprint(notifications_bp)
+
+@app.before_request
+def start_notification_streams():
+    # Bind in the serving process, not a preloading master
+    if app.config['NOTIFICATION_STREAM_PORT']:
+        notification_streams.start()
+
+def deliver_price_alerts(matches):
+    """Hand triggered price alerts to their owners"""
+    for match in matches:
+        user = User.get_user_by_id(match['user_id'])
+        if user is None:
+            continue
+        user.clear_price_alert(match['alert_id'])
+        # Repeated alerts on the same market collapse into one unread entry
+        notifications.publish(match['user_id'], 'price_alert', match,
+                              key=f"price_alert:{match['currency']}:{match['direction']}")
+
+# Price alerts: matched on every price refresh
+price_alerts = PriceAlertEngine(notify=deliver_price_alerts)
+app.extensions['price_cache'] = price_cache
+app.extensions['price_alerts'] = price_alerts
+app.register_blueprint(alerts_bp)
+
+def deliver_copy_trades(trade, follower_ids, amounts):
+    """Notify one chunk of followers about their copied orders"""
+    key = f"copy_trade:{trade['leader_id']}"
+    for follower_id, amount in zip(follower_ids, amounts.tolist()):
+        notifications.publish(follower_id, 'copy_trade', dict(trade, amount=amount), key=key)
+
+# Social trading: follower graph plus chunked copy-trade fan-out
+copy_trading = CopyTradeEngine(User.graph, deliver_copy_trades)
+app.extensions['copy_trading'] = copy_trading
+app.register_blueprint(social_trading_bp)
+
+def notify_bot_order(bot, order):
+    notifications.publish(bot.user_id, 'bot_order', dict(order, bot_id=bot.bot_id), key=f'bot:{bot.bot_id}')
+
+# Trading bots: driven from the price tick bus on the bot runtime's loop
+bot_runtime = BotRuntime(on_order=notify_bot_order)
+TradingBot.runtime = bot_runtime
+
+# Backtests: OHLCV history per symbol, parameter sweeps on a process pool
+backtest_history = HistoryStore(app.config['HISTORY_DIR'], mock_prices)
+backtester = Backtester(backtest_history)
+app.extensions['backtest_history'] = backtest_history
+app.extensions['backtester'] = backtester
+app.register_blueprint(trading_bots_bp)
+
+# Tax reports: streaming FIFO/LIFO/HIFO lot matching with per-year checkpoints
+tax_engine = TaxEngine()
+TaxReport.engine = tax_engine
+app.register_blueprint(tax_reporting_bp)
+
+published_prices = {}
+
+def on_price_update(symbol, price):
+    """Fan each refreshed price out to alerts and the bot tick bus"""
+    price_alerts.on_price(symbol, price)
+    bot_runtime.publish(symbol, price)
+    if published_prices.get(symbol) != price:
+        published_prices[symbol] = price
+        response_cache.invalidate('prices')
+
+price_cache.on_update = on_price_update
+
+# Columnar mirror of wallet balances for batch valuation
+holdings = HoldingsMatrix(mock_prices.keys())
+holdings.rebuild(wallets)
+for wallet_id, wallet in wallets.items():
+    analytics.register_wallet(wallet['address'], wallet_id)
+
+@metrics.timed('balance_valuation')
+def value_wallets(wallet_ids):
+    """Total value of ``wallet_ids`` at current prices (for user analytics)"""
+    return float(holdings.value(wallet_ids, get_current_prices())[2].sum())
+
+analytics.value_wallets = value_wallets
+app.register_blueprint(analytics_bp)
+
+# NFT catalogue: id-ordered store with owner/collection/rarity indexes
+app.register_blueprint(nfts_bp)
+app.register_blueprint(nft_marketplace_bp)
+
+# NFT media: content-addressed originals, background thumbnails, hot LRU
+media = MediaStore(app.config['MEDIA_DIR'], cache_bytes=app.config['MEDIA_CACHE_MB'] * 2 ** 20)
+app.extensions['media'] = media
+app.register_blueprint(nft_images_bp)
+
+# Receive-address QR codes: LRU of rendered images, renders on a thread pool
+qr_renderer = QrRenderer()
+app.extensions['qr'] = qr_renderer
+app.register_blueprint(qr_bp)
+
 # Utility Functions
 def generate_wallet_address(network='solana'):
     """Generate a mock wallet address for testing"""
@@ -71,14 +373,10 @@ def generate_transaction_hash():
     """Generate a mock transaction hash"""
     return '0x' + secrets.token_hex(32)
 
+@metrics.timed('price_lookup')
 def get_current_prices():
-    """Get current cryptocurrency prices (mock data)"""
-    return {
-        'SOL': 98.32,
-        'ETH': 2847.52,
-        'BTC': 43250.00,
-        'TEOS': 0.0045
-    }
+    """Get current cryptocurrency prices from the background-refreshed cache"""
+    return price_cache.get_all()
 
 def validate_address(address, network):
     """Validate wallet address format"""
@@ -134,6 +432,8 @@ def create_wallet():
         }
         
         wallets[wallet_id] = wallet_data
+        holdings.set(wallet_id, wallet_data['balance'])
+        analytics.register_wallet(address, wallet_id)
         
         return jsonify({
             'status': 'success',
@@ -174,12 +474,68 @@ def get_wallet_balance(wallet_id):
                 'network': 'solana' if symbol in ['SOL', 'TEOS'] else symbol.lower()
             })
         
-        return jsonify({
+        response = {
             'status': 'success',
             'wallet_id': wallet_id,
             'total_value': total_value,
             'balances': balances,
             'timestamp': datetime.now().isoformat()
+        }
+        
+        # Optionally include the live on-chain balance of the wallet's network
+        if request.args.get('onchain') in ('1', 'true'):
+            try:
+                response['onchain_balance'] = chain_clients.get_balance(
+                    wallet['network'], wallet['address'], timeout=app.config['RPC_TIMEOUT']
+                )
+            except (RpcError, TimeoutError) as e:
+                response['onchain_error'] = str(e)
+        
+        return jsonify(response)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/wallets/balance', methods=['POST'])
+def get_wallets_balance():
+    """Value many wallets against a single price snapshot"""
+    try:
+        data = request.get_json()
+        wallet_ids = data.get('wallet_ids') or []
+        include_balances = bool(data.get('include_balances', False))
+        
+        if not isinstance(wallet_ids, list):
+            return jsonify({'error': 'wallet_ids must be a list'}), 400
+        if len(wallet_ids) > app.config['MAX_BATCH_WALLETS']:
+            return jsonify({'error': f"At most {app.config['MAX_BATCH_WALLETS']} wallets per request"}), 400
+        
+        prices = get_current_prices()
+        with metrics.time('balance_valuation'):
+            found, matrix, values, missing = holdings.value(wallet_ids, prices)
+        symbols = holdings.symbols[:matrix.shape[1]]
+        
+        results = []
+        for i, wallet_id in enumerate(found):
+            entry = {'wallet_id': wallet_id, 'total_value': float(values[i])}
+            if include_balances:
+                entry['balances'] = dict(zip(symbols, matrix[i].tolist()))
+            results.append(entry)
+        
+        totals = matrix.sum(axis=0).tolist()
+        return jsonify({
+            'status': 'success',
+            'wallets': results,
+            'aggregate': {
+                'total_value': float(values.sum()),
+                'balances': {
+                    symbol: {'balance': total, 'value': total * prices.get(symbol, 0)}
+                    for symbol, total in zip(symbols, totals)
+                }
+            },
+            'prices': prices,
+            'missing': missing,
+            'count': len(results),
+            'timestamp': datetime.now().isoformat()
         })
         
     except Exception as e:
@@ -201,33 +557,44 @@ def send_transaction(wallet_id):
         if not validate_address(to_address, network):
             return jsonify({'error': 'Invalid recipient address'}), 400
         
-        wallet = wallets[wallet_id]
+        if not amount > 0:
+            return jsonify({'error': 'Invalid amount'}), 400
         
-        if symbol not in wallet['balance']:
-            return jsonify({'error': 'Unsupported asset'}), 400
-        
-        if wallet['balance'][symbol] < amount:
-            return jsonify({'error': 'Insufficient balance'}), 400
-        
-        # Create transaction
-        tx_hash = generate_transaction_hash()
-        transaction = {
-            'hash': tx_hash,
-            'from_address': wallet['address'],
-            'to_address': to_address,
-            'amount': amount,
-            'symbol': symbol,
-            'network': network,
-            'status': 'pending',
-            'timestamp': datetime.now().isoformat(),
-            'fee': 0.001  # Mock fee
-        }
+        # Check-and-debit must be atomic per wallet; other wallets use other stripes
+        with wallet_locks.hold(wallet_id):
+            wallet = wallets[wallet_id]
+            
+            if symbol not in wallet['balance']:
+                return jsonify({'error': 'Unsupported asset'}), 400
+            
+            if wallet['balance'][symbol] < amount:
+                return jsonify({'error': 'Insufficient balance'}), 400
+            
+            # Create transaction
+            tx_hash = generate_transaction_hash()
+            transaction = {
+                'hash': tx_hash,
+                'from_address': wallet['address'],
+                'to_address': to_address,
+                'amount': amount,
+                'symbol': symbol,
+                'network': network,
+                'status': 'pending',
+                'timestamp': datetime.now().isoformat(),
+                'fee': 0.001  # Mock fee
+            }
+            
+            # Update balance
+            wallet['balance'][symbol] -= amount
+            wallets[wallet_id] = wallet
+            holdings.set(wallet_id, wallet['balance'])
+            transactions[tx_hash] = transaction
         
-        # Update balance
-        wallet['balance'][symbol] -= amount
-        transactions[tx_hash] = transaction
+        transaction_index.add(transaction)
+        analytics.record(transaction)
+        confirmation_tracker.track(transaction)
         
-        # Simulate transaction processing
+        # Confirmation is tracked in the background
         return jsonify({
             'status': 'success',
             'transaction': transaction,
@@ -266,50 +633,50 @@ def get_transactions(wallet_id):
         
         wallet = wallets[wallet_id]
         wallet_address = wallet['address']
-        
-        # Mock transaction history
-        mock_transactions = [
-            {
-                'hash': '0x1234567890abcdef1234567890abcdef12345678',
-                'type': 'receive',
-                'amount': 50,
-                'symbol': 'TEOS',
-                'from_address': 'Mining Pool',
-                'to_address': wallet_address,
-                'status': 'completed',
-                'timestamp': (datetime.now() - timedelta(minutes=2)).isoformat(),
-                'network': 'solana'
-            },
-            {
-                'hash': '0x2345678901bcdef12345678901bcdef123456789',
-                'type': 'send',
-                'amount': 0.1,
-                'symbol': 'SOL',
-                'from_address': wallet_address,
-                'to_address': 'DeFi Protocol',
-                'status': 'completed',
-                'timestamp': (datetime.now() - timedelta(hours=1)).isoformat(),
-                'network': 'solana'
-            },
-            {
-                'hash': '0x3456789012cdef123456789012cdef1234567890',
-                'type': 'swap',
-                'amount': 100,
-                'symbol': 'USDC',
-                'from_address': wallet_address,
-                'to_address': 'DEX',
-                'status': 'completed',
-                'timestamp': (datetime.now() - timedelta(hours=3)).isoformat(),
-                'network': 'ethereum'
-            }
-        ]
+        filters = {field: request.args.get(field) for field in ('symbol', 'network', 'status')}
+        
+        stream = stream_format()
+        if stream:
+            # Export: everything from the cursor on, encoded as it is read
+            rows = iter_transactions(transaction_index, transactions, wallet_address,
+                                     request.args.get('cursor'), **filters)
+            total = transaction_index.count(wallet_address)
+            return stream_response(
+                (dict(transaction, type='send' if transaction['from_address'] == wallet_address else 'receive')
+                 for transaction in rows),
+                stream,
+                key='transactions',
+                head={'status': 'success', 'total': total},
+                total=None if any(filters.values()) or request.args.get('cursor') else total
+            )
+        
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        page, next_cursor = fetch_page(
+            transaction_index, transactions, wallet_address,
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            **filters
+        )
+        
+        history = []
+        for transaction in page:
+            entry = dict(transaction)
+            entry['type'] = 'send' if transaction['from_address'] == wallet_address else 'receive'
+            history.append(entry)
         
         return jsonify({
             'status': 'success',
-            'transactions': mock_transactions,
-            'count': len(mock_transactions)
+            'transactions': history,
+            'count': len(history),
+            'total': transaction_index.count(wallet_address),
+            'next_cursor': next_cursor
         })
         
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -320,19 +687,20 @@ def get_swap_quote():
         data = request.get_json()
         from_token = data.get('from_token')
         to_token = data.get('to_token')
-        amount = float(data.get('amount', 0))
-        
-        prices = get_current_prices()
-        
-        if from_token not in prices or to_token not in prices:
+        try:
+            amount = float(data.get('amount', 0))
+        except (TypeError, ValueError):
+            amount = math.nan
+        if not (math.isfinite(amount) and amount > 0):
+            return jsonify({'error': 'amount must be a positive number'}), 400
+        
+        if from_token not in swap_router.tokens or to_token not in swap_router.tokens or from_token == to_token:
             return jsonify({'error': 'Unsupported token pair'}), 400
         
-        from_price = prices[from_token]
-        to_price = prices[to_token]
-        
-        # Calculate swap rate with 0.3% fee
-        rate = (from_price / to_price) * 0.997
-        output_amount = amount * rate
+        # Best multi-hop/split route over the pool graph (0.3% fee per hop)
+        route = swap_router.quote(from_token, to_token, amount)
+        if route is None:
+            return jsonify({'error': 'No route for token pair'}), 400
         
         return jsonify({
             'status': 'success',
@@ -340,10 +708,11 @@ def get_swap_quote():
                 'from_token': from_token,
                 'to_token': to_token,
                 'input_amount': amount,
-                'output_amount': output_amount,
-                'rate': rate,
-                'fee_percentage': 0.3,
-                'price_impact': 0.1,
+                'output_amount': route['output_amount'],
+                'rate': route['rate'],
+                'fee_percentage': route['fee'] * 100,
+                'price_impact': route['price_impact'] * 100,
+                'routes': route['routes'],
                 'valid_until': (datetime.now() + timedelta(minutes=5)).isoformat()
             }
         })
@@ -352,6 +721,7 @@ def get_swap_quote():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/staking/opportunities', methods=['GET'])
+@response_cache.cached('staking', max_age=60)
 def get_staking_opportunities():
     """Get available staking opportunities"""
     try:
@@ -408,6 +778,7 @@ def get_staking_opportunities():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/prices', methods=['GET'])
+@response_cache.cached('prices')
 def get_prices():
     """Get current cryptocurrency prices"""
     try:
@@ -416,7 +787,8 @@ def get_prices():
         # Add 24h change simulation
         price_data = {}
         for symbol, price in prices.items():
-            change_24h = (hash(symbol) % 20 - 10) / 100  # -10% to +10%
+            # crc32 rather than hash(): identical across workers and restarts, so ETags are too
+            change_24h = (zlib.crc32(symbol.encode()) % 20 - 10) / 100  # -10% to +10%
             price_data[symbol] = {
                 'price': price,
                 'change_24h': change_24h,
@@ -432,7 +804,20 @@ def get_prices():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/prices/cache', methods=['GET'])
+def get_price_cache_stats():
+    """Get price cache hit/miss/staleness counters"""
+    try:
+        return jsonify({
+            'status': 'success',
+            'cache': price_cache.stats()
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/networks', methods=['GET'])
+@response_cache.cached('networks', max_age=60)
 def get_networks():
     """Get supported networks"""
     try:
@@ -451,10 +836,6 @@ def get_transaction(tx_hash):
     try:
         if tx_hash in transactions:
             transaction = transactions[tx_hash]
-            # Simulate transaction confirmation
-            if transaction['status'] == 'pending':
-                transaction['status'] = 'completed'
-                transaction['confirmations'] = 12
             
             return jsonify({
                 'status': 'success',
@@ -0,0 +1,92 @@
+"""
+User analytics read latency against history length: materialized rollups
+versus rescanning the user's transactions, plus the per-event ingest cost (index and rollup)
+and a full rebuild from the transaction table.
+
+    python -m benchmarks.analytics_bench --sizes 1000,10000,100000,1000000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from services.analytics import AnalyticsRollups
+from storage.history import TransactionIndex
+
+SYMBOLS = ('SOL', 'ETH', 'BTC', 'TEOS')
+
+
+def generate(rng, address, count, end):
+    step = timedelta(days=365) / count
+    for i in range(count):
+        sent = rng.random() < 0.5
+        yield {
+            'hash': f'0x{address}{i:08x}',
+            'from_address': address if sent else f'peer-{rng.randrange(1000)}',
+            'to_address': f'peer-{rng.randrange(1000)}' if sent else address,
+            'amount': rng.random() * 10,
+            'symbol': rng.choice(SYMBOLS),
+            'network': 'solana',
+            'status': rng.choice(('pending', 'confirmed', 'confirmed', 'failed')),
+            'timestamp': (end - step * (count - i)).isoformat(),
+            'fee': 0.001
+        }
+
+
+def rescan(transactions, address):
+    # What a handler without rollups has to do on every request
+    summary = {'total': 0, 'by_status': {}, 'symbols': {}, 'daily': {}}
+    for transaction in transactions.values():
+        if address not in (transaction['from_address'], transaction['to_address']):
+            continue
+        summary['total'] += 1
+        summary['by_status'][transaction['status']] = summary['by_status'].get(transaction['status'], 0) + 1
+        volume = summary['symbols'].setdefault(transaction['symbol'], [0, 0.0])
+        volume[0] += 1
+        volume[1] += transaction['amount']
+        day = transaction['timestamp'][:10]
+        summary['daily'][day] = summary['daily'].get(day, 0) + 1
+    return summary
+
+
+def min_time(fn, runs):
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1000,10000,100000,1000000')
+    args = parser.parse_args()
+    rng = random.Random(5)
+    end = datetime(2026, 6, 30)
+
+    print(f'{"history":>9}  {"rollup read":>12}  {"rescan":>10}  {"ingest":>10}  {"rebuild":>10}')
+    for size in (int(size) for size in args.sizes.split(',')):
+        transactions = {}
+        index = TransactionIndex()
+        analytics = AnalyticsRollups(index, transactions)
+        address = f'user{size}'
+        start = time.perf_counter()
+        for transaction in generate(rng, address, size, end):
+            transactions[transaction['hash']] = transaction
+            index.add(transaction)
+            analytics.record(transaction)
+        recorded = time.perf_counter() - start
+
+        read = min_time(lambda: (analytics.summary([address]), analytics.history([address], 50)), 20)
+        scan = min_time(lambda: rescan(transactions, address), 1)
+        start = time.perf_counter()
+        analytics.rebuild(transactions.values())
+        rebuild = time.perf_counter() - start
+        print(f'{size:>9}  {read * 1e3:>9.3f} ms  {scan * 1e3:>7.1f} ms  '
+              f'{recorded / size * 1e6:>7.1f} us  {rebuild:>8.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Backtest latency on one year of minute bars: each strategy vectorized versus
+replaying the bars through the live per-tick ``on_tick`` path, plus a
+parameter sweep on the process pool versus one process.
+
+    python -m benchmarks.backtest_bench --bars 525600 --processes 2
+"""
+
+import argparse
+import time
+
+from services.backtest import CLOSE, MINUTES_PER_YEAR, Backtester, HistoryStore, _sweep_chunk, parameter_grid
+from services.strategies import create_strategy
+
+CASES = [
+    ('sma_crossover', {'fast': 10, 'slow': 60}),
+    ('momentum', {'lookback': 30, 'threshold': 0.002}),
+    ('mean_reversion', {'window': 60, 'z': 2}),
+    ('linear_regression', {'window': 2000, 'threshold': 0.00001})
+]
+GRID = {'fast': [5, 10, 20, 40], 'slow': [60, 120, 240, 480]}
+
+
+def replay(name, parameters, close):
+    # The live path: one on_tick call per bar
+    strategy = create_strategy(name, parameters)
+    state = strategy.init_state()
+    return [strategy.on_tick(state, price) for price in close.tolist()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bars', type=int, default=MINUTES_PER_YEAR)
+    parser.add_argument('--processes', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    history = HistoryStore(reference_prices={'SOL': 98.32})
+    bars = history.get('SOL', args.bars)
+    backtester = Backtester(history, processes=args.processes)
+    print(f'{args.bars} bars')
+
+    print(f'{"strategy":<18}  {"vectorized":>11}  {"per tick":>10}  sharpe')
+    for name, parameters in CASES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = backtester.run(name, parameters, bars)
+            timings.append(time.perf_counter() - start)
+        if create_strategy(name, parameters).heavy:
+            per_tick = '-'
+        else:
+            start = time.perf_counter()
+            replay(name, parameters, bars[:, CLOSE])
+            per_tick = f'{(time.perf_counter() - start) * 1e3:.0f} ms'
+        print(f'{name:<18}  {min(timings) * 1e3:>8.1f} ms  {per_tick:>10}  {result["stats"]["sharpe"]:.2f}')
+
+    combinations = parameter_grid(GRID)
+    backtester.sweep('sma_crossover', GRID, bars)  # Start the pool workers
+    start = time.perf_counter()
+    backtester.sweep('sma_crossover', GRID, bars)
+    pooled = time.perf_counter() - start
+    start = time.perf_counter()
+    _sweep_chunk('sma_crossover', combinations, {}, bars, 0.001, 10000.0)
+    serial = time.perf_counter() - start
+    print(f'sweep of {len(combinations)}           {pooled * 1e3:.0f} ms on {args.processes} processes, '
+          f'{serial * 1e3:.0f} ms in one')
+    backtester.stop()
+
+
+if __name__ == '__main__':
+    main()
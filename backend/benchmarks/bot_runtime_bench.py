@@ -0,0 +1,86 @@
+"""
+Trading-bot runtime under load: thousands of active bots on a few symbols,
+a publisher pushing ticks onto the bus, and a small share of CPU-heavy
+bots deciding in the process pool.  Reports bot-ticks processed per second
+and tick-to-decision latency.
+
+    python -m benchmarks.bot_runtime_bench --bots 5000 --rate 200 --seconds 10
+"""
+
+import argparse
+import math
+import random
+import time
+
+from services.bot_runtime import BotRuntime
+
+SYMBOLS = {'SOL': 98.32, 'ETH': 2847.52, 'BTC': 43250.00, 'TEOS': 0.0045}
+LIGHT = [
+    ('sma_crossover', {'fast': 5, 'slow': 20}),
+    ('momentum', {'lookback': 10, 'threshold': 0.001}),
+    ('mean_reversion', {'window': 30, 'z': 1.5})
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bots', type=int, default=5000)
+    parser.add_argument('--heavy', type=float, default=0.01, help='share of linear_regression bots')
+    parser.add_argument('--rate', type=float, default=200, help='ticks per second across all symbols')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--processes', type=int, default=2)
+    args = parser.parse_args()
+
+    rng = random.Random(9)
+    runtime = BotRuntime(processes=args.processes)
+    symbols = list(SYMBOLS)
+    heavy = 0
+    for bot_id in range(args.bots):
+        symbol = symbols[bot_id % len(symbols)]
+        if rng.random() < args.heavy:
+            strategy, parameters = 'linear_regression', {'window': 500}
+            heavy += 1
+        else:
+            strategy, parameters = rng.choice(LIGHT)
+        runtime.add(bot_id, f'user-{bot_id}', strategy, dict(parameters, symbol=symbol))
+    print(f'{args.bots} bots on {len(symbols)} symbols ({heavy} heavy)')
+
+    prices = dict(SYMBOLS)
+    # Warm-up: fill strategy windows and start the pool workers
+    for i in range(600 * len(symbols)):
+        symbol = symbols[i % len(symbols)]
+        prices[symbol] *= math.exp(rng.gauss(0, 0.001))
+        runtime.publish(symbol, prices[symbol])
+    time.sleep(3)
+    runtime._latencies.clear()
+    before = dict(runtime.stats)
+
+    interval = 1 / args.rate
+    start = time.perf_counter()
+    next_tick = start
+    published = 0
+    while time.perf_counter() - start < args.seconds:
+        symbol = symbols[published % len(symbols)]
+        prices[symbol] *= math.exp(rng.gauss(0, 0.001))
+        runtime.publish(symbol, prices[symbol])
+        published += 1
+        next_tick += interval
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    time.sleep(1)
+    elapsed = time.perf_counter() - start
+
+    stats = {key: runtime.stats[key] - before[key] for key in before}
+    latencies = sorted(runtime._latencies)
+    print(f'ticks published        {published} ({published / args.seconds:.0f}/s), '
+          f'{stats["conflated"]} conflated')
+    print(f'bot ticks processed    {stats["decisions"]:,} ({stats["decisions"] / elapsed:,.0f}/s)  '
+          f'{stats["offloaded"]} offloaded, {stats["skipped"]} skipped while in flight, {stats["orders"]} orders')
+    print(f'decision latency       p50={latencies[len(latencies) // 2] * 1e3:.2f} ms  '
+          f'p99={latencies[int(len(latencies) * .99)] * 1e3:.2f} ms')
+    runtime.stop()
+
+
+if __name__ == '__main__':
+    main()
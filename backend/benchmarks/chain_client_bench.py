@@ -0,0 +1,114 @@
+"""
+Chain client throughput/latency against the local mock RPC node.
+
+Compares one blocking HTTP request per balance lookup with the pooled,
+batched asyncio client, then checks coalescing and the circuit breaker.
+
+    python -m benchmarks.chain_client_bench --calls 5000 --latency 0.005
+"""
+
+import argparse
+import asyncio
+import secrets
+import time
+
+import requests
+
+from benchmarks.mock_rpc_server import MockRpcServer
+from services.chain_client import ChainClient, CircuitOpenError, RpcError
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def bench_unbatched(server, addresses):
+    session = requests.Session()
+    latencies = []
+    start = time.perf_counter()
+    for i, address in enumerate(addresses):
+        t = time.perf_counter()
+        session.post(server.url, json={'jsonrpc': '2.0', 'id': i, 'method': 'getBalance', 'params': [address]}).json()
+        latencies.append(time.perf_counter() - t)
+    return time.perf_counter() - start, latencies
+
+
+async def bench_batched(server, addresses):
+    client = ChainClient('solana', {'rpc_url': server.url, 'decimals': 9})
+    latencies = []
+
+    async def one(address):
+        t = time.perf_counter()
+        await client.get_balance(address)
+        latencies.append(time.perf_counter() - t)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(address) for address in addresses))
+    elapsed = time.perf_counter() - start
+    stats = dict(client.stats)
+    await client.close()
+    return elapsed, latencies, stats
+
+
+async def check_coalescing(server):
+    client = ChainClient('ethereum', {'rpc_url': server.url, 'decimals': 18})
+    before = server.rpc_calls
+    address = '0x' + secrets.token_hex(20)
+    await asyncio.gather(*(client.get_balance(address) for _ in range(1000)))
+    print(f'coalescing: 1000 identical calls -> {server.rpc_calls - before} RPC call(s)')
+    await client.close()
+
+
+async def check_breaker(server):
+    client = ChainClient('bitcoin', {'rpc_url': server.url, 'decimals': 8}, timeout=1.0)
+    server.fail = True
+    failures = rejected = 0
+    for i in range(10):
+        try:
+            await client.get_balance(f'bc1addr{i}')
+        except CircuitOpenError:
+            rejected += 1
+        except RpcError:
+            failures += 1
+    server.fail = False
+    print(f'circuit breaker: {failures} failed, {rejected} rejected without a request, state={client.breaker.state}')
+
+    # Once the reset timeout passes, only one probe goes out while half-open
+    client.breaker.opened_at -= client.breaker.reset_timeout
+    before = server.rpc_calls
+    results = await asyncio.gather(*(client.get_balance(f'bc1probe{i}') for i in range(20)), return_exceptions=True)
+    probed = sum(not isinstance(result, Exception) for result in results)
+    print(f'half-open: {probed} probe(s) sent ({server.rpc_calls - before} RPC call(s)), state={client.breaker.state}')
+    await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=0.005)
+    args = parser.parse_args()
+
+    server = MockRpcServer(latency=args.latency).start()
+    addresses = [secrets.token_urlsafe(32)[:44] for _ in range(args.calls)]
+
+    unbatched_n = min(args.calls, 500)
+    before = server.http_requests
+    elapsed, latencies = bench_unbatched(server, addresses[:unbatched_n])
+    print(f'unbatched x{unbatched_n}: {unbatched_n / elapsed:9,.0f} calls/s  '
+          f'p50={percentile(latencies, .5) * 1e3:.2f} ms  p99={percentile(latencies, .99) * 1e3:.2f} ms  '
+          f'http={server.http_requests - before}')
+
+    before = server.http_requests
+    elapsed, latencies, stats = asyncio.run(bench_batched(server, addresses))
+    print(f'batched   x{args.calls}: {args.calls / elapsed:9,.0f} calls/s  '
+          f'p50={percentile(latencies, .5) * 1e3:.2f} ms  p99={percentile(latencies, .99) * 1e3:.2f} ms  '
+          f'http={server.http_requests - before}  batches={stats["batches"]}')
+
+    asyncio.run(check_coalescing(server))
+    asyncio.run(check_breaker(server))
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Chat fan-out: many concurrent listeners blocked on one channel, each
+holding only a cursor into the shared ring buffer.
+
+Reports resident memory per listener and publish-to-delivery latency,
+plus the memory of the bounded history after a long run of messages.
+
+    python -m benchmarks.chat_bench --listeners 10000 --messages 10
+"""
+
+import argparse
+import resource
+import sys
+import threading
+import time
+
+from models.chat import Chat
+
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[1])
+    return pages * resource.getpagesize() / 2 ** 20
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def listener(channel, messages, latencies, ready):
+    cursor = Chat.get_channel(channel).next_id - 1
+    ready.release()
+    received = 0
+    while received < messages:
+        entries = Chat.wait_for_messages(channel, cursor, timeout=30)
+        now = time.perf_counter()
+        for message, frame in entries:
+            latencies.append(now - message['message'])
+        received += len(entries)
+        if entries:
+            cursor = entries[-1][0]['id']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--listeners', type=int, default=10000)
+    parser.add_argument('--messages', type=int, default=10)
+    parser.add_argument('--interval', type=float, default=0.5)
+    parser.add_argument('--history', type=int, default=1000000)
+    parser.add_argument('--switch-interval', type=float, default=0.05,
+                        help='GIL switch interval; the 5 ms default thrashes with 10k runnable threads')
+    args = parser.parse_args()
+    sys.setswitchinterval(args.switch_interval)
+
+    channel = 'bench'
+    threading.stack_size(256 * 1024)
+    base = rss_mb()
+    latencies = []
+    ready = threading.Semaphore(0)
+    threads = []
+    for _ in range(args.listeners):
+        thread = threading.Thread(target=listener, args=(channel, args.messages, latencies, ready), daemon=True)
+        thread.start()
+        threads.append(thread)
+    for _ in range(args.listeners):
+        ready.acquire()
+    idle = rss_mb()
+    print(f'{args.listeners} listeners connected   rss +{idle - base:.1f} MB  '
+          f'({(idle - base) * 1024 / args.listeners:.1f} KB/listener, mostly thread stacks)')
+
+    waves = []
+    for i in range(args.messages):
+        # The payload is the send time, so listeners can measure delivery latency
+        sent = time.perf_counter()
+        Chat.send_message('bench', sent, channel)
+        # One wave at a time: wait until every listener has this message
+        while len(latencies) < args.listeners * (i + 1):
+            time.sleep(0.01)
+        waves.append(time.perf_counter() - sent)
+        time.sleep(args.interval)
+    for thread in threads:
+        thread.join(timeout=30)
+
+    delivered = len(latencies)
+    expected = args.listeners * args.messages
+    print(f'fan-out                delivered {delivered}/{expected}  '
+          f'p50={percentile(latencies, .5) * 1e3:.1f} ms  p99={percentile(latencies, .99) * 1e3:.1f} ms  '
+          f'max={max(latencies) * 1e3:.1f} ms')
+    print(f'                       full wave (last listener) p50={percentile(waves, .5) * 1e3:.1f} ms  '
+          f'max={max(waves) * 1e3:.1f} ms')
+
+    before = rss_mb()
+    for i in range(args.history):
+        Chat.send_message('bench', f'history message {i}', 'history')
+    after = rss_mb()
+    retained = len(Chat.get_channel('history').latest(Chat.capacity))
+    print(f'history                {args.history} messages sent, {retained} retained, rss +{after - before:.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Confirmation tracker with a large pending set against the mock RPC node.
+
+Shows that each tick costs a bounded number of HTTP round trips no matter
+how many transactions are pending.
+
+    python -m benchmarks.confirmation_bench --pending 100000 --ticks 10
+"""
+
+import argparse
+import time
+
+from benchmarks.mock_rpc_server import MockRpcServer
+from services.chain_client import ChainClients
+from services.confirmations import ConfirmationTracker, RpcConfirmationSource
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pending', type=int, default=100000)
+    parser.add_argument('--ticks', type=int, default=10)
+    parser.add_argument('--max-per-tick', type=int, default=1000)
+    args = parser.parse_args()
+
+    server = MockRpcServer(block_time=0.2).start()
+    networks = {'solana': {'rpc_url': server.url, 'decimals': 9}}
+    clients = ChainClients(networks)
+    confirmed = []
+    tracker = ConfirmationTracker(
+        RpcConfirmationSource(clients),
+        on_update=lambda tx_hash, status, confirmations: confirmed.append(tx_hash),
+        max_per_tick=args.max_per_tick,
+        autostart=False
+    )
+
+    for i in range(args.pending):
+        # Half are known to the node, half have not propagated yet
+        tx_hash = server.submit() if i % 2 == 0 else f'unknown-{i}'
+        tracker.track({'hash': tx_hash, 'network': 'solana'})
+    print(f'{len(tracker)} pending transactions tracked')
+
+    time.sleep(32 * 0.2)
+    for n in range(args.ticks):
+        before = server.http_requests
+        start = time.perf_counter()
+        polled = tracker.tick()
+        elapsed = time.perf_counter() - start
+        print(f'tick {n:<3} polled={polled:<6} http_requests={server.http_requests - before:<4} '
+              f'{elapsed * 1e3:7.1f} ms  confirmed so far={len(confirmed)}')
+
+    clients.close()
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Copy-trade fan-out latency against follower count, chunked batches on the
+worker pool versus one order call per follower, plus follower-graph memory.
+
+    python -m benchmarks.copy_trading_bench --sizes 1000,10000,100000,500000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from models.social_graph import FollowGraph
+from services.copy_trading import CopyTradeEngine
+
+
+class BatchSink:
+    """Stands in for an order gateway that accepts a batch per call"""
+
+    def __init__(self):
+        self.calls = 0
+        self.orders = 0
+
+    def __call__(self, trade, follower_ids, amounts):
+        self.calls += 1
+        self.orders += len(follower_ids)
+
+
+def per_follower(graph, leader_id, trade, ratios, submit):
+    # One order per follower, as a naive handler would do it
+    for follower_id in graph.get_followers(leader_id, 0, graph.follower_count(leader_id)):
+        amount = trade['amount'] * ratios.get(follower_id, 1.0)
+        submit({'follower_id': follower_id, 'symbol': trade['symbol'], 'amount': amount})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1000,10000,100000,500000')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    graph = FollowGraph()
+    gc.collect()
+    tracemalloc.start()
+    edges = 0
+    for size in sizes:
+        for i in range(size):
+            graph.follow(f'user-{i}', f'leader-{size}')
+        edges += size
+    graph_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'graph                  {len(graph)} users, {edges} edges, '
+          f'{graph_bytes / 2 ** 20:.1f} MB incl. interned id strings ({graph_bytes / edges:.0f} B/edge, '
+          f'of which 8 B is adjacency)')
+
+    sink = BatchSink()
+    engine = CopyTradeEngine(graph, sink, workers=args.workers, chunk_size=args.chunk_size)
+    for i in range(0, max(sizes), 10):
+        engine.set_copy_ratio(f'user-{i}', 0.5)
+    ratios = {f'user-{i}': 0.5 for i in range(0, max(sizes), 10)}
+    trade = {'symbol': 'SOL', 'side': 'buy', 'amount': 10.0}
+    engine.on_trade(f'leader-{sizes[0]}', trade).result()  # Warm the pool
+
+    print(f'{"followers":>10}  {"chunked fan-out":>16}  {"per follower":>13}  chunks')
+    for size in sizes:
+        leader = f'leader-{size}'
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fan_out = engine.on_trade(leader, trade)
+            orders = fan_out.result()
+            timings.append(time.perf_counter() - start)
+        assert orders == size
+        submitted = []
+        start = time.perf_counter()
+        per_follower(graph, leader, trade, ratios, submitted.append)
+        naive = time.perf_counter() - start
+        print(f'{size:>10}  {min(timings) * 1e3:>13.1f} ms  {naive * 1e3:>10.1f} ms  {len(fan_out.futures):>6}')
+
+    print(f'follower_count         {min_time(lambda: graph.follower_count(f"leader-{sizes[-1]}")) * 1e9:.0f} ns')
+    engine.stop()
+
+
+def min_time(fn, runs=10000):
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs
+
+
+if __name__ == '__main__':
+    main()
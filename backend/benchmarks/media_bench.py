@@ -0,0 +1,97 @@
+"""
+NFT gallery load: upload latency with background thumbnailing, then a
+gallery of N tiles served cold (thumbnails from disk), hot (LRU), and as
+304 revalidations, against re-encoding a thumbnail from the original on
+every request.
+
+    python -m benchmarks.media_bench --images 300 --tiles 300
+"""
+
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+
+from flask import Flask
+from PIL import Image
+
+from api.nft_images import nft_images_bp
+from services.media import MediaStore
+
+
+def make_image(rng, size):
+    # Noisy gradient so encoders do real work
+    image = Image.radial_gradient('L').resize((size, size))
+    noise = Image.effect_noise((size, size), 40)
+    colour = Image.merge('RGB', (image, noise, Image.new('L', (size, size), rng.randrange(256))))
+    out = io.BytesIO()
+    colour.save(out, 'JPEG', quality=90)
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--images', type=int, default=300)
+    parser.add_argument('--tiles', type=int, default=300)
+    parser.add_argument('--pixels', type=int, default=1024)
+    parser.add_argument('--size', type=int, default=256)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    rng = random.Random(4)
+    app = Flask(__name__)
+    media = MediaStore(tempfile.mkdtemp(), workers=args.workers)
+    app.extensions['media'] = media
+    app.config['MAX_IMAGE_BYTES'] = 20 * 2 ** 20
+    app.register_blueprint(nft_images_bp)
+    client = app.test_client()
+
+    blobs = [make_image(rng, args.pixels) for _ in range(args.images)]
+    digests = []
+    start = time.perf_counter()
+    for blob in blobs:
+        digests.append(client.post('/api/nft/image', data=blob).json['digest'])
+    uploaded = time.perf_counter() - start
+    while media.performance()['pending_thumbnails']:
+        time.sleep(0.01)
+    processed = time.perf_counter() - start
+    print(f'{args.images} uploads of {args.pixels}px JPEG: {uploaded / args.images * 1e3:.1f} ms each to respond, '
+          f'all {len(media.sizes)} thumbnail sizes done after {processed:.1f} s')
+
+    tiles = [f'/api/nft/image/{digests[i % len(digests)]}?size={args.size}' for i in range(args.tiles)]
+
+    def gallery(headers=None):
+        start = time.perf_counter()
+        for url in tiles:
+            response = client.get(url, headers=headers(url) if headers else None)
+            response.close()
+        return time.perf_counter() - start
+
+    media.cache = type(media.cache)(media.cache.max_bytes)  # Drop what the workers cached
+    cold = gallery()
+    hot = gallery()
+    revalidated = gallery(lambda url: {'If-None-Match': client.get(url).headers['ETag']})
+    revalidated -= hot  # Fetching the ETag above costs one hot request per tile
+
+    start = time.perf_counter()
+    for url in tiles:
+        digest = url.rsplit('/', 1)[1].split('?')[0]
+        with Image.open(media.original_path(digest)) as image:
+            image.thumbnail((args.size, args.size))
+            image.save(io.BytesIO(), 'WEBP', quality=80, method=0)
+    reencode = time.perf_counter() - start
+
+    print(f'gallery of {args.tiles} tiles at {args.size}px:')
+    print(f'  re-encode per request  {reencode * 1e3:8.0f} ms')
+    print(f'  cold (disk)            {cold * 1e3:8.0f} ms')
+    print(f'  hot (LRU)              {hot * 1e3:8.0f} ms')
+    print(f'  304 revalidation       {revalidated * 1e3:8.0f} ms')
+    print(media.performance())
+    media.stop()
+    os.system(f'rm -rf {media.directory}')
+
+
+if __name__ == '__main__':
+    main()
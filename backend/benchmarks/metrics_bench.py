@@ -0,0 +1,131 @@
+"""
+Instrumentation overhead: cost of one histogram observation, of the timing
+decorator and context manager around a trivial call, of the request
+middleware around a no-op WSGI app and around the real app (cached
+/api/prices fast path and a Flask-handled route), of recording from
+several threads at once, and of rendering /metrics.
+
+    python -m benchmarks.metrics_bench --iterations 200000
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+
+from werkzeug.test import EnvironBuilder
+
+from services.metrics import Metrics, MetricsMiddleware
+
+os.environ.setdefault('TEOS_RATE_LIMIT', '0')  # Load from one client would mostly get 429s
+
+
+def per_call(function, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def start_response(status, headers, exc_info=None):
+    pass
+
+
+def call_wsgi(app, environ):
+    def call():
+        body = app(dict(environ), start_response)
+        for _ in body:
+            pass
+        if hasattr(body, 'close'):
+            body.close()
+    return call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=200000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+    n = args.iterations
+
+    metrics = Metrics()
+    rng = random.Random(1)
+    latencies = [int(rng.lognormvariate(7, 1.5)) for _ in range(1024)]
+    values = iter(latencies * (n // len(latencies) + 1))
+    print(f'record()                         {per_call(lambda: metrics.record(("timer", "x"), next(values)), n):6.2f} us')
+
+    def noop():
+        return None
+    timed = metrics.timed('noop')(noop)
+    bare = per_call(noop, n)
+    print(f'@timed overhead                  {per_call(timed, n) - bare:6.2f} us')
+
+    def block():
+        with metrics.time('block'):
+            pass
+    print(f'with time() overhead             {per_call(block, n) - bare:6.2f} us')
+
+    def list_app(environ, start_response):
+        start_response('200 OK', [])
+        return [b'ok']
+
+    def iter_app(environ, start_response):
+        start_response('200 OK', [])
+        return iter([b'ok'])
+
+    environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': '/x', 'teos.route': '/x'}
+    for label, app in (('list body', list_app), ('streamed body', iter_app)):
+        plain = per_call(call_wsgi(app, environ), n)
+        wrapped = per_call(call_wsgi(MetricsMiddleware(app, metrics), environ), n)
+        print(f'middleware, {label:20} {wrapped - plain:6.2f} us  ({plain:.2f} -> {wrapped:.2f})')
+
+    import app as backend
+    inner = backend.app.wsgi_app.wsgi_app  # Below the metrics middleware
+    backend.app.test_client().get('/api/prices')
+    for path in ('/api/prices', '/api/prices/cache'):
+        environ = EnvironBuilder(path=path).get_environ()
+        plain = per_call(call_wsgi(inner, environ), n // 20)
+        wrapped = per_call(call_wsgi(backend.app.wsgi_app, environ), n // 20)
+        print(f'app {path:28} {wrapped - plain:6.2f} us  ({plain:.2f} -> {wrapped:.2f})')
+
+    contended = Metrics()
+    passes = max(1, n // args.threads // len(latencies))
+
+    def worker():
+        for value in latencies * passes:
+            contended.record(('http', '/api/prices', 'GET'), value)
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    recorded = contended.histograms()[('http', '/api/prices', 'GET')].count
+    expected = args.threads * passes * len(latencies)
+    print(f'{args.threads} threads recording            {elapsed / recorded * 1e6:6.2f} us  '
+          f'({recorded:,} of {expected:,} observations merged)')
+
+    scraped = Metrics()
+    for _ in range(args.threads):
+        def fill():
+            for route in range(60):
+                for value in latencies[:200]:
+                    scraped.record(('http', f'/api/route/{route}', 'GET'), value)
+        thread = threading.Thread(target=fill)
+        thread.start()
+        thread.join()
+    start = time.perf_counter()
+    text = scraped.render()
+    print(f'render 60 routes x {args.threads} threads     {(time.perf_counter() - start) * 1e3:6.2f} ms  '
+          f'({len(text) / 1024:.0f} KB)')
+    histogram = scraped.histograms()[('http', '/api/route/0', 'GET')]
+    exact = sorted(latencies[:200] * args.threads)
+    print(f'p50/p99 HDR vs exact             {histogram.quantile(0.5) * 1e6:.0f}/{histogram.quantile(0.99) * 1e6:.0f} us '
+          f'vs {exact[len(exact) // 2]}/{exact[int(len(exact) * 0.99)]} us')
+    os._exit(0)  # Skip joining the app's background threads
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Local JSON-RPC node stand-in for offline throughput and latency tests.
+
+Understands the Solana, Ethereum and bitcoind methods used by
+``services.chain_client`` (single and batched requests, HTTP keep-alive).
+Balances are derived from the address, and submitted transactions gain one
+confirmation every ``block_time`` seconds.
+
+    python -m benchmarks.mock_rpc_server --port 8899 --latency 0.005
+"""
+
+import argparse
+import hashlib
+import json
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _units(address):
+    return int.from_bytes(hashlib.sha256(address.encode()).digest()[:4], 'big')
+
+
+class MockRpcServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0, block_time=1.0):
+        self.latency = latency
+        self.block_time = block_time
+        self.fail = False
+        self.http_requests = 0
+        self.rpc_calls = 0
+        self.submitted = {}
+        self._lock = threading.Lock()
+        super().__init__(address, _Handler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def submit(self, tx_hash=None):
+        """Register a transaction as broadcast now; returns its hash"""
+        tx_hash = tx_hash or '0x' + secrets.token_hex(32)
+        with self._lock:
+            self.submitted[tx_hash] = time.monotonic()
+        return tx_hash
+
+    def confirmations(self, tx_hash):
+        submitted_at = self.submitted.get(tx_hash)
+        if submitted_at is None:
+            return None
+        return int((time.monotonic() - submitted_at) / self.block_time)
+
+    def dispatch(self, method, params):
+        if method == 'getBalance':
+            return {'context': {'slot': 1}, 'value': _units(params[0])}
+        if method == 'getTokenAccountsByOwner':
+            amount = _units(params[0]) / 1e6
+            info = {'tokenAmount': {'uiAmount': amount}}
+            return {'value': [{'account': {'data': {'parsed': {'info': info}}}}]}
+        if method == 'eth_getBalance':
+            return hex(_units(params[0]) * 10 ** 9)
+        if method == 'scantxoutset':
+            return {'success': True, 'total_amount': _units(params[1][0]) / 1e8}
+        if method in ('sendTransaction', 'eth_sendRawTransaction', 'sendrawtransaction'):
+            return self.submit()
+        if method == 'getSignatureStatuses':
+            statuses = []
+            for signature in params[0]:
+                confirmations = self.confirmations(signature)
+                statuses.append(None if confirmations is None else {'confirmations': confirmations})
+            return {'value': statuses}
+        if method == 'eth_blockNumber':
+            return hex(int(time.monotonic() / self.block_time))
+        if method == 'eth_getTransactionReceipt':
+            confirmations = self.confirmations(params[0])
+            if confirmations is None:
+                return None
+            head = int(time.monotonic() / self.block_time)
+            return {'blockNumber': hex(head - confirmations + 1), 'status': '0x1'}
+        if method == 'getrawtransaction':
+            confirmations = self.confirmations(params[0])
+            if confirmations is None:
+                raise LookupError('No such mempool or blockchain transaction')
+            return {'txid': params[0], 'confirmations': confirmations}
+        raise NotImplementedError(method)
+
+    def handle_rpc(self, request):
+        with self._lock:
+            self.rpc_calls += 1
+        try:
+            result = self.dispatch(request['method'], request.get('params', []))
+        except LookupError as e:
+            return {'jsonrpc': '2.0', 'id': request.get('id'), 'error': {'code': -5, 'message': str(e)}}
+        except NotImplementedError as e:
+            return {'jsonrpc': '2.0', 'id': request.get('id'), 'error': {'code': -32601, 'message': f'Method not found: {e}'}}
+        return {'jsonrpc': '2.0', 'id': request.get('id'), 'result': result}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server = self.server
+        with server._lock:
+            server.http_requests += 1
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if server.latency:
+            time.sleep(server.latency)
+        if server.fail:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if isinstance(body, list):
+            result = [server.handle_rpc(item) for item in body]
+        else:
+            result = server.handle_rpc(body)
+        payload = json.dumps(result).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--block-time', type=float, default=1.0)
+    args = parser.parse_args()
+    server = MockRpcServer(('127.0.0.1', args.port), latency=args.latency, block_time=args.block_time)
+    print(f'Mock RPC node on {server.url}')
+    server.serve_forever()
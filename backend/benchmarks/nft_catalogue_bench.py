@@ -0,0 +1,82 @@
+"""
+NFT catalogue queries at scale: cursor pages with and without filters and
+ownership transfers, against a filtered scan of a plain list.
+
+    python -m benchmarks.nft_catalogue_bench --items 1000000
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from models.nft import NFT, NFTStore
+
+RARITIES = ('Common', 'Uncommon', 'Rare', 'Epic', 'Legendary')
+WEIGHTS = (60, 25, 10, 4, 1)
+
+
+def min_time(fn, runs=200):
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=1000000)
+    parser.add_argument('--owners', type=int, default=100000)
+    parser.add_argument('--collections', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    rarities = rng.choices(RARITIES, WEIGHTS, k=args.items)
+    store = NFTStore()
+    gc.collect()
+    tracemalloc.start()
+    store.bulk_load(
+        NFT(f'Item {i}', owner=f'user-{rng.randrange(args.owners)}', collection=f'collection-{i % args.collections}',
+            rarity=rarities[i])
+        for i in range(args.items)
+    )
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{args.items} NFTs, {used / 2 ** 20:.0f} MB ({used / args.items:.0f} B/NFT incl. indexes)')
+
+    plain = list(store._by_id.values())
+    middle = args.items // 2
+    queries = [
+        ('first page', {}, None),
+        ('deep page', {}, middle),
+        ('owner', {'owner': 'user-42'}, None),
+        ('collection', {'collection': 'collection-7'}, None),
+        ('collection+rarity', {'collection': 'collection-7', 'rarity': 'Legendary'}, None),
+        ('rarity, deep page', {'rarity': 'Epic'}, middle)
+    ]
+    print(f'{"query":<18}  {"indexed page":>12}  {"list scan":>10}')
+    for label, filters, after in queries:
+        indexed = min_time(lambda: store.page(50, after, **filters))
+
+        def scan():
+            matches = []
+            for nft in plain:
+                if (after is None or nft.id > after) and all(getattr(nft, f) == v for f, v in filters.items()):
+                    matches.append(nft)
+                    if len(matches) == 50:
+                        break
+            return matches
+        print(f'{label:<18}  {indexed * 1e6:>9.1f} us  {min_time(scan, 3) * 1e3:>7.1f} ms')
+
+    ids = rng.sample(range(1, args.items + 1), 10000)
+    start = time.perf_counter()
+    for nft_id in ids:
+        store.transfer(nft_id, f'user-{rng.randrange(args.owners)}')
+    print(f'transfer               {(time.perf_counter() - start) / len(ids) * 1e6:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
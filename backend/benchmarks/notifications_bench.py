@@ -0,0 +1,135 @@
+"""
+Notification inboxes and streaming fan-out.
+
+1. Inbox memory: publish more notifications than the per-user cap and show
+   that retained memory stops at ``users * capacity`` notifications.
+2. Streams: a client process opens one SSE stream per user against the
+   asyncio stream server, then one notification is published to every
+   user; reports server memory per open stream and delivery latency.
+
+    python -m benchmarks.notifications_bench --users 10000 --streams 15000
+
+Each stream is a socket on both sides; raise ``ulimit -n`` for more.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import multiprocessing
+import resource
+import socket
+import time
+import tracemalloc
+
+import aiohttp
+
+from services.notifications import NotificationCenter, NotificationStreamServer
+
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[1])
+    return pages * resource.getpagesize() / 2 ** 20
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def inbox_memory(users, per_user, capacity):
+    center = NotificationCenter(capacity=capacity, max_inboxes=users)
+    gc.collect()
+    tracemalloc.start()
+    for round in range(per_user):
+        for user in range(users):
+            center.publish(f'user-{user}', 'price_alert', {'currency': 'SOL', 'price': 98.32 + round})
+        if round in (capacity - 1, per_user - 1):
+            size, _ = tracemalloc.get_traced_memory()
+            retained = center.memory_stats()['notifications']
+            print(f'after {(round + 1) * users:>9} published   {retained:>9} retained  '
+                  f'{size / 2 ** 20:7.1f} MB  ({size / retained:.0f} B/notification)')
+    tracemalloc.stop()
+
+
+def run_clients(port, streams, opened, results):
+    async def main():
+        latencies = []
+        connector = aiohttp.TCPConnector(limit=0)
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=None)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            async def listen(user):
+                for attempt in range(5):
+                    try:
+                        async with session.get(f'http://127.0.0.1:{port}/api/notifications/user-{user}/stream') as response:
+                            async for line in response.content:
+                                if line.startswith(b'data: '):
+                                    notification = json.loads(line[6:])
+                                    latencies.append(time.monotonic() - notification['data']['sent'])
+                                    return
+                    except aiohttp.ClientError:
+                        # Connect bursts can overflow the listen backlog
+                        await asyncio.sleep(0.5 * (attempt + 1))
+
+            tasks = []
+            for start in range(0, streams, 500):
+                tasks.extend(asyncio.create_task(listen(user)) for user in range(start, min(streams, start + 500)))
+                await asyncio.sleep(0.05)
+            opened.set()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        results.put(latencies)
+
+    asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--per-user', type=int, default=300)
+    parser.add_argument('--capacity', type=int, default=100)
+    parser.add_argument('--streams', type=int, default=15000)
+    args = parser.parse_args()
+
+    inbox_memory(args.users, args.per_user, args.capacity)
+
+    port = free_port()
+    context = multiprocessing.get_context('fork')
+    opened, results = context.Event(), context.Queue()
+    # Fork the clients before the server starts any threads
+    clients = context.Process(target=run_clients, args=(port, args.streams, opened, results))
+    clients.start()
+
+    center = NotificationCenter()
+    server = NotificationStreamServer(center, port=port)
+    gc.collect()
+    base = rss_mb()
+    server.start()
+    opened.wait()
+    deadline = time.monotonic() + 120
+    while center.subscribers < args.streams and time.monotonic() < deadline:
+        time.sleep(0.1)
+    held = rss_mb()
+    print(f'{center.subscribers} open streams on one event loop   rss +{held - base:.1f} MB  '
+          f'({(held - base) * 1024 / max(1, center.subscribers):.1f} KB/stream)')
+
+    start = time.monotonic()
+    for user in range(args.streams):
+        center.publish(f'user-{user}', 'price_alert', {'sent': time.monotonic()})
+    published = time.monotonic() - start
+    latencies = results.get(timeout=300)
+    clients.join()
+    print(f'fan-out                published {args.streams} in {published * 1e3:.0f} ms, '
+          f'delivered {len(latencies)}  p50={percentile(latencies, .5) * 1e3:.1f} ms  '
+          f'p99={percentile(latencies, .99) * 1e3:.1f} ms')
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Price-alert matching: replay a synthetic random-walk price stream against
+millions of registered alerts and report the per-tick cost, compared with
+checking every alert on every tick.
+
+    python -m benchmarks.price_alerts_bench --alerts 2000000 --ticks 100000
+"""
+
+import argparse
+import math
+import random
+import time
+
+from services.price_alerts import PriceAlertEngine
+
+START_PRICES = {'SOL': 98.32, 'ETH': 2847.52, 'BTC': 43250.00, 'TEOS': 0.0045}
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def synthetic_alerts(count, rng):
+    currencies = list(START_PRICES)
+    for i in range(count):
+        currency = currencies[i % len(currencies)]
+        price = START_PRICES[currency]
+        # Targets spread log-normally around the starting price
+        target = price * math.exp(rng.gauss(0, 0.15))
+        yield f'user-{i % 250000}', currency, target, 'above' if target > price else 'below'
+
+
+def price_stream(ticks, rng, volatility):
+    prices = dict(START_PRICES)
+    currencies = list(prices)
+    for i in range(ticks):
+        currency = currencies[i % len(currencies)]
+        prices[currency] *= math.exp(rng.gauss(0, volatility))
+        yield currency, prices[currency]
+
+
+def naive_tick(alerts, fired, currency, price):
+    # What evaluating alerts without an index costs: touch every alert
+    matched = 0
+    for i, (_, alert_currency, target, direction) in enumerate(alerts):
+        if i in fired or alert_currency != currency:
+            continue
+        if (target <= price) if direction == 'above' else (target >= price):
+            fired.add(i)
+            matched += 1
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--alerts', type=int, default=2000000)
+    parser.add_argument('--ticks', type=int, default=100000)
+    parser.add_argument('--volatility', type=float, default=0.0005)
+    parser.add_argument('--naive-ticks', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    alerts = list(synthetic_alerts(args.alerts, rng))
+    delivered = []
+    engine = PriceAlertEngine(notify=delivered.extend)
+    start = time.perf_counter()
+    engine.bulk_load(alerts)
+    print(f'bulk load              {len(engine)} alerts in {time.perf_counter() - start:.2f} s')
+
+    latencies = []
+    stream = list(price_stream(args.ticks, random.Random(5), args.volatility))
+    start = time.perf_counter()
+    for currency, price in stream:
+        t = time.perf_counter()
+        engine.on_price(currency, price)
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    print(f'indexed ticks          p50={percentile(latencies, .5) * 1e6:.1f} us  '
+          f'p99={percentile(latencies, .99) * 1e6:.1f} us  max={max(latencies) * 1e6:.0f} us  '
+          f'{args.ticks / elapsed:,.0f} ticks/s')
+    print(f'                       {len(delivered)} alerts triggered, {len(engine)} still pending')
+
+    fired = set()
+    latencies = []
+    for currency, price in stream[:args.naive_ticks]:
+        t = time.perf_counter()
+        naive_tick(alerts, fired, currency, price)
+        latencies.append(time.perf_counter() - t)
+    print(f'scan every alert       p50={percentile(latencies, .5) * 1e3:.1f} ms/tick  ({args.naive_ticks} ticks)')
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        engine.add('user-x', 'BTC', 43250.00 * math.exp(rng.gauss(0, 0.15)), current_price=43250.00)
+    print(f'single add             {(time.perf_counter() - start) / 10000 * 1e6:.1f} us/alert')
+
+
+if __name__ == '__main__':
+    main()
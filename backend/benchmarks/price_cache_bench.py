@@ -0,0 +1,65 @@
+"""
+Price cache against the local stub feed: burst coalescing, warm and stale reads.
+
+    python -m benchmarks.price_cache_bench --latency 0.1 --burst 200
+"""
+
+import argparse
+import threading
+import time
+
+from benchmarks.stub_price_server import StubPriceServer
+from services.price_cache import HttpPriceSource, PriceCache
+
+
+def burst(cache, symbol, size):
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(size)
+
+    def worker():
+        barrier.wait()
+        start = time.perf_counter()
+        cache.get(symbol)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(size)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.1)
+    parser.add_argument('--burst', type=int, default=200)
+    parser.add_argument('--ttl', type=float, default=1.0)
+    args = parser.parse_args()
+
+    server = StubPriceServer(latency=args.latency).start()
+    # Background refresher left off so each phase is observable
+    cache = PriceCache(HttpPriceSource(server.url), ['SOL'], ttl=args.ttl, stale_ttl=60, autostart=False)
+
+    p50, worst = burst(cache, 'SOL', args.burst)
+    print(f'cold burst x{args.burst}: upstream requests={server.requests}  p50={p50 * 1e3:.1f} ms  max={worst * 1e3:.1f} ms')
+
+    requests_before = server.requests
+    p50, worst = burst(cache, 'SOL', args.burst)
+    print(f'warm burst x{args.burst}: upstream requests={server.requests - requests_before}  p50={p50 * 1e6:.1f} us  max={worst * 1e6:.1f} us')
+
+    time.sleep(args.ttl * 1.1)
+    requests_before = server.requests
+    p50, worst = burst(cache, 'SOL', args.burst)
+    time.sleep(args.latency * 2)
+    print(f'stale burst x{args.burst}: upstream requests={server.requests - requests_before}  p50={p50 * 1e6:.1f} us  max={worst * 1e6:.1f} us')
+    print('stats:', cache.stats())
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+QR endpoint latency: cold renders (new addresses) versus warm LRU hits and
+304 revalidations, a burst of new wallets from many request threads, and
+qrcode's stock PIL renderer for comparison.
+
+    python -m benchmarks.qr_bench --addresses 2000 --threads 16
+"""
+
+import argparse
+import io
+import secrets
+import threading
+import time
+
+import qrcode
+from flask import Flask
+
+from api.qr import qr_bp
+from services.qr import QrRenderer
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def timed_requests(client, urls, headers=None):
+    latencies = []
+    for url in urls:
+        start = time.perf_counter()
+        client.get(url, headers=headers(url) if headers else None)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label, latencies):
+    print(f'{label:<24} p50={percentile(latencies, 50) * 1e3:7.3f} ms  p99={percentile(latencies, 99) * 1e3:7.3f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--addresses', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    renderer = QrRenderer(workers=args.workers)
+    app.extensions['qr'] = renderer
+    app.register_blueprint(qr_bp)
+    client = app.test_client()
+    addresses = [secrets.token_urlsafe(32)[:44] for _ in range(args.addresses)]
+
+    stock = []
+    for address in addresses[:200]:
+        start = time.perf_counter()
+        qrcode.make(address, box_size=6).save(io.BytesIO())
+        stock.append(time.perf_counter() - start)
+    report('stock qrcode PNG', stock)
+
+    for image_format in ('png', 'svg'):
+        urls = [f'/api/qr/{address}?format={image_format}&size=256' for address in addresses]
+        report(f'cold {image_format}', timed_requests(client, urls))
+        report(f'warm {image_format}', timed_requests(client, urls))
+        etags = {url: client.get(url).headers['ETag'] for url in urls}
+        report(f'304 {image_format}', timed_requests(client, urls, lambda url: {'If-None-Match': etags[url]}))
+
+    # Burst: many request threads asking for new addresses at once
+    burst = [secrets.token_urlsafe(32)[:44] for _ in range(args.addresses)]
+    latencies = []
+    lock = threading.Lock()
+
+    def request_thread(chunk):
+        local = timed_requests(app.test_client(), [f'/api/qr/{address}' for address in chunk])
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=request_thread, args=(burst[i::args.threads],)) for i in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    report(f'burst x{args.threads} threads', latencies)
+    print(f'burst throughput         {len(burst) / elapsed:.0f} renders/s on {args.workers} render workers')
+    print(renderer.performance())
+    renderer.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Admission control overhead: time per request spent in the middleware (in
+front of a no-op app) for one hot client, for many distinct clients (bucket
+creation plus idle eviction), for a templated route, from several threads
+at once, and through ``RedisBuckets`` on the in-process ``FakeRedis``.
+
+    python -m benchmarks.rate_limit_bench --requests 200000 --clients 100000
+"""
+
+import argparse
+import threading
+import time
+
+from services.rate_limit import AdmissionControl, FakeRedis, LocalBuckets, RedisBuckets
+
+ROUTES = {
+    'POST /api/wallet/create': (0.2, 5),
+    'POST /api/wallet/<wallet_id>/send': (1, 5),
+    'POST /api/swap/quote': (5, 20),
+}
+
+
+def noop_app(environ, start_response):
+    return [b'']
+
+
+def start_response(status, headers):
+    pass
+
+
+def run(admission, environs):
+    start = time.perf_counter()
+    for environ in environs:
+        admission(environ, start_response)
+    return (time.perf_counter() - start) / len(environs) * 1e6
+
+
+def environ(path, client, method='GET'):
+    return {'REQUEST_METHOD': method, 'PATH_INFO': path, 'REMOTE_ADDR': client}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--clients', type=int, default=100000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    def admission(backend=None):
+        # Generous limits so every request goes all the way through
+        return AdmissionControl(noop_app, client=(1e9, 1e9), default=(1e9, 1e9), routes=ROUTES, backend=backend)
+
+    hot = [environ('/api/prices', '10.0.0.1')] * args.requests
+    print(f'one client, untemplated route     {run(admission(), hot):6.2f} us/request')
+    templated = [environ('/api/wallet/abc123/send', '10.0.0.1', 'POST')] * args.requests
+    print(f'one client, templated route       {run(admission(), templated):6.2f} us/request')
+
+    many = [environ('/api/prices', f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}') for i in range(args.clients)]
+    buckets = LocalBuckets()
+    control = AdmissionControl(noop_app, client=(50, 100), default=(20, 40), routes=ROUTES, backend=buckets)
+    cost = run(control, many)
+    print(f'{args.clients} new clients              {cost:6.2f} us/request  ({len(buckets)} buckets)')
+    # Skip ahead past the sweep interval: the buckets have all refilled by then
+    buckets.clock = lambda: time.monotonic() + buckets.sweep_interval + 1
+    cost = run(control, many[:args.clients // 10])
+    print(f'after idle period                 {cost:6.2f} us/request  ({len(buckets)} buckets, '
+          f'{buckets.evicted} evicted)')
+
+    control = admission()
+    per_thread = args.requests // args.threads
+    threads = [threading.Thread(target=run, args=(control, [environ('/api/prices', f'10.0.0.{i}')] * per_thread))
+               for i in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(f'{args.threads} threads                         {elapsed / (per_thread * args.threads) * 1e6:6.2f} '
+          f'us/request  ({per_thread * args.threads / elapsed:,.0f} requests/s)')
+
+    fake = FakeRedis()
+    print(f'RedisBuckets on FakeRedis         {run(admission(RedisBuckets(fake)), hot[:args.requests // 4]):6.2f} '
+          f'us/request  (plus a Redis round trip per bucket in production)')
+
+    control = AdmissionControl(noop_app, routes=ROUTES)
+    statuses = []
+    burst = [environ('/api/wallet/create', '10.9.9.9', 'POST')] * 20
+    for e in burst:
+        control(e, lambda status, headers: statuses.append(status[:3]))
+    print(f'20 wallet creations in a burst: {statuses.count("429")} rejected, {control.stats}')
+
+
+if __name__ == '__main__':
+    main()
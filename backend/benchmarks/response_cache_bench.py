@@ -0,0 +1,63 @@
+"""
+Polling load on the cached endpoints: for each of /api/networks,
+/api/staking/opportunities and /api/prices, compare the uncached view
+(rebuilt and jsonified every time) with cached 200s, cached gzip 200s and
+304 revalidations, in CPU time per request through the WSGI app (as a
+server would call it, without the test client's own overhead).
+
+    python -m benchmarks.response_cache_bench --requests 2000
+"""
+
+import argparse
+import os
+import time
+
+from werkzeug.test import EnvironBuilder
+
+os.environ.setdefault('TEOS_RATE_LIMIT', '0')  # Load from one client would mostly get 429s
+
+PATHS = ['/api/networks', '/api/staking/opportunities', '/api/prices']
+
+
+def start_response(status, headers):
+    pass
+
+
+def measure(app, path, requests, headers=None):
+    environ = EnvironBuilder(path=path, headers=headers).get_environ()
+    start = time.process_time()
+    for _ in range(requests):
+        body = app(dict(environ), start_response)
+        b''.join(body)
+        if hasattr(body, 'close'):
+            body.close()
+    return (time.process_time() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    import app as backend
+    app = backend.app
+    cache = backend.response_cache
+
+    print(f'{"endpoint":28} {"uncached":>10} {"cached":>10} {"gzip":>10} {"304":>10}   (us CPU per request)')
+    for path in PATHS:
+        endpoint = backend.app.url_map.bind('').match(path)[0]
+        view = backend.app.view_functions[endpoint]
+        backend.app.view_functions[endpoint] = view.__wrapped__
+        uncached = measure(app, path, args.requests)
+        backend.app.view_functions[endpoint] = view
+        etag = app.test_client().get(path).headers['ETag']
+        cached = measure(app, path, args.requests)
+        gzipped = measure(app, path, args.requests, {'Accept-Encoding': 'gzip'})
+        not_modified = measure(app, path, args.requests, {'If-None-Match': etag})
+        print(f'{path:28} {uncached:10.1f} {cached:10.1f} {gzipped:10.1f} {not_modified:10.1f}')
+    print(cache.performance())
+    os._exit(0)  # Skip joining the app's background threads
+
+
+if __name__ == '__main__':
+    main()
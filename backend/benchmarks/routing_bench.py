@@ -0,0 +1,89 @@
+"""
+Swap routing over a synthetic pool graph: cold route search, warm quotes,
+and the cost of reserve updates with incremental invalidation.
+
+    python -m benchmarks.routing_bench --tokens 1000 --pools 5000 --quotes 20000
+"""
+
+import argparse
+import random
+import time
+
+from services.routing import Pool, SwapRouter
+
+
+def build_graph(router, tokens, pools, hubs, rng):
+    names = [f'T{i}' for i in range(tokens)]
+    hub_names = names[:hubs]
+    prices = {name: rng.uniform(0.01, 1000) for name in names}
+    created = 0
+    # Hubs are fully connected, as major quote assets are in practice
+    for i, a in enumerate(hub_names):
+        for b in hub_names[i + 1:]:
+            depth = rng.uniform(1e7, 1e8)
+            router.add_pool(Pool(f'P{created}', a, b, depth / prices[a], depth / prices[b]))
+            created += 1
+    # Every token gets a pool with a hub so the graph is connected
+    for name in names[hubs:]:
+        hub = rng.choice(hub_names)
+        depth = rng.uniform(1e5, 1e7)
+        router.add_pool(Pool(f'P{created}', name, hub, depth / prices[name], depth / prices[hub]))
+        created += 1
+    while created < pools:
+        a, b = rng.sample(names, 2)
+        depth = rng.uniform(1e4, 1e6)
+        router.add_pool(Pool(f'P{created}', a, b, depth / prices[a], depth / prices[b]))
+        created += 1
+    return names, prices
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=1000)
+    parser.add_argument('--pools', type=int, default=5000)
+    parser.add_argument('--hubs', type=int, default=10)
+    parser.add_argument('--pairs', type=int, default=200)
+    parser.add_argument('--quotes', type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    router = SwapRouter()
+    names, prices = build_graph(router, args.tokens, args.pools, args.hubs, rng)
+    pairs = [tuple(rng.sample(names, 2)) for _ in range(args.pairs)]
+    print(f'graph: {len(router.tokens)} tokens, {len(router.pools)} pools')
+
+    start = time.perf_counter()
+    for a, b in pairs:
+        router.routes(a, b)
+    cold = (time.perf_counter() - start) / len(pairs)
+    reachable = sum(1 for a, b in pairs if router.routes(a, b))
+    print(f'cold route search      {cold * 1e3:8.2f} ms/pair  ({reachable}/{len(pairs)} pairs routable)')
+
+    latencies = []
+    start = time.perf_counter()
+    for i in range(args.quotes):
+        a, b = pairs[i % len(pairs)]
+        t = time.perf_counter()
+        router.quote(a, b, 1000 / prices[a])
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    print(f'warm quote             p50={percentile(latencies, .5) * 1e6:.1f} us  '
+          f'p99={percentile(latencies, .99) * 1e6:.1f} us  {args.quotes / elapsed:,.0f} quotes/s')
+
+    pool_ids = list(router.pools)
+    start = time.perf_counter()
+    for _ in range(1000):
+        pool = router.pools[rng.choice(pool_ids)]
+        router.update_reserves(pool.pool_id, pool.reserve_a * 1.01, pool.reserve_b * 0.99)
+    updates = (time.perf_counter() - start) / 1000
+    invalidated = router.stats['invalidations']
+    print(f'reserve update         {updates * 1e6:8.1f} us/update  ({invalidated} cached pairs invalidated by 1000 updates)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Multi-threaded stress of ``/api/wallet/<id>/send``.
+
+Threads fire sends at a shared set of wallets (plus one deliberately hot
+wallet) and the run fails if any balance went negative or if final
+balances disagree with the sum of accepted debits.  Reports sends/sec as
+the thread count grows.  Set ``TEOS_STORAGE_DIR`` to stress the journaled
+engine instead of the in-memory one.
+
+    python -m benchmarks.send_stress --threads 1,2,4,8,16 --sends 2000
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+
+os.environ.setdefault('TEOS_RATE_LIMIT', '0')  # Load from one client would mostly get 429s
+
+import app as wallet_app
+
+SYMBOL = 'SOL'
+RECIPIENT = 'R' * 44
+
+
+def create_wallets(client, count):
+    return [client.post('/api/wallet/create', json={}).get_json()['wallet']['id'] for _ in range(count)]
+
+
+def run(client, wallet_ids, hot_wallet, threads, sends_per_thread):
+    initial = {wallet_id: wallet_app.wallets[wallet_id]['balance'][SYMBOL] for wallet_id in wallet_ids + [hot_wallet]}
+    debited = defaultdict(float)
+    accepted = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = defaultdict(float)
+        ok = 0
+        barrier.wait()
+        for i in range(sends_per_thread):
+            wallet_id = hot_wallet if i % 4 == 0 else rng.choice(wallet_ids)
+            amount = round(rng.uniform(0.01, 0.5), 4)
+            response = client.post(f'/api/wallet/{wallet_id}/send', json={
+                'to_address': RECIPIENT, 'amount': amount, 'symbol': SYMBOL
+            })
+            if response.status_code == 200:
+                local[wallet_id] += amount
+                ok += 1
+        with lock:
+            for wallet_id, amount in local.items():
+                debited[wallet_id] += amount
+            accepted[0] += ok
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    for wallet_id, before in initial.items():
+        after = wallet_app.wallets[wallet_id]['balance'][SYMBOL]
+        assert after >= -1e-9, f'{wallet_id} overdrawn: {after}'
+        assert abs(before - debited[wallet_id] - after) < 1e-6, f'{wallet_id} lost an update'
+    return threads * sends_per_thread / elapsed, accepted[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', default='1,2,4,8,16')
+    parser.add_argument('--sends', type=int, default=2000, help='sends per thread')
+    parser.add_argument('--wallets', type=int, default=200)
+    args = parser.parse_args()
+
+    client = wallet_app.app.test_client()
+    for threads in [int(n) for n in args.threads.split(',')]:
+        wallet_ids = create_wallets(client, args.wallets)
+        hot_wallet = create_wallets(client, 1)[0]
+        rate, accepted = run(client, wallet_ids, hot_wallet, threads, args.sends)
+        print(f'threads={threads:<3} {rate:9,.0f} sends/s  accepted={accepted:<7} invariants ok')
+
+
+if __name__ == '__main__':
+    main()
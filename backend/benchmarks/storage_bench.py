@@ -0,0 +1,169 @@
+"""
+Write throughput and restart time: plain dict vs JournalEngine, and the
+restart of the transaction index and analytics rollups: loaded as storage
+views vs rebuilt from every transaction.
+
+Run from ``backend/``::
+
+    python -m benchmarks.storage_bench --count 1000000 --threads 8
+"""
+
+import argparse
+import json
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+
+from services.analytics import AnalyticsRollups
+from storage.engine import JournalEngine, MemoryEngine
+from storage.history import TransactionIndex
+
+
+def make_transaction(i):
+    return {
+        'hash': '0x' + secrets.token_hex(32),
+        'from_address': 'addr%08d' % (i % 5000),
+        'to_address': '0x' + secrets.token_hex(20),
+        'amount': i * 0.001,
+        'symbol': 'SOL',
+        'network': 'solana',
+        'status': 'pending',
+        'timestamp': '2024-01-15T10:30:00',
+        'fee': 0.001
+    }
+
+
+def run_writers(table, count, threads):
+    per_thread = count // threads
+
+    def worker(offset):
+        for i in range(offset, offset + per_thread):
+            tx = make_transaction(i)
+            table[tx['hash']] = tx
+
+    workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    return per_thread * threads / elapsed
+
+
+def bench_writes(count, threads):
+    print(f'-- write throughput ({count} transactions)')
+    rate = run_writers(MemoryEngine().table('transactions'), count, 1)
+    print(f'dict baseline              {rate:12,.0f} writes/s')
+    for sync, label in ((True, 'fsync group commit'), (False, 'buffered (sync=False)')):
+        for n in sorted({1, threads}):
+            directory = tempfile.mkdtemp(prefix='teos-bench-')
+            engine = JournalEngine(directory, sync=sync, snapshot_every=count * 10)
+            rate = run_writers(engine.table('transactions'), count, n)
+            engine.close()
+            shutil.rmtree(directory)
+            print(f'journal {label:22} x{n:<3} {rate:10,.0f} writes/s')
+
+
+def bench_recovery(count, tail):
+    print(f'-- restart ({count} snapshotted + {tail} journal tail)')
+    directory = tempfile.mkdtemp(prefix='teos-bench-')
+    engine = JournalEngine(directory, sync=False, snapshot_every=count * 10)
+    table = engine.table('transactions')
+    for i in range(count):
+        tx = make_transaction(i)
+        table[tx['hash']] = tx
+    start = time.perf_counter()
+    engine.snapshot()
+    print(f'snapshot write             {time.perf_counter() - start:8.3f} s')
+    last_key = None
+    for i in range(count, count + tail):
+        tx = make_transaction(i)
+        table[tx['hash']] = tx
+        last_key = tx['hash']
+    keys = list(table)
+    sample = keys[::max(1, len(keys) // 1000)]
+    engine.close()
+
+    start = time.perf_counter()
+    engine = JournalEngine(directory)
+    opened = time.perf_counter() - start
+    table = engine.table('transactions')
+    assert len(table) == count + tail and last_key in table
+    start = time.perf_counter()
+    for key in sample:
+        table[key]
+    lookup_us = (time.perf_counter() - start) / len(sample) * 1e6
+    engine.close()
+    print(f'journal restart            {opened:8.3f} s   ({lookup_us:.1f} us/lookup after restart)')
+
+    # Baseline: the dict has nothing to restart from, so compare against the
+    # naive alternative of dumping and reloading the whole map as JSON.
+    path = os.path.join(directory, 'baseline.json')
+    baseline = {}
+    for i in range(count + tail):
+        tx = make_transaction(i)
+        baseline[tx['hash']] = tx
+    with open(path, 'w') as f:
+        json.dump(baseline, f)
+    del baseline
+    start = time.perf_counter()
+    with open(path) as f:
+        json.load(f)
+    print(f'dict json reload           {time.perf_counter() - start:8.3f} s')
+    shutil.rmtree(directory)
+
+
+def attach_views(engine):
+    table = engine.table('transactions')
+    index = engine.attach_view('transaction_index', 'transactions', TransactionIndex(), TransactionIndex)
+    rollups = engine.attach_view('analytics', 'transactions', AnalyticsRollups(index, table),
+                                 lambda: AnalyticsRollups(None, None))
+    return table, index, rollups
+
+
+def bench_views(count, tail):
+    print(f'-- index and rollups on restart ({count} snapshotted + {tail} journal tail)')
+    directory = tempfile.mkdtemp(prefix='teos-bench-')
+    engine = JournalEngine(directory, sync=False, snapshot_every=count * 10)
+    table, index, rollups = attach_views(engine)
+    for i in range(count + tail):
+        if i == count:
+            engine.snapshot()
+        tx = make_transaction(i)
+        tx['timestamp'] = '2024-%02d-%02dT10:30:00' % (1 + i * 12 // (count + tail), 1 + i % 28)
+        table[tx['hash']] = tx
+        index.add(tx)
+        rollups.record(tx)
+    engine.close()
+
+    engine = JournalEngine(directory)
+    table = engine.table('transactions')
+    start = time.perf_counter()
+    index = TransactionIndex()
+    index.rebuild(table.values())
+    AnalyticsRollups(index, table).rebuild(table.values())
+    print(f'rebuilt from the table     {time.perf_counter() - start:8.3f} s')
+    start = time.perf_counter()
+    attach_views(engine)
+    print(f'loaded as views            {time.perf_counter() - start:8.3f} s')
+    engine.close()
+    shutil.rmtree(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=200000)
+    parser.add_argument('--tail', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+    bench_writes(min(args.count, 50000), args.threads)
+    bench_recovery(args.count, args.tail)
+    bench_views(args.count, args.tail)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Large list responses: N transactions for one wallet and N NFTs, served as
+one jsonify'd document (the whole list built in memory first) against the
+streamed JSON and NDJSON modes.  Reports time to first byte, total time,
+bytes sent and peak traced memory (measured in a separate pass, since
+tracemalloc slows everything down).
+
+    python -m benchmarks.streaming_bench --items 100000
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+from flask import jsonify
+from werkzeug.test import EnvironBuilder
+
+os.environ.setdefault('TEOS_RATE_LIMIT', '0')  # Load from one client would mostly get 429s
+
+
+def start_response(status, headers):
+    pass
+
+
+def consume(app, path, headers=None):
+    environ = EnvironBuilder(path=path, headers=headers).get_environ()
+    start = time.perf_counter()
+    body = app(environ, start_response)
+    first_byte = None
+    size = 0
+    for chunk in body:
+        if chunk and first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(chunk)
+    if hasattr(body, 'close'):
+        body.close()
+    return first_byte, time.perf_counter() - start, size
+
+
+def peak_memory(run):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    run()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return peak
+
+
+def report(label, app, path, headers=None):
+    first_byte, total, size = consume(app, path, headers)
+    peak = peak_memory(lambda: consume(app, path, headers))
+    print(f'{label:34} ttfb={first_byte * 1e3:9.2f} ms  total={total * 1e3:8.0f} ms  '
+          f'{size / 2 ** 20:6.1f} MB sent  peak={peak / 2 ** 20:7.1f} MB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=100000)
+    args = parser.parse_args()
+
+    import app as backend
+    from models.nft import NFT
+
+    app = backend.app
+    wallet = app.test_client().post('/api/wallet/create', json={'network': 'solana'}).json['wallet']
+    address = wallet['address']
+    for i in range(args.items):
+        transaction = {
+            'hash': f'0x{i:064x}', 'from_address': address, 'to_address': f'peer{i % 500:040d}',
+            'amount': 0.001 * (i % 97), 'symbol': 'SOL', 'network': 'solana', 'status': 'confirmed',
+            'fee': 0.000005, 'timestamp': f'2026-01-01T00:00:00.{i:06d}', 'confirmations': 32
+        }
+        backend.transactions[transaction['hash']] = transaction
+        backend.transaction_index.add(transaction)
+    NFT.store.bulk_load(NFT(f'Pharaoh #{i}', owner=f'user{i % 1000}', collection='pharaohs', rarity='rare')
+                        for i in range(args.items))
+
+    def jsonify_all(build):
+        def view():
+            with app.test_request_context():
+                data = jsonify(build()).get_data()
+            return data
+        start = time.perf_counter()
+        size = len(view())
+        total = time.perf_counter() - start
+        return total, size, peak_memory(view)
+
+    cases = [
+        ('transactions', f'/api/wallet/{wallet["id"]}/transactions', lambda: {
+            'status': 'success',
+            'transactions': [dict(t, type='send') for t in backend.iter_transactions(
+                backend.transaction_index, backend.transactions, address)],
+        }),
+        ('nfts', '/api/nfts', lambda: {'nfts': [nft.to_dict() for nft in NFT.store.iter()]}),
+    ]
+    print(f'{args.items} items per response')
+    for name, path, build in cases:
+        total, size, peak = jsonify_all(build)
+        # Nothing can be sent until the whole document exists
+        print(f'{name + " jsonify (whole list)":34} ttfb={total * 1e3:9.2f} ms  total={total * 1e3:8.0f} ms  '
+              f'{size / 2 ** 20:6.1f} MB sent  peak={peak / 2 ** 20:7.1f} MB')
+        report(f'{name} stream=json', app, f'{path}?stream=json')
+        report(f'{name} stream=ndjson', app, f'{path}?stream=ndjson')
+    os._exit(0)  # Skip joining the app's background threads
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Local stub of an upstream price feed for offline testing.
+
+Serves ``GET /price/<symbol>`` with a configurable artificial latency and
+counts how many requests it received, so cache coalescing can be checked.
+
+    python -m benchmarks.stub_price_server --port 8901 --latency 0.2
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PRICES = {'SOL': 98.32, 'ETH': 2847.52, 'BTC': 43250.00, 'TEOS': 0.0045}
+
+
+class StubPriceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), prices=None, latency=0.0):
+        self.prices = dict(prices or DEFAULT_PRICES)
+        self.latency = latency
+        self.requests = 0
+        self._count_lock = threading.Lock()
+        super().__init__(address, _Handler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        with self.server._count_lock:
+            self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        parts = self.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'price' or parts[1] not in self.server.prices:
+            self.send_error(404)
+            return
+        body = json.dumps({'symbol': parts[1], 'price': self.server.prices[parts[1]]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8901)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    server = StubPriceServer(('127.0.0.1', args.port), latency=args.latency)
+    print(f'Stub price feed on {server.url}')
+    server.serve_forever()
@@ -0,0 +1,105 @@
+"""
+Tax engine cost at scale: ledger memory per trade, a cold report replaying a
+user's whole history, and reports after new trades arrive, which resume from
+the year-boundary checkpoint or the live position instead of replaying.
+
+    python -m benchmarks.tax_bench --trades 1000000 --years 4
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from services.tax_engine import METHODS, TaxEngine
+
+START = 1577836800  # 2020-01-01 UTC
+YEAR = 365 * 24 * 3600
+
+
+def generate(rng, count, start, span):
+    # Buy-heavy random flow over a few symbols, in time order
+    step = span / count
+    price = {'SOL': 98.0, 'ETH': 2800.0, 'BTC': 43000.0}
+    for i in range(count):
+        symbol = rng.choice(('SOL', 'ETH', 'BTC'))
+        price[symbol] *= 1 + rng.gauss(0, 0.01)
+        yield {
+            'timestamp': start + i * step,
+            'symbol': symbol,
+            'side': 'buy' if rng.random() < 0.55 else 'sell',
+            'quantity': rng.choice((0.5, 1.0, 2.0)),
+            'price': price[symbol],
+            'fee': 0.1
+        }
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--trades', type=int, default=1000000)
+    parser.add_argument('--years', type=int, default=4)
+    parser.add_argument('--new', type=int, default=1000, help='trades appended before the follow-up report')
+    args = parser.parse_args()
+
+    rng = random.Random(17)
+    engine = TaxEngine()
+    trades = list(generate(rng, args.trades, START, args.years * YEAR - 3600))
+    gc.collect()
+    tracemalloc.start()
+    for i in range(0, len(trades), 10000):
+        engine.record('user', trades[i:i + 10000])
+    ledger_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    last_year = 2020 + args.years - 1
+    del trades
+    print(f'{args.trades} trades over {args.years} years, ledger {ledger_bytes / 2 ** 20:.1f} MB '
+          f'({ledger_bytes / args.trades:.0f} B/trade)')
+
+    print(f'{"method":<6}  {"cold report":>12}  {"cached":>8}  {"+new trades":>12}  {"earlier year":>12}  open lots')
+    for offset, method in enumerate(METHODS):
+        report, cold = timed(lambda: engine.report('user', last_year, method))
+        _, cached = timed(lambda: engine.report('user', last_year, method))
+        print(f'{method:<6}  {cold:>9.0f} ms  {cached:>5.3f} ms', end='', flush=True)
+        new = list(generate(rng, args.new, START + args.years * YEAR - 3000 + offset * 600, 500))
+        engine.record('user', new)
+        _, resumed = timed(lambda: engine.report('user', last_year, method))
+        _, earlier = timed(lambda: engine.report('user', last_year - 1, method))
+        lots = sum(symbol['lots'] for symbol in report['open_lots'].values())
+        print(f'  {resumed:>9.1f} ms  {earlier:>9.3f} ms  {lots}')
+
+    engine.record('user', list(generate(rng, args.new, START + (args.years - 1) * YEAR + 60, 3600)))
+    _, backdated = timed(lambda: engine.report('user', last_year, 'fifo'))
+    print(f'back-dated trades into {last_year}: fifo report replays one year in {backdated:.0f} ms')
+    # Peak memory of a replay is the lot queues plus checkpoints, not the history
+    engine = TaxEngine()
+    engine.record('user', list(generate(rng, args.trades // 10, START, args.years * YEAR - 3600)))
+    gc.collect()
+    tracemalloc.start()
+    engine.report('user', last_year, 'hifo')
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'hifo replay of {args.trades // 10} trades: peak {peak / 2 ** 20:.1f} MB above the ledger')
+
+    # Reports for closed years, or years before the first trade, leave the carried-over lots alone
+    engine = TaxEngine()
+    engine.record('user', [{'timestamp': START + YEAR + 86400, 'symbol': 'SOL', 'side': 'buy', 'quantity': 10, 'price': 5},
+                           {'timestamp': START + 3 * YEAR + 86400, 'symbol': 'SOL', 'side': 'buy', 'quantity': 1, 'price': 5}])
+    engine.close_year('user', 2022)
+    before = engine.report('user', 2019)
+    engine.report('user', 2020)
+    engine.record('user', [{'timestamp': START + 3 * YEAR + 2 * 86400, 'symbol': 'SOL', 'side': 'sell', 'quantity': 5, 'price': 8}])
+    after = engine.report('user', 2023)
+    assert not before['open_lots'] and after['cost_basis'] == 25.0 and after['unmatched_quantity'] == 0.0, after
+    assert after['open_lots']['SOL']['quantity'] == 6.0, after['open_lots']
+    print('closed-year reports keep the carried-over lots: ok')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+User lookups at scale: the previous list-of-dicts linear scan versus the
+hash-indexed repository of ``__slots__`` records.
+
+    python -m benchmarks.user_registry_bench --users 1000000
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from models.user import User, UserRepository
+
+
+def make_ids(count):
+    return [f'user-{i:08d}' for i in range(count)]
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def linear_lookup(users, user_id):
+    # The scan User.get_user_by_id used to do
+    for user in users:
+        if user['id'] == user_id:
+            return user
+    return None
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--lookups', type=int, default=200000)
+    parser.add_argument('--scans', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    ids = make_ids(args.users)
+    created_at = time.time()
+
+    def build_list():
+        return [
+            {'id': user_id, 'username': f'name-{user_id}', 'wallet_addresses': [f'addr-{user_id}'],
+             'created_at': created_at, 'price_alerts': [], 'notifications': []}
+            for user_id in ids
+        ]
+
+    def build_repository():
+        repository = UserRepository()
+        repository.bulk_load(
+            User(user_id, f'name-{user_id}', (f'addr-{user_id}',), created_at) for user_id in ids
+        )
+        return repository
+
+    # Both layouts allocate the same username and address strings; the ids
+    # are shared and not counted
+    baseline, list_bytes, list_build = measure(build_list)
+    print(f'list of dicts     {list_bytes / args.users:6.0f} B/user  built in {list_build:.2f} s')
+    targets = rng.sample(ids, args.scans)
+    latencies = []
+    for user_id in targets:
+        t = time.perf_counter()
+        linear_lookup(baseline, user_id)
+        latencies.append(time.perf_counter() - t)
+    print(f'  linear lookup   p50={percentile(latencies, .5) * 1e3:.2f} ms  '
+          f'p99={percentile(latencies, .99) * 1e3:.2f} ms  ({args.scans} lookups)')
+    del baseline
+    gc.collect()
+
+    repository, repository_bytes, repository_build = measure(build_repository)
+    print(f'slots repository  {repository_bytes / args.users:6.0f} B/user  built in {repository_build:.2f} s '
+          f'(id, username and wallet indexes)')
+    targets = [rng.choice(ids) for _ in range(args.lookups)]
+    latencies = []
+    for user_id in targets:
+        t = time.perf_counter()
+        repository.get(user_id)
+        latencies.append(time.perf_counter() - t)
+    print(f'  indexed lookup  p50={percentile(latencies, .5) * 1e6:.2f} us  '
+          f'p99={percentile(latencies, .99) * 1e6:.2f} us  ({args.lookups} lookups)')
+
+    addresses = [f'addr-{user_id}' for user_id in targets[:args.lookups // 10]]
+    start = time.perf_counter()
+    for address in addresses:
+        repository.get_by_wallet(address)
+    elapsed = time.perf_counter() - start
+    print(f'  wallet lookup   {elapsed / len(addresses) * 1e6:.2f} us/lookup')
+
+
+if __name__ == '__main__':
+    main()
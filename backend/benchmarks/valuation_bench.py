@@ -0,0 +1,45 @@
+"""
+Per-wallet cost: N single ``/balance`` calls vs one ``/api/wallets/balance``.
+
+    python -m benchmarks.valuation_bench --wallets 5000
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault('TEOS_RATE_LIMIT', '0')  # Load from one client would mostly get 429s
+
+from app import app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--wallets', type=int, default=5000)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    wallet_ids = [
+        client.post('/api/wallet/create', json={}).get_json()['wallet']['id']
+        for _ in range(args.wallets)
+    ]
+
+    start = time.perf_counter()
+    single_total = 0.0
+    for wallet_id in wallet_ids:
+        single_total += client.get(f'/api/wallet/{wallet_id}/balance').get_json()['total_value']
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = client.post('/api/wallets/balance', json={'wallet_ids': wallet_ids}).get_json()
+    batched = time.perf_counter() - start
+
+    assert abs(batch['aggregate']['total_value'] - single_total) < 1e-6 * max(single_total, 1)
+    n = len(wallet_ids)
+    print(f'{n} single calls   {single:8.3f} s   {single / n * 1e6:9.1f} us/wallet')
+    print(f'1 batch call       {batched:8.3f} s   {batched / n * 1e6:9.1f} us/wallet')
+    print(f'speedup            {single / batched:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,136 @@
+import _thread
+import json
+import threading
+import time
+
+
+class ChatChannel:
+    # Fixed-size ring of the most recent messages. Message ids are sequential
+    # per channel, so "messages since id X" is an index computation.
+    def __init__(self, name, capacity):
+        self.name = name
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.next_id = 1
+        self.lock = threading.Lock()
+        # One pre-acquired lock per blocked listener; publishing releases them
+        self.waiters = []
+
+    @property
+    def first_id(self):
+        return max(1, self.next_id - self.capacity)
+
+    def append(self, message):
+        with self.lock:
+            message['id'] = self.next_id
+            # Encode the SSE frame once; every listener sends the same bytes
+            frame = f"id: {message['id']}\nevent: message\ndata: {json.dumps(message)}\n\n".encode('utf-8')
+            self.slots[self.next_id % self.capacity] = (message, frame)
+            self.next_id += 1
+            waiters, self.waiters = self.waiters, []
+        if waiters:
+            if waiters[0] is None:
+                self._wake(waiters, 0)
+            else:
+                waiters[0].release()
+        return message
+
+    @classmethod
+    def _wake(cls, waiters, index):
+        # Waiters form an implicit binary tree; every woken listener wakes its
+        # two children. The publisher only releases the root, so no single
+        # thread has to out-compete thousands of runnable ones for the GIL.
+        for child in (2 * index + 1, 2 * index + 2):
+            if child < len(waiters):
+                if waiters[child] is None:
+                    cls._wake(waiters, child)
+                else:
+                    waiters[child].release()
+
+    def wait(self, after_id, timeout):
+        # Returns once a message newer than after_id exists (or on timeout)
+        waiter = _thread.allocate_lock()
+        waiter.acquire()
+        with self.lock:
+            if self.next_id - 1 > after_id:
+                return
+            waiters = self.waiters
+            index = len(waiters)
+            waiters.append(waiter)
+        if not waiter.acquire(timeout=timeout):
+            with self.lock:
+                if waiters is self.waiters:
+                    # Not published yet: leave a hole so indexes stay put
+                    waiters[index] = None
+                    return
+            # Published while timing out; the release is on its way and this
+            # listener still owes its children a wake-up
+            waiter.acquire()
+        self._wake(waiters, index)
+
+    def since(self, after_id, limit):
+        # Lock-free: a slot is written before next_id moves past it, and a slot
+        # recycled for a newer message is detected by its id
+        next_id = self.next_id
+        start = max(after_id + 1, next_id - self.capacity, 1)
+        entries = []
+        for i in range(start, min(next_id, start + limit)):
+            entry = self.slots[i % self.capacity]
+            if entry[0]['id'] != i:
+                return self.since(after_id, limit)
+            entries.append(entry)
+        return entries
+
+    def latest(self, limit):
+        with self.lock:
+            start = max(self.first_id, self.next_id - limit)
+            return [self.slots[i % self.capacity] for i in range(start, self.next_id)]
+
+
 class Chat:
-    messages = []
+    channels = {}
+    capacity = 1000
+    default_channel = 'general'
+    _lock = threading.Lock()
 
     @classmethod
-    def get_all_messages(cls):
-        return cls.messages
+    def get_channel(cls, channel=None):
+        name = channel or cls.default_channel
+        chat_channel = cls.channels.get(name)
+        if chat_channel is None:
+            with cls._lock:
+                chat_channel = cls.channels.setdefault(name, ChatChannel(name, cls.capacity))
+        return chat_channel
 
     @classmethod
-    def send_message(cls, user_id, message):
+    def get_all_messages(cls, channel=None, since=None, limit=50):
+        chat_channel = cls.get_channel(channel)
+        if since is None:
+            entries = chat_channel.latest(limit)
+        else:
+            entries = chat_channel.since(since, limit)
+        return [message for message, _ in entries]
+
+    @classmethod
+    def send_message(cls, user_id, message, channel=None):
+        chat_channel = cls.get_channel(channel)
         chat_message = {
             "user_id": user_id,
-            "message": message
+            "message": message,
+            "channel": chat_channel.name,
+            "timestamp": time.time()
         }
-        cls.messages.append(chat_message)
-        return chat_message
+        return chat_channel.append(chat_message)
+
+    @classmethod
+    def wait_for_messages(cls, channel=None, since=0, timeout=25, limit=100):
+        # Block until there is something newer than `since` (or timeout);
+        # returns (message, sse_frame) pairs straight from the shared ring
+        chat_channel = cls.get_channel(channel)
+        deadline = time.monotonic() + timeout
+        while True:
+            entries = chat_channel.since(since, limit)
+            remaining = deadline - time.monotonic()
+            if entries or remaining <= 0:
+                return entries
+            chat_channel.wait(since, remaining)
@@ -1,17 +1,172 @@
+import itertools
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+INDEXED_FIELDS = ('owner', 'collection', 'rarity')
+
+
+class NFTStore:
+    # NFTs by id plus owner, collection and rarity indexes. Ids are allocated
+    # in increasing order, so every index is a packed, sorted uint64 array
+    # that only ever appends on mint; a page is a bisect to the cursor and a
+    # walk of the most selective index.
+    def __init__(self):
+        self._by_id = {}
+        self._all = array('Q')
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def get(self, nft_id):
+        return self._by_id.get(nft_id)
+
+    def add(self, nft):
+        with self._lock:
+            if nft.id is None:
+                nft.id = next(self._ids)
+            elif nft.id in self._by_id:
+                raise ValueError(f'NFT {nft.id} already exists')
+            self._by_id[nft.id] = nft
+            self._insert(self._all, nft.id)
+            for field in INDEXED_FIELDS:
+                value = getattr(nft, field)
+                if value is not None:
+                    self._insert(self._indexes[field].setdefault(value, array('Q')), nft.id)
+        return nft
+
+    def bulk_load(self, nfts):
+        # Mint many at once, building the indexes without per-item locking
+        with self._lock:
+            for nft in nfts:
+                nft.id = next(self._ids)
+                self._by_id[nft.id] = nft
+                self._all.append(nft.id)
+                for field in INDEXED_FIELDS:
+                    value = getattr(nft, field)
+                    if value is not None:
+                        ids = self._indexes[field].get(value)
+                        if ids is None:
+                            ids = self._indexes[field][value] = array('Q')
+                        ids.append(nft.id)
+
+    @staticmethod
+    def _insert(ids, nft_id):
+        if not ids or ids[-1] < nft_id:
+            ids.append(nft_id)
+        else:
+            ids.insert(bisect_left(ids, nft_id), nft_id)
+
+    def transfer(self, nft_id, new_owner, expected_owner=None):
+        """Move ``nft_id`` to ``new_owner`` and re-index it in one step.
+
+        Raises KeyError for an unknown NFT and ValueError when
+        ``expected_owner`` is given and no longer owns it.
+        """
+        with self._lock:
+            nft = self._by_id.get(nft_id)
+            if nft is None:
+                raise KeyError(nft_id)
+            if expected_owner is not None and nft.owner != expected_owner:
+                raise ValueError(f'NFT {nft_id} is not owned by {expected_owner}')
+            owners = self._indexes['owner']
+            if nft.owner is not None:
+                ids = owners[nft.owner]
+                del ids[bisect_left(ids, nft_id)]
+                if not ids:
+                    del owners[nft.owner]
+            previous, nft.owner = nft.owner, new_owner
+            self._insert(owners.setdefault(new_owner, array('Q')), nft_id)
+        return previous
+
+    def count(self, **filters):
+        active = [(field, value) for field, value in filters.items() if value is not None]
+        if not active:
+            return len(self._by_id)
+        if len(active) == 1:
+            field, value = active[0]
+            return len(self._indexes[field].get(value, ()))
+        return None  # Would need a full intersection
+
+    def page(self, limit=50, after=None, **filters):
+        """Return ``(nfts, next_cursor)`` in id order, starting after id ``after``"""
+        active = [(field, value) for field, value in filters.items() if value is not None]
+        for field, _ in active:
+            if field not in self._indexes:
+                raise ValueError(f'Cannot filter on {field}')
+        results = []
+        with self._lock:
+            candidates = [self._indexes[field].get(value, array('Q')) for field, value in active] or [self._all]
+            ids = min(candidates, key=len)
+            position = bisect_right(ids, after) if after is not None else 0
+            # Only the other filters need checking against the walked index
+            checks = [(field, value) for field, value in active if self._indexes[field].get(value) is not ids]
+            while position < len(ids) and len(results) < limit:
+                nft = self._by_id[ids[position]]
+                position += 1
+                if all(getattr(nft, field) == value for field, value in checks):
+                    results.append(nft)
+            more = position < len(ids)
+        return results, (results[-1].id if more and results else None)
+
+    def iter(self, after=None, batch=1000, **filters):
+        """Every matching NFT after id ``after``, in id order, one page at a time"""
+        while True:
+            nfts, after = self.page(batch, after, **filters)
+            yield from nfts
+            if after is None:
+                return
+
+
 class NFT:
-    nfts = []
+    # Compact record; anything besides the indexed fields goes to metadata
+    __slots__ = ('id', 'name', 'owner', 'collection', 'rarity', 'metadata', 'created_at')
+
+    store = NFTStore()
+
+    def __init__(self, name, owner=None, user_id=None, collection=None, rarity=None, metadata=None, id=None,
+                 created_at=None, **extra):
+        metadata = dict(metadata or {}, **extra)
+        self.id = id
+        self.name = name
+        self.owner = owner if owner is not None else user_id
+        self.collection = collection if collection is not None else metadata.get('collection')
+        self.rarity = rarity if rarity is not None else metadata.get('rarity')
+        self.metadata = metadata or None  # Most items have none; skip the empty dict
+        self.created_at = created_at if created_at is not None else time.time()
+
+    def save(self):
+        return self.store.add(self)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "owner": self.owner,
+            "collection": self.collection,
+            "rarity": self.rarity,
+            "metadata": self.metadata or {},
+            "created_at": self.created_at
+        }
 
     @classmethod
-    def get_all_nfts(cls):
-        return cls.nfts
+    def get_by_id(cls, nft_id):
+        return cls.store.get(nft_id)
+
+    @classmethod
+    def get_all_nfts(cls, limit=50, cursor=None, owner=None, collection=None, rarity=None):
+        return cls.store.page(limit, cursor, owner=owner, collection=collection, rarity=rarity)
 
     @classmethod
     def create_nft(cls, data):
-        nft = {
-            "id": len(cls.nfts) + 1,
-            "name": data['name'],
-            "owner": data['owner'],
-            "metadata": data['metadata']
-        }
-        cls.nfts.append(nft)
-        return nft
+        nft = cls(data['name'], owner=data['owner'], collection=data.get('collection'),
+                  rarity=data.get('rarity'), metadata=data.get('metadata'))
+        return nft.save().to_dict()
+
+    @classmethod
+    def transfer(cls, nft_id, buyer_id, seller_id=None):
+        return cls.store.transfer(nft_id, buyer_id, seller_id)
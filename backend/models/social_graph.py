@@ -0,0 +1,95 @@
+import threading
+from array import array
+
+
+class FollowGraph:
+    # Users are interned to dense integer indexes, and each user's followers
+    # and followees are packed uint32 arrays (4 bytes per edge per direction).
+    # len() of an adjacency array is the cached follower/followee count.
+    # Arrays are created on first use; most users never get followers.
+    def __init__(self):
+        self._index = {}
+        self._ids = []
+        self._followers = []
+        self._following = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def index_of(self, user_id, create=False):
+        index = self._index.get(user_id)
+        if index is None and create:
+            with self._lock:
+                index = self._index.get(user_id)
+                if index is None:
+                    index = self._index[user_id] = len(self._ids)
+                    self._ids.append(user_id)
+                    self._followers.append(None)
+                    self._following.append(None)
+        return index
+
+    def user_id(self, index):
+        return self._ids[index]
+
+    def user_ids(self, indexes):
+        ids = self._ids
+        return [ids[index] for index in indexes]
+
+    def follow(self, follower_id, followed_id):
+        if follower_id == followed_id:
+            raise ValueError("Users cannot follow themselves")
+        follower = self.index_of(follower_id, create=True)
+        followed = self.index_of(followed_id, create=True)
+        with self._lock:
+            # Followee lists are short, so the duplicate check is a small scan
+            following = self._following[follower]
+            if following is None:
+                following = self._following[follower] = array('I')
+            elif followed in following:
+                return False
+            following.append(followed)
+            if self._followers[followed] is None:
+                self._followers[followed] = array('I')
+            self._followers[followed].append(follower)
+            return True
+
+    def unfollow(self, follower_id, followed_id):
+        follower = self.index_of(follower_id)
+        followed = self.index_of(followed_id)
+        if follower is None or followed is None:
+            return False
+        with self._lock:
+            if not self._following[follower] or followed not in self._following[follower]:
+                return False
+            self._following[follower].remove(followed)
+            self._followers[followed].remove(follower)
+            return True
+
+    def followers_snapshot(self, user_id):
+        # A copy of the packed follower indexes, safe to read while edges change
+        index = self.index_of(user_id)
+        if index is None:
+            return array('I')
+        with self._lock:
+            return array('I', self._followers[index] or ())
+
+    def get_followers(self, user_id, offset=0, limit=100):
+        index = self.index_of(user_id)
+        if index is None:
+            return []
+        return self.user_ids((self._followers[index] or ())[offset:offset + limit])
+
+    def get_following(self, user_id, offset=0, limit=100):
+        index = self.index_of(user_id)
+        if index is None:
+            return []
+        return self.user_ids((self._following[index] or ())[offset:offset + limit])
+
+    def follower_count(self, user_id):
+        index = self.index_of(user_id)
+        return len(self._followers[index] or ()) if index is not None else 0
+
+    def following_count(self, user_id):
+        index = self.index_of(user_id)
+        return len(self._following[index] or ()) if index is not None else 0
@@ -1,11 +1,16 @@
 class TaxReport:
-    @staticmethod
-    def generate_report(user_id, year):
-        # Logic to calculate and generate the tax report
-        # This could involve fetching transaction data and calculating gains/losses
-        return {
-            "user_id": user_id,
-            "year": year,
-            "total_income": 10000,  # Example data
-            "total_tax": 1500        # Example data
-        }
+    engine = None  # Set by the app to the shared TaxEngine
+
+    @classmethod
+    def record_trades(cls, user_id, trades):
+        return cls.engine.record(user_id, trades)
+
+    @classmethod
+    def generate_report(cls, user_id, year, method='fifo'):
+        # Realized gains from the user's trades, matched to lots by ``method``
+        report = cls.engine.report(user_id, year, method)
+        return dict(report, user_id=user_id)
+
+    @classmethod
+    def close_year(cls, user_id, year):
+        cls.engine.close_year(user_id, year)
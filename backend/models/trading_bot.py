@@ -1,25 +1,51 @@
+import itertools
+import threading
+
+
 class TradingBot:
+    bots = {}
+    runtime = None  # Set by the app to the shared BotRuntime
+    _ids = itertools.count(1)
+    _lock = threading.Lock()
+
     def __init__(self, user_id, strategy, parameters):
         self.user_id = user_id
         self.strategy = strategy
-        self.parameters = parameters
-        self.id = self.generate_id()  # Implement a method to generate a unique ID
+        self.parameters = parameters or {}
+        self.id = self.generate_id()
         self.active = False
 
+    @classmethod
+    def generate_id(cls):
+        with cls._lock:
+            return next(cls._ids)
+
     def save(self):
-        # Logic to save the trading bot to the database
-        pass
+        self.bots[self.id] = self
 
     @classmethod
     def get_by_id(cls, bot_id):
-        # Logic to retrieve a trading bot by its ID from the database
-        pass
+        return cls.bots.get(bot_id)
+
+    def to_dict(self):
+        bot = {
+            "bot_id": self.id,
+            "user_id": self.user_id,
+            "strategy": self.strategy,
+            "parameters": self.parameters,
+            "active": self.active
+        }
+        if self.active and self.runtime is not None:
+            bot["runtime"] = self.runtime.status(self.id)
+        return bot
 
     def execute(self):
-        # Logic to execute the trading strategy
-        self.active = True
-        # Implement trading logic here
+        # Hand the bot to the runtime; it trades on every tick of its symbol
+        if not self.active:
+            self.runtime.add(self.id, self.user_id, self.strategy, self.parameters)
+            self.active = True
 
     def stop(self):
-        # Logic to stop the trading bot
-        self.active = False
+        if self.active:
+            self.runtime.remove(self.id)
+            self.active = False
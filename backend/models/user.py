@@ -1,24 +1,160 @@
+import threading
+import time
+
+from models.social_graph import FollowGraph
+
+
+class UserRepository:
+    # Users indexed by id, with secondary indexes on username and wallet
+    # address. Lookups are dict hits regardless of how many users exist.
+    def __init__(self):
+        self._by_id = {}
+        self._by_username = {}
+        self._by_wallet = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(list(self._by_id.values()))
+
+    def __contains__(self, user_id):
+        return user_id in self._by_id
+
+    def add(self, user):
+        with self._lock:
+            existing = self._by_id.get(user.id)
+            if existing is not None:
+                self._unindex(existing)
+            self._index(user)
+        return user
+
+    def bulk_load(self, users):
+        # Build the indexes without per-user locking; existing entries with
+        # the same id are replaced
+        with self._lock:
+            for user in users:
+                existing = self._by_id.get(user.id)
+                if existing is not None:
+                    self._unindex(existing)
+                self._index(user)
+        return len(self._by_id)
+
+    def remove(self, user_id):
+        with self._lock:
+            user = self._by_id.get(user_id)
+            if user is not None:
+                self._unindex(user)
+            return user
+
+    def get(self, user_id):
+        return self._by_id.get(user_id)
+
+    def get_by_username(self, username):
+        return self._by_username.get(username)
+
+    def get_by_wallet(self, address):
+        return self._by_wallet.get(address)
+
+    def link_wallet(self, user_id, address):
+        with self._lock:
+            user = self._by_id.get(user_id)
+            if user is None:
+                return None
+            if address not in user.wallet_addresses:
+                user.wallet_addresses += (address,)
+            self._by_wallet[address] = user
+            return user
+
+    def _index(self, user):
+        self._by_id[user.id] = user
+        if user.username is not None:
+            self._by_username[user.username] = user
+        for address in user.wallet_addresses:
+            self._by_wallet[address] = user
+
+    def _unindex(self, user):
+        del self._by_id[user.id]
+        if user.username is not None and self._by_username.get(user.username) is user:
+            del self._by_username[user.username]
+        for address in user.wallet_addresses:
+            if self._by_wallet.get(address) is user:
+                del self._by_wallet[address]
+
+
 class User:
-    users = []
+    # Compact record: no per-instance __dict__, and empty collections are a
+    # shared tuple until the first write
+    __slots__ = ('id', 'username', 'wallet_addresses', 'created_at', 'price_alerts')
+
+    users = UserRepository()
+    graph = FollowGraph()
+    analytics = None  # Set by the app to the shared AnalyticsRollups
+
+    def __init__(self, id, username=None, wallet_addresses=(), created_at=None,
+                 price_alerts=()):
+        self.id = id
+        self.username = username
+        self.wallet_addresses = tuple(wallet_addresses)
+        self.created_at = created_at if created_at is not None else time.time()
+        self.price_alerts = price_alerts
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "username": self.username,
+            "wallet_addresses": list(self.wallet_addresses),
+            "created_at": self.created_at
+        }
+
+    # Request threads set alerts while the price refresher clears fired ones,
+    # so both go through the store's lock
+
+    def set_price_alert(self, currency, target_price, alert_id=None, direction=None):
+        alert = {
+            "alert_id": alert_id,
+            "currency": currency,
+            "target_price": target_price,
+            "direction": direction
+        }
+        with self.users._lock:
+            self.price_alerts = list(self.price_alerts) + [alert]
+        return alert
+
+    def clear_price_alert(self, alert_id):
+        with self.users._lock:
+            self.price_alerts = [alert for alert in self.price_alerts if alert["alert_id"] != alert_id]
+
+    @classmethod
+    def create_user(cls, user_id, username=None, wallet_addresses=()):
+        return cls.users.add(cls(user_id, username, wallet_addresses))
 
     @classmethod
     def get_user_by_id(cls, user_id):
-        for user in cls.users:
-            if user['id'] == user_id:
-                return user
-        return None
+        return cls.users.get(user_id)
 
     @classmethod
-    def get_total_transactions(cls):
-        # Placeholder for total transactions logic
-        return 10
+    def get_user_by_wallet(cls, address):
+        return cls.users.get_by_wallet(address)
 
     @classmethod
-    def get_total_balance(cls):
-        # Placeholder for total balance logic
-        return 1000
+    def follow(cls, follower_id, followed_id):
+        return cls.graph.follow(follower_id, followed_id)
 
     @classmethod
-    def get_transaction_history(cls):
-        # Placeholder for transaction history logic
-        return []
+    def unfollow(cls, follower_id, followed_id):
+        return cls.graph.unfollow(follower_id, followed_id)
+
+    def get_total_transactions(self):
+        return self.analytics.summary(self.wallet_addresses)['total_transactions']
+
+    def get_total_balance(self):
+        return self.analytics.total_balance(self.wallet_addresses)
+
+    def get_transaction_history(self, limit=50, cursor=None):
+        # Returns (transactions, next_cursor), newest first
+        return self.analytics.history(self.wallet_addresses, limit, cursor)
+
+    def get_analytics(self, days=30, weeks=12):
+        return self.analytics.summary(self.wallet_addresses, days, weeks)
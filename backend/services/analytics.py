@@ -0,0 +1,248 @@
+"""
+Materialized transaction analytics.
+
+Every transaction event updates a small rollup for each address it touches
+in O(1): send/receive counts, counts by status, per-symbol volumes and
+daily and weekly buckets (kept for a fixed window).  A user's analytics merge
+the rollups of their addresses, so reads cost the same however long the
+history is.  History pages come from the per-address ``TransactionIndex``.
+
+The transaction table is the source of truth: ``rebuild`` replays it into
+fresh rollups.  The rollups are also a storage view of that table
+(``apply``, ``dump``, ``load``), so a journaled restart loads them instead.
+"""
+
+import threading
+from datetime import date
+from functools import lru_cache
+
+from storage.history import fetch_merged_page
+
+SENT, RECEIVED = 0, 1
+
+
+@lru_cache(maxsize=1024)
+def _day_and_week(prefix):
+    day = date.fromisoformat(prefix).toordinal()
+    return day, day - date.fromordinal(day).weekday()
+
+
+def day_and_week(timestamp):
+    """Ordinals of a transaction's day and of that week's Monday"""
+    # Transactions carry ISO timestamps; the date prefix is enough
+    return _day_and_week(timestamp[:10])
+
+
+class AddressRollup:
+    __slots__ = ('counts', 'by_status', 'symbols', 'daily', 'weekly', 'fees', 'first_day', 'last_day')
+
+    def __init__(self):
+        self.counts = [0, 0]  # sent, received
+        self.by_status = {}
+        self.symbols = {}  # symbol -> [sent count, sent amount, received count, received amount]
+        self.daily = {}  # day ordinal -> {symbol: [count, amount]}
+        self.weekly = {}  # ordinal of the week's Monday -> {symbol: [count, amount]}
+        self.fees = 0.0
+        self.first_day = None
+        self.last_day = None
+
+
+def _bump(buckets, key, symbol, amount, newest, retention):
+    # ``newest`` is the newest key the rollup has seen.  Transactions can arrive
+    # out of time order (a rebuild reads them in hash order), so buckets expire
+    # against it rather than against the last one created.
+    if key <= newest - retention:
+        return
+    bucket = buckets.get(key)
+    if bucket is None:
+        bucket = buckets[key] = {}
+        if key == newest:
+            # The window moved forward
+            for expired in [k for k in buckets if k <= newest - retention]:
+                del buckets[expired]
+    counter = bucket.get(symbol)
+    if counter is None:
+        bucket[symbol] = [1, amount]
+    else:
+        counter[0] += 1
+        counter[1] += amount
+
+
+class AnalyticsRollups:
+    def __init__(self, index, transactions, daily_retention=90, weekly_retention=104):
+        self.index = index
+        self.transactions = transactions
+        self.daily_retention = daily_retention
+        self.weekly_retention = weekly_retention * 7
+        self.value_wallets = None  # Set by the app: wallet ids -> total value
+        self._rollups = {}
+        self._wallet_ids = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rollups)
+
+    def register_wallet(self, address, wallet_id):
+        self._wallet_ids[address] = wallet_id
+
+    def record(self, transaction):
+        """Fold a new transaction into the rollups of both of its addresses"""
+        with self._lock:
+            self._record(self._rollups, transaction)
+
+    def _record(self, rollups, transaction):
+        day, week = day_and_week(transaction['timestamp'])
+        symbol = transaction.get('symbol')
+        amount = transaction.get('amount', 0)
+        status = transaction.get('status')
+        for address, direction in ((transaction.get('from_address'), SENT), (transaction.get('to_address'), RECEIVED)):
+            if address is None:
+                continue
+            rollup = rollups.get(address)
+            if rollup is None:
+                rollup = rollups[address] = AddressRollup()
+            rollup.counts[direction] += 1
+            rollup.by_status[status] = rollup.by_status.get(status, 0) + 1
+            volume = rollup.symbols.get(symbol)
+            if volume is None:
+                volume = rollup.symbols[symbol] = [0, 0.0, 0, 0.0]
+            volume[2 * direction] += 1
+            volume[2 * direction + 1] += amount
+            if direction == SENT:
+                rollup.fees += transaction.get('fee', 0)
+            if rollup.first_day is None or day < rollup.first_day:
+                rollup.first_day = day
+            if rollup.last_day is None or day > rollup.last_day:
+                rollup.last_day = day
+            newest = rollup.last_day
+            _bump(rollup.daily, day, symbol, amount, newest, self.daily_retention)
+            _bump(rollup.weekly, week, symbol, amount, newest - (newest - 1) % 7, self.weekly_retention)
+
+    def update(self, previous, transaction):
+        """Move a transaction between status counts after a confirmation update"""
+        old, new = previous.get('status'), transaction.get('status')
+        if old == new:
+            return
+        with self._lock:
+            # The same rollups ``_record`` counted: a self-transfer counts twice in one
+            for address in (transaction.get('from_address'), transaction.get('to_address')):
+                if address is None:
+                    continue
+                rollup = self._rollups.get(address)
+                if rollup is None:
+                    continue
+                rollup.by_status[old] = rollup.by_status.get(old, 0) - 1
+                if not rollup.by_status[old]:
+                    del rollup.by_status[old]
+                rollup.by_status[new] = rollup.by_status.get(new, 0) + 1
+
+    def apply(self, key, old, new):
+        """Storage view hook: a new transaction, or a status change (transactions aren't deleted)"""
+        if new is None:
+            return
+        if old is None:
+            self.record(new)
+        else:
+            self.update(old, new)
+
+    def dump(self):
+        # Plain tuples: several times faster to unpickle than slotted objects
+        fields = AddressRollup.__slots__
+        with self._lock:
+            return {address: tuple(getattr(rollup, field) for field in fields)
+                    for address, rollup in self._rollups.items()}
+
+    def load(self, state):
+        rollups = {}
+        for address, values in state.items():
+            rollup = rollups[address] = AddressRollup()
+            (rollup.counts, rollup.by_status, rollup.symbols, rollup.daily, rollup.weekly,
+             rollup.fees, rollup.first_day, rollup.last_day) = values
+        with self._lock:
+            self._rollups = rollups
+
+    def rebuild(self, transactions, wallets=None):
+        """Recompute every rollup from the transaction table and swap them in"""
+        rollups = {}
+        for transaction in transactions:
+            self._record(rollups, transaction)
+        with self._lock:
+            self._rollups = rollups
+            if wallets is not None:
+                self._wallet_ids = {wallet['address']: wallet_id for wallet_id, wallet in wallets.items()}
+
+    def summary(self, addresses, days=30, weeks=12):
+        """Merged analytics for a set of addresses (one user's wallets)"""
+        counts = [0, 0]
+        by_status = {}
+        symbols = {}
+        daily = {}
+        weekly = {}
+        fees = 0.0
+        first_day = last_day = None
+        with self._lock:
+            rollups = [self._rollups[address] for address in addresses if address in self._rollups]
+            for rollup in rollups:
+                counts[0] += rollup.counts[0]
+                counts[1] += rollup.counts[1]
+                fees += rollup.fees
+                for status, count in rollup.by_status.items():
+                    by_status[status] = by_status.get(status, 0) + count
+                for symbol, volume in rollup.symbols.items():
+                    merged = symbols.setdefault(symbol, [0, 0.0, 0, 0.0])
+                    for i, value in enumerate(volume):
+                        merged[i] += value
+                _merge_buckets(daily, rollup.daily)
+                _merge_buckets(weekly, rollup.weekly)
+                if rollup.first_day is not None:
+                    first_day = rollup.first_day if first_day is None else min(first_day, rollup.first_day)
+                    last_day = rollup.last_day if last_day is None else max(last_day, rollup.last_day)
+        return {
+            'total_transactions': counts[0] + counts[1],
+            'sent': counts[0],
+            'received': counts[1],
+            'by_status': by_status,
+            'fees_paid': fees,
+            'volume_by_symbol': {
+                symbol: {'sent_count': v[0], 'sent': v[1], 'received_count': v[2], 'received': v[3]}
+                for symbol, v in symbols.items()
+            },
+            'daily': _series(daily, days),
+            'weekly': _series(weekly, weeks),
+            'first_activity': date.fromordinal(first_day).isoformat() if first_day else None,
+            'last_activity': date.fromordinal(last_day).isoformat() if last_day else None
+        }
+
+    def total_balance(self, addresses):
+        wallet_ids = [self._wallet_ids[address] for address in addresses if address in self._wallet_ids]
+        if not wallet_ids or self.value_wallets is None:
+            return 0.0
+        return self.value_wallets(wallet_ids)
+
+    def history(self, addresses, limit=50, cursor=None):
+        """A page of the addresses' transactions, newest first"""
+        return fetch_merged_page(self.index, self.transactions, addresses, limit, cursor)
+
+
+def _merge_buckets(into, buckets):
+    for key, bucket in buckets.items():
+        merged = into.setdefault(key, {})
+        for symbol, (count, amount) in bucket.items():
+            counter = merged.get(symbol)
+            if counter is None:
+                merged[symbol] = [count, amount]
+            else:
+                counter[0] += count
+                counter[1] += amount
+
+
+def _series(buckets, length):
+    keys = sorted(buckets)[-length:]
+    return [
+        {
+            'date': date.fromordinal(key).isoformat(),
+            'transactions': sum(count for count, _ in buckets[key].values()),
+            'volume': {symbol: amount for symbol, (_, amount) in buckets[key].items()}
+        }
+        for key in keys
+    ]
@@ -0,0 +1,262 @@
+"""
+Vectorized strategy backtests over OHLCV bars.
+
+Bars are an ``(n, 6)`` float array of ``timestamp, open, high, low, close,
+volume``.  A strategy's ``signals(close)`` gives the position it would
+take at each close; the position is held over the next bar, so a signal
+never trades on the price that produced it.  Returns, fees, the equity
+curve and every statistic are computed with whole-array NumPy operations.
+
+Parameter sweeps split the grid into one chunk per worker process so the
+bars are pickled once per worker rather than once per combination.
+"""
+
+import itertools
+import math
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from services.strategies import STRATEGIES, create_strategy
+
+TIMESTAMP, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+SECONDS_PER_YEAR = 365 * 24 * 3600
+MINUTES_PER_YEAR = SECONDS_PER_YEAR // 60
+
+
+def as_bars(rows):
+    """Validate OHLCV rows (any array-like) into an (n, 6) float64 array"""
+    try:
+        bars = np.asarray(rows, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError('OHLCV rows must be numbers')
+    if bars.ndim != 2 or bars.shape[1] != 6:
+        raise ValueError('OHLCV rows must be [timestamp, open, high, low, close, volume]')
+    if len(bars) < 2:
+        raise ValueError('At least two bars are required')
+    close = bars[:, CLOSE]
+    if not np.isfinite(bars).all() or (close <= 0).any():
+        raise ValueError('Prices must be finite and positive')
+    if (np.diff(bars[:, TIMESTAMP]) <= 0).any():
+        raise ValueError('Timestamps must be strictly increasing')
+    return bars
+
+
+def periods_per_year(timestamps):
+    interval = np.median(np.diff(timestamps))
+    return SECONDS_PER_YEAR / interval
+
+
+def simulate(strategy, bars, fee=0.001, initial_capital=10000.0, curve=True):
+    """Run one strategy over the bars; returns the stats and (optionally) the equity curve"""
+    close = bars[:, CLOSE]
+    signal = strategy.signals(close)
+    position = np.zeros(len(close))
+    position[1:] = signal[:-1]
+    returns = np.zeros(len(close))
+    returns[1:] = close[1:] / close[:-1] - 1
+    turnover = np.abs(np.diff(position, prepend=0.0))
+    strategy_returns = position * returns - fee * turnover
+    equity = initial_capital * np.cumprod(1 + strategy_returns)
+
+    result = {'stats': _stats(strategy_returns, position, turnover, equity, initial_capital,
+                              periods_per_year(bars[:, TIMESTAMP]))}
+    if curve:
+        result['equity'] = equity
+    return result
+
+
+def _stats(strategy_returns, position, turnover, equity, initial_capital, per_year):
+    n = len(strategy_returns)
+    final = float(equity[-1])
+    total_return = final / initial_capital - 1
+    years = n / per_year
+    try:
+        annualized = (final / initial_capital) ** (1 / years) - 1 if final > 0 else -1.0
+    except OverflowError:
+        annualized = math.inf
+    if not math.isfinite(annualized):
+        # A steep gain over a short series compounds past float range; JSON has no Infinity
+        annualized = None
+    std = strategy_returns.std()
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+
+    # A trade is a run of bars at one non-zero position; it won if its
+    # compounded return (fees included) is positive
+    changed = turnover != 0
+    run = np.cumsum(changed)
+    growth = np.bincount(run, weights=np.log1p(np.maximum(strategy_returns, -1 + 1e-12)))
+    held = np.bincount(run, weights=position != 0) > 0
+    wins = growth[held] > 0
+
+    return {
+        'bars': n,
+        'final_equity': final,
+        'total_return': total_return,
+        'annualized_return': annualized,
+        'volatility': float(std * np.sqrt(per_year)),
+        'sharpe': float(strategy_returns.mean() / std * np.sqrt(per_year)) if std > 0 else 0.0,
+        'max_drawdown': float(drawdown.min()),
+        'trades': int(np.count_nonzero(changed)),
+        'win_rate': float(wins.mean()) if len(wins) else None,
+        'exposure': float(np.count_nonzero(position) / n)
+    }
+
+
+def parameter_grid(grid, max_combinations=1000):
+    """Expand {'name': [values, ...]} into a list of parameter dicts"""
+    if not isinstance(grid, dict) or not grid:
+        raise ValueError('Grid must map parameter names to lists of values')
+    names = list(grid)
+    values = [grid[name] if isinstance(grid[name], list) else [grid[name]] for name in names]
+    count = 1
+    for options in values:
+        count *= len(options)
+    if count == 0:
+        raise ValueError('Every grid parameter needs at least one value')
+    if count > max_combinations:
+        raise ValueError(f'Grid has {count} combinations; the limit is {max_combinations}')
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+def _sweep_chunk(name, parameter_sets, base, bars, fee, initial_capital):
+    # Runs in a worker process
+    results = []
+    for parameters in parameter_sets:
+        merged = dict(base, **parameters)
+        try:
+            strategy = create_strategy(name, merged)
+        except ValueError as e:
+            results.append({'parameters': parameters, 'error': str(e)})
+            continue
+        stats = simulate(strategy, bars, fee, initial_capital, curve=False)['stats']
+        results.append({'parameters': parameters, 'stats': stats})
+    return results
+
+
+class HistoryStore:
+    """
+    OHLCV bars per symbol: ``<directory>/<SYMBOL>.npy`` when a directory is
+    configured and has the file, otherwise a seeded random walk of minute
+    bars around the symbol's reference price (stable across calls).
+    """
+
+    def __init__(self, directory=None, reference_prices=None, interval=60, cache_size=8):
+        self.directory = directory
+        self.reference_prices = reference_prices or {}
+        self.interval = interval
+        self.cache_size = cache_size
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol, bars=MINUTES_PER_YEAR):
+        key = (symbol, bars)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        loaded = self._load(symbol)
+        if loaded is not None:
+            history = loaded[-bars:] if bars else loaded
+        elif symbol in self.reference_prices:
+            history = self._synthetic(symbol, bars)
+        else:
+            raise KeyError(symbol)
+        history.flags.writeable = False
+        with self._lock:
+            if len(self._cache) >= self.cache_size:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = history
+        return history
+
+    def _load(self, symbol):
+        if not self.directory:
+            return None
+        path = os.path.join(self.directory, f'{symbol.upper()}.npy')
+        if not os.path.exists(path):
+            return None
+        return as_bars(np.load(path))
+
+    def _synthetic(self, symbol, bars):
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        log_returns = rng.normal(0, 0.0008, bars)
+        close = self.reference_prices[symbol] * np.exp(np.cumsum(log_returns) - log_returns.sum())
+        history = np.empty((bars, 6))
+        end = int(time.time()) // self.interval * self.interval
+        history[:, TIMESTAMP] = end - self.interval * np.arange(bars - 1, -1, -1)
+        history[:, CLOSE] = close
+        history[0, OPEN] = close[0]
+        history[1:, OPEN] = close[:-1]
+        wick = np.abs(rng.normal(0, 0.0004, (2, bars)))
+        history[:, HIGH] = np.maximum(history[:, OPEN], close) * (1 + wick[0])
+        history[:, LOW] = np.minimum(history[:, OPEN], close) * (1 - wick[1])
+        history[:, VOLUME] = rng.lognormal(3, 1, bars)
+        return history
+
+
+class Backtester:
+    def __init__(self, history, processes=2, fee=0.001, initial_capital=10000.0, max_combinations=1000):
+        self.history = history
+        self.processes = processes
+        self.fee = fee
+        self.initial_capital = initial_capital
+        self.max_combinations = max_combinations
+        self.pool = None
+        self._started_pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the sweep process pool (once per process)"""
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            self.pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context('spawn'))
+            self._started_pid = pid
+
+    def stop(self):
+        if self._started_pid is not None:
+            self.pool.shutdown(wait=True)
+            self._started_pid = None
+
+    def run(self, name, parameters, bars, fee=None, initial_capital=None, points=500):
+        """Backtest one parameter set; the equity curve is downsampled to about ``points`` points"""
+        strategy = create_strategy(name, parameters)
+        result = simulate(strategy, bars, self.fee if fee is None else fee,
+                          self.initial_capital if initial_capital is None else initial_capital)
+        equity = result['equity']
+        step = max(1, -(-len(equity) // max(int(points), 2)))
+        index = np.arange(0, len(equity), step)
+        if index[-1] != len(equity) - 1:
+            index = np.append(index, len(equity) - 1)
+        return {
+            'stats': result['stats'],
+            'equity_curve': np.column_stack((bars[index, TIMESTAMP], equity[index])).tolist()
+        }
+
+    def sweep(self, name, grid, bars, parameters=None, fee=None, initial_capital=None, top=10):
+        """Backtest every combination in ``grid`` on the pool; best Sharpe ratio first"""
+        if name not in STRATEGIES:
+            raise ValueError(f'Unknown strategy {name!r}; expected one of {sorted(STRATEGIES)}')
+        combinations = parameter_grid(grid, self.max_combinations)
+        fee = self.fee if fee is None else fee
+        initial_capital = self.initial_capital if initial_capital is None else initial_capital
+        self.start()
+        chunks = [combinations[i::self.processes] for i in range(self.processes)]
+        futures = [self.pool.submit(_sweep_chunk, name, chunk, parameters or {}, bars, fee, initial_capital)
+                   for chunk in chunks if chunk]
+        results = [result for future in futures for result in future.result()]
+        ranked = sorted((result for result in results if 'stats' in result),
+                        key=lambda result: result['stats']['sharpe'], reverse=True)
+        return {
+            'combinations': len(combinations),
+            'errors': [result for result in results if 'error' in result],
+            'results': ranked[:top] if top else ranked
+        }
@@ -0,0 +1,224 @@
+"""
+Trading-bot runtime.
+
+Active bots live in memory and are driven from a shared tick bus on a
+private asyncio loop.  ``publish(symbol, price)`` may be called from any
+thread; ticks are conflated per symbol, so a busy symbol always runs its
+bots against the newest price rather than building a backlog.
+
+Scheduling is fair at two levels: a pass over a symbol's bots runs in
+slices of ``quantum`` bots with a yield to the loop in between (so one
+busy symbol can't starve the others), and each pass starts where the
+previous one left off.  Heavy strategies decide in a process pool; a bot
+with a decision still in flight skips ticks instead of queueing them.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from services.strategies import create_strategy
+
+
+class BotState:
+    __slots__ = ('bot_id', 'user_id', 'symbol', 'strategy', 'state', 'size', 'position', 'entry_price',
+                 'realized_pnl', 'last_price', 'trades', 'ticks', 'skipped', 'pending', 'started_at')
+
+    def __init__(self, bot_id, user_id, symbol, strategy, size):
+        self.bot_id = bot_id
+        self.user_id = user_id
+        self.symbol = symbol
+        self.strategy = strategy
+        self.state = strategy.init_state()
+        self.size = size
+        self.position = 0
+        self.entry_price = None
+        self.realized_pnl = 0.0
+        self.last_price = None
+        self.trades = 0
+        self.ticks = 0
+        self.skipped = 0
+        self.pending = False
+        self.started_at = time.time()
+
+    def to_dict(self):
+        unrealized = 0.0
+        if self.position and self.last_price is not None:
+            unrealized = (self.last_price - self.entry_price) * self.position * self.size
+        return {
+            'bot_id': self.bot_id,
+            'symbol': self.symbol,
+            'position': self.position * self.size,
+            'entry_price': self.entry_price,
+            'last_price': self.last_price,
+            'realized_pnl': self.realized_pnl,
+            'unrealized_pnl': unrealized,
+            'trades': self.trades,
+            'ticks': self.ticks,
+            'skipped_ticks': self.skipped,
+            'started_at': self.started_at
+        }
+
+
+class BotRuntime:
+    def __init__(self, processes=2, quantum=256, on_order=None, latency_samples=100000):
+        self.processes = processes
+        self.quantum = quantum
+        self.on_order = on_order
+        self.loop = None
+        self.pool = None
+        self._bots = {}
+        self._by_symbol = {}
+        self._offsets = {}
+        self._latest = {}
+        self._driving = set()
+        self._latencies = deque(maxlen=latency_samples)
+        self._started_pid = None
+        self._started_at = None
+        self._lock = threading.Lock()
+        self.stats = {'ticks': 0, 'conflated': 0, 'decisions': 0, 'offloaded': 0, 'skipped': 0, 'orders': 0,
+                      'errors': 0}
+
+    def start(self):
+        """Start the loop thread and process pool (once per process)"""
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            self.loop = asyncio.new_event_loop()
+            threading.Thread(target=self.loop.run_forever, name='bot-runtime', daemon=True).start()
+            # Spawned workers don't inherit this process's threads or locks
+            self.pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context('spawn'))
+            self._started_at = time.perf_counter()
+            self._started_pid = pid
+
+    def stop(self):
+        if self._started_pid is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.pool.shutdown(wait=True)
+        self._started_pid = None
+
+    def add(self, bot_id, user_id, strategy, parameters):
+        """Activate a bot; raises ValueError for an unknown strategy or bad parameters"""
+        parameters = parameters or {}
+        bot = BotState(bot_id, user_id, parameters.get('symbol', 'SOL'), create_strategy(strategy, parameters),
+                       float(parameters.get('size', 1)))
+        self.start()
+        self.loop.call_soon_threadsafe(self._attach, bot)
+        return bot
+
+    def remove(self, bot_id):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._detach, bot_id)
+
+    def status(self, bot_id):
+        bot = self._bots.get(bot_id)
+        return bot.to_dict() if bot is not None else None
+
+    def __len__(self):
+        return len(self._bots)
+
+    def publish(self, symbol, price):
+        """Put a tick on the bus (thread-safe)"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._on_tick, symbol, price, time.perf_counter())
+
+    # -- loop side ---------------------------------------------------------
+
+    def _attach(self, bot):
+        self._bots[bot.bot_id] = bot
+        self._by_symbol.setdefault(bot.symbol, []).append(bot)
+
+    def _detach(self, bot_id):
+        bot = self._bots.pop(bot_id, None)
+        if bot is not None:
+            self._by_symbol[bot.symbol].remove(bot)
+
+    def _on_tick(self, symbol, price, published_at):
+        self.stats['ticks'] += 1
+        if symbol in self._latest:
+            self.stats['conflated'] += 1
+        self._latest[symbol] = (price, published_at)
+        if symbol not in self._driving:
+            self._driving.add(symbol)
+            self.loop.create_task(self._drive(symbol))
+
+    async def _drive(self, symbol):
+        try:
+            while symbol in self._latest:
+                price, published_at = self._latest.pop(symbol)
+                bots = list(self._by_symbol.get(symbol, ()))
+                if not bots:
+                    continue
+                # Rotate the starting point so no bot is always served last
+                offset = self._offsets.get(symbol, 0) % len(bots)
+                self._offsets[symbol] = offset + self.quantum
+                order = bots[offset:] + bots[:offset]
+                for start in range(0, len(order), self.quantum):
+                    for bot in order[start:start + self.quantum]:
+                        try:
+                            self._tick_bot(bot, price, published_at)
+                        except Exception:
+                            # One broken bot must not stall the rest of the pass
+                            self.stats['errors'] += 1
+                    await asyncio.sleep(0)
+        finally:
+            self._driving.discard(symbol)
+
+    def _tick_bot(self, bot, price, published_at):
+        bot.ticks += 1
+        bot.last_price = price
+        strategy = bot.strategy
+        if not strategy.heavy:
+            self._apply(bot, strategy.on_tick(bot.state, price), price, published_at)
+            return
+        if not strategy.record(bot.state, price):
+            return
+        if bot.pending:
+            bot.skipped += 1
+            self.stats['skipped'] += 1
+            return
+        future = self.loop.run_in_executor(self.pool, strategy.decide, *strategy.decide_args(bot.state))
+        bot.pending = True
+        self.stats['offloaded'] += 1
+        future.add_done_callback(lambda done: self._offloaded(bot, done, price, published_at))
+
+    def _offloaded(self, bot, future, price, published_at):
+        bot.pending = False
+        if future.cancelled() or future.exception() is not None:
+            self.stats['errors'] += 1
+            return
+        if bot.bot_id in self._bots:
+            self._apply(bot, future.result(), price, published_at)
+
+    def _apply(self, bot, signal, price, published_at):
+        self.stats['decisions'] += 1
+        self._latencies.append(time.perf_counter() - published_at)
+        if signal == bot.position:
+            return
+        if bot.position:
+            bot.realized_pnl += (price - bot.entry_price) * bot.position * bot.size
+        bot.position = signal
+        bot.entry_price = price if signal else None
+        bot.trades += 1
+        self.stats['orders'] += 1
+        if self.on_order is not None:
+            self.on_order(bot, {'symbol': bot.symbol, 'target_position': signal * bot.size, 'price': price})
+
+    def performance(self):
+        latencies = sorted(self._latencies)
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0
+        return {
+            'active_bots': len(self._bots),
+            'bot_ticks_per_second': self.stats['decisions'] / elapsed if elapsed else 0.0,
+            'p50_decision_ms': latencies[len(latencies) // 2] * 1e3 if latencies else None,
+            'p99_decision_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e3 if latencies else None,
+            **self.stats
+        }
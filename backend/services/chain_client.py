@@ -0,0 +1,292 @@
+"""
+Pooled, batched JSON-RPC clients for the configured networks.
+
+Each network gets one ``ChainClient`` with its own keep-alive connection
+pool.  Calls made within ``batch_window`` of each other are sent as a single
+JSON-RPC batch, identical in-flight calls share one request, every batch is
+bounded by a timeout, and a circuit breaker stops hammering an endpoint that
+keeps failing.  The clients are asyncio-native; ``ChainClients`` runs them on
+a background event loop so synchronous Flask handlers can use them too.
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+
+import aiohttp
+
+# Which RPC dialect each configured network speaks
+NETWORK_FLAVORS = {
+    'solana': 'solana',
+    'teos': 'solana',
+    'ethereum': 'ethereum',
+    'bitcoin': 'bitcoin'
+}
+
+
+class RpcError(Exception):
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+class CircuitOpenError(RpcError):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures for ``reset_timeout`` seconds
+
+    Once the timeout passes the circuit is half-open: a single probe is let
+    through and everything else is rejected until that probe succeeds
+    (closing the circuit) or fails (re-opening it).
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        state = self.state
+        if state == self.HALF_OPEN:
+            if self.probing:
+                return False
+            self.probing = True
+        return state != self.OPEN
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.probing = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+
+
+class ChainClient:
+    """Batched JSON-RPC client for one network endpoint (use from one event loop)"""
+
+    def __init__(self, network, config, pool_size=32, timeout=5.0, batch_window=0.002, max_batch=100, breaker=None):
+        self.network = network
+        self.rpc_url = config['rpc_url']
+        self.decimals = config.get('decimals', 0)
+        self.contract = config.get('contract')
+        self.flavor = NETWORK_FLAVORS.get(network, network)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = {'calls': 0, 'coalesced': 0, 'batches': 0, 'errors': 0, 'rejected': 0}
+        self._session = None
+        self._pending = []
+        self._inflight = {}
+        self._flush_handle = None
+        self._sending = set()  # Strong references so in-flight batches aren't garbage collected
+        self._ids = itertools.count(1)
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                json_serialize=lambda obj: json.dumps(obj, separators=(',', ':'))
+            )
+        return self._session
+
+    async def call(self, method, params=()):
+        """Issue one JSON-RPC call; it is queued into the next batch"""
+        params = list(params)
+        key = (method, json.dumps(params, sort_keys=True))
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(future)
+        if not self.breaker.allow():
+            self.stats['rejected'] += 1
+            raise CircuitOpenError(f'{self.network} RPC circuit is open')
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        future.add_done_callback(lambda f, key=key: self._inflight.pop(key, None) if self._inflight.get(key) is f else None)
+        self._pending.append((next(self._ids), method, params, future))
+        self.stats['calls'] += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch):
+        body = [{'jsonrpc': '2.0', 'id': rid, 'method': method, 'params': params} for rid, method, params, _ in batch]
+        self.stats['batches'] += 1
+        try:
+            async with self._get_session().post(self.rpc_url, json=body if len(body) > 1 else body[0]) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self.stats['errors'] += 1
+            self.breaker.record_failure()
+            error = RpcError(f'{self.network} RPC request failed: {e!r}')
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        self.breaker.record_success()
+        responses = {item.get('id'): item for item in (data if isinstance(data, list) else [data])}
+        for rid, method, _, future in batch:
+            if future.done():
+                continue
+            item = responses.get(rid)
+            if item is None:
+                future.set_exception(RpcError(f'No response for {method}'))
+            elif item.get('error'):
+                future.set_exception(RpcError(item['error'].get('message', 'RPC error'), item['error'].get('code')))
+            else:
+                future.set_result(item.get('result'))
+
+    async def get_balance(self, address):
+        """Native (or configured token) balance in whole units"""
+        if self.flavor == 'solana' and self.contract:
+            result = await self.call('getTokenAccountsByOwner', [address, {'mint': self.contract}, {'encoding': 'jsonParsed'}])
+            return sum(
+                float(account['account']['data']['parsed']['info']['tokenAmount']['uiAmount'] or 0)
+                for account in result['value']
+            )
+        if self.flavor == 'solana':
+            result = await self.call('getBalance', [address])
+            return result['value'] / 10 ** self.decimals
+        if self.flavor == 'ethereum':
+            result = await self.call('eth_getBalance', [address, 'latest'])
+            return int(result, 16) / 10 ** self.decimals
+        if self.flavor == 'bitcoin':
+            result = await self.call('scantxoutset', ['start', [f'addr({address})']])
+            return float(result['total_amount'])
+        raise RpcError(f'Unsupported network {self.network}')
+
+    async def send_raw_transaction(self, raw_transaction):
+        """Broadcast a signed transaction and return its hash/signature"""
+        method = {
+            'solana': 'sendTransaction',
+            'ethereum': 'eth_sendRawTransaction',
+            'bitcoin': 'sendrawtransaction'
+        }[self.flavor]
+        return await self.call(method, [raw_transaction])
+
+    async def get_confirmations(self, tx_hash):
+        """Confirmation count for ``tx_hash``, or None if the chain doesn't know it yet"""
+        if self.flavor == 'solana':
+            result = await self.call('getSignatureStatuses', [[tx_hash]])
+            status = result['value'][0]
+            if status is None:
+                return None
+            # Finalized signatures report null confirmations
+            return status['confirmations'] if status['confirmations'] is not None else 32
+        if self.flavor == 'ethereum':
+            receipt = await self.call('eth_getTransactionReceipt', [tx_hash])
+            if receipt is None:
+                return None
+            head = int(await self.call('eth_blockNumber'), 16)
+            return head - int(receipt['blockNumber'], 16) + 1
+        if self.flavor == 'bitcoin':
+            try:
+                result = await self.call('getrawtransaction', [tx_hash, True])
+            except RpcError as e:
+                if e.code == -5:  # No such mempool or blockchain transaction
+                    return None
+                raise
+            return result.get('confirmations', 0)
+        raise RpcError(f'Unsupported network {self.network}')
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class ChainClients:
+    """One ``ChainClient`` per network, driven by a private event-loop thread"""
+
+    def __init__(self, networks, **options):
+        self.networks = networks
+        self.options = options
+        self._clients = {}
+        self._loop = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name='chain-clients', daemon=True).start()
+                    self._loop = loop
+        return self._loop
+
+    def client(self, network):
+        client = self._clients.get(network)
+        if client is None:
+            if network not in self.networks:
+                raise RpcError(f'Unsupported network {network}')
+            client = self._clients.setdefault(network, ChainClient(network, self.networks[network], **self.options))
+        return client
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the client loop from synchronous code"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def get_balance(self, network, address, timeout=None):
+        return self.run(self.client(network).get_balance(address), timeout)
+
+    def send_raw_transaction(self, network, raw_transaction, timeout=None):
+        return self.run(self.client(network).send_raw_transaction(raw_transaction), timeout)
+
+    def get_confirmations(self, network, tx_hash, timeout=None):
+        return self.run(self.client(network).get_confirmations(tx_hash), timeout)
+
+    def stats(self):
+        return {
+            network: dict(client.stats, circuit=client.breaker.state)
+            for network, client in self._clients.items()
+        }
+
+    def close(self):
+        if self._loop is None:
+            return
+        for client in list(self._clients.values()):
+            self.run(client.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
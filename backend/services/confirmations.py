@@ -0,0 +1,193 @@
+"""
+Background confirmation tracking for pending transactions.
+
+Pending hashes sit in a heap ordered by when they are next due to be
+polled.  Each tick pops at most ``max_per_tick`` due entries, asks the
+confirmation source about all of them at once (one batched RPC round trip
+per network), pushes confirmed transactions into the store through
+``on_update``, and re-queues the rest with exponential backoff.  Reads of a
+transaction never trigger a poll.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+import zlib
+
+REQUIRED_CONFIRMATIONS = {
+    'solana': 32,
+    'teos': 32,
+    'ethereum': 12,
+    'bitcoin': 6
+}
+
+
+class SimulatedChain:
+    """Offline source: a transaction gains a confirmation every ``block_time``.
+
+    A hash-derived ``propagation`` delay keeps freshly sent transactions
+    invisible for a while, like a real network.
+    """
+
+    def __init__(self, block_time=0.5, propagation=2.0, clock=time.monotonic):
+        self.block_time = block_time
+        self.propagation = propagation
+        self.clock = clock
+        self._seen = {}
+
+    def register(self, tx_hash):
+        self._seen.setdefault(tx_hash, self.clock())
+
+    def forget(self, tx_hash):
+        self._seen.pop(tx_hash, None)
+
+    def confirmations(self, network, tx_hashes):
+        now = self.clock()
+        results = []
+        for tx_hash in tx_hashes:
+            submitted = self._seen.setdefault(tx_hash, now)
+            delay = self.propagation * (zlib.crc32(tx_hash.encode()) % 100) / 100
+            age = now - submitted - delay
+            results.append(None if age < 0 else int(age / self.block_time))
+        return results
+
+
+class RpcConfirmationSource:
+    """Asks the chain clients; one gather per network so calls share batches"""
+
+    def __init__(self, chain_clients, timeout=10.0):
+        self.chain_clients = chain_clients
+        self.timeout = timeout
+
+    def register(self, tx_hash):
+        pass
+
+    def forget(self, tx_hash):
+        pass
+
+    def confirmations(self, network, tx_hashes):
+        client = self.chain_clients.client(network)
+
+        async def lookup():
+            return await asyncio.gather(*(client.get_confirmations(h) for h in tx_hashes), return_exceptions=True)
+
+        results = self.chain_clients.run(lookup(), self.timeout)
+        return [None if isinstance(result, BaseException) else result for result in results]
+
+
+class ConfirmationTracker:
+    """Time-ordered poll queue of pending transactions"""
+
+    def __init__(self, source, on_update, max_per_tick=1000, tick_interval=0.5,
+                 base_interval=1.0, max_interval=60.0, required=None, autostart=True, clock=time.monotonic):
+        self.source = source
+        self.on_update = on_update
+        self.max_per_tick = max_per_tick
+        self.tick_interval = tick_interval
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.required = dict(REQUIRED_CONFIRMATIONS, **(required or {}))
+        self.autostart = autostart
+        self.clock = clock
+        self._heap = []
+        self._tracked = set()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_pid = None
+        self.stats = {'ticks': 0, 'polled': 0, 'source_calls': 0, 'confirmed': 0}
+
+    def __len__(self):
+        return len(self._tracked)
+
+    def track(self, transaction, delay=0.0):
+        """Start watching a pending transaction"""
+        tx_hash = transaction['hash']
+        with self._lock:
+            if tx_hash in self._tracked:
+                return
+            self._tracked.add(tx_hash)
+            entry = (self.clock() + delay, next(self._seq), tx_hash, transaction['network'], 0, transaction.get('confirmations', 0))
+            heapq.heappush(self._heap, entry)
+        self.source.register(tx_hash)
+        if self.autostart:
+            self.start()
+
+    def _pop_due(self, now):
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(due) < self.max_per_tick:
+                due.append(heapq.heappop(self._heap))
+        return due
+
+    def tick(self):
+        """Poll everything due now (bounded); returns the number polled"""
+        now = self.clock()
+        due = self._pop_due(now)
+        self.stats['ticks'] += 1
+        if not due:
+            return 0
+
+        by_network = {}
+        for entry in due:
+            by_network.setdefault(entry[3], []).append(entry)
+
+        requeue = []
+        for network, entries in by_network.items():
+            self.stats['source_calls'] += 1
+            try:
+                results = self.source.confirmations(network, [entry[2] for entry in entries])
+            except Exception:
+                results = [None] * len(entries)
+            required = self.required.get(network, 1)
+            for (_, _, tx_hash, _, attempts, last), confirmations in zip(entries, results):
+                if confirmations is not None and confirmations >= required:
+                    self.on_update(tx_hash, 'completed', confirmations)
+                    with self._lock:
+                        self._tracked.discard(tx_hash)
+                    self.source.forget(tx_hash)
+                    self.stats['confirmed'] += 1
+                    continue
+                if confirmations is not None and confirmations > last:
+                    # Progressing: poll again at the base rate; only the final
+                    # status change is written to the store
+                    requeue.append((now + self.base_interval, next(self._seq), tx_hash, network, 0, confirmations))
+                else:
+                    interval = min(self.base_interval * 2 ** attempts, self.max_interval)
+                    requeue.append((now + interval, next(self._seq), tx_hash, network, attempts + 1, last))
+
+        with self._lock:
+            for entry in requeue:
+                heapq.heappush(self._heap, entry)
+        self.stats['polled'] += len(due)
+        return len(due)
+
+    def _run(self):
+        while not self._stop.wait(self.tick_interval):
+            try:
+                self.tick()
+            except Exception:
+                pass
+
+    def start(self):
+        """Start the polling thread (once per process)"""
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            self._started_pid = pid
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='confirmation-tracker', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._started_pid = None
@@ -0,0 +1,116 @@
+"""
+Copy-trade fan-out.
+
+When a leader trades, every follower gets a proportional order.  Instead of
+one request per follower, the leader's follower array is snapshotted and
+cut into chunks; each chunk is sized in one vectorised step (follower copy
+ratios live in a dense NumPy array indexed by graph index) and handed to
+``execute(trade, follower_ids, amounts)`` as a single batch on a worker
+pool.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class FanOut:
+    """Handle for one leader trade's fan-out"""
+
+    def __init__(self, trade, followers, futures, started_at):
+        self.trade = trade
+        self.followers = followers
+        self.futures = futures
+        self.started_at = started_at
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+    def result(self, timeout=None):
+        """Wait for every chunk; returns the number of orders placed"""
+        return sum(future.result(timeout) for future in self.futures)
+
+    def summary(self):
+        return {
+            'trade': self.trade,
+            'followers': self.followers,
+            'chunks': len(self.futures),
+            'done': self.done()
+        }
+
+
+class CopyTradeEngine:
+    def __init__(self, graph, execute, workers=4, chunk_size=10000, min_amount=0.0, default_ratio=1.0):
+        self.graph = graph
+        self.execute = execute
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.min_amount = min_amount
+        self.default_ratio = default_ratio
+        self._ratios = np.full(1024, default_ratio)
+        self.executor = None
+        self._started_pid = None
+        self._lock = threading.Lock()
+        self.stats = {'trades': 0, 'chunks': 0, 'orders': 0, 'skipped': 0}
+
+    def start(self):
+        """Start the worker pool (once per process)"""
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='copy-trade')
+            self._started_pid = pid
+
+    def stop(self):
+        if self._started_pid is None:
+            return
+        self.executor.shutdown(wait=True)
+        self._started_pid = None
+
+    def _grow(self, size):
+        if size > len(self._ratios):
+            ratios = np.full(max(size, len(self._ratios) * 2), self.default_ratio)
+            ratios[:len(self._ratios)] = self._ratios
+            self._ratios = ratios
+
+    def set_copy_ratio(self, user_id, ratio):
+        """Scale a follower's copied orders by a ratio in (0, 1]"""
+        # Also rejects NaN and infinities
+        if not 0 < ratio <= 1:
+            raise ValueError("Copy ratio must be greater than 0 and at most 1")
+        index = self.graph.index_of(user_id, create=True)
+        with self._lock:
+            self._grow(index + 1)
+            self._ratios[index] = ratio
+
+    def on_trade(self, leader_id, trade):
+        """Fan ``trade`` (a dict with an ``amount``) out to the leader's followers"""
+        self.start()
+        followers = np.frombuffer(self.graph.followers_snapshot(leader_id), dtype=np.uint32)
+        with self._lock:
+            self._grow(len(self.graph))
+            ratios = self._ratios
+        self.stats['trades'] += 1
+        futures = [
+            self.executor.submit(self._run_chunk, trade, followers[start:start + self.chunk_size], ratios)
+            for start in range(0, len(followers), self.chunk_size)
+        ]
+        return FanOut(trade, len(followers), futures, time.time())
+
+    def _run_chunk(self, trade, followers, ratios):
+        amounts = ratios[followers] * float(trade['amount'])
+        keep = amounts > self.min_amount
+        if not keep.all():
+            self.stats['skipped'] += int(len(keep) - keep.sum())
+            followers, amounts = followers[keep], amounts[keep]
+        if len(followers):
+            self.execute(trade, self.graph.user_ids(followers.tolist()), amounts)
+        self.stats['chunks'] += 1
+        self.stats['orders'] += len(followers)
+        return len(followers)
@@ -0,0 +1,230 @@
+"""
+Cross-chain swap execution engine.
+
+Each swap is a persisted state machine::
+
+    locking -> bridging -> releasing -> completed
+        \\          \\           \\
+         +----------+-----------+--> refunding -> refunded (or failed)
+
+A swap is plain data in the ``store`` (so progress survives restarts) and
+has at most one step scheduled at a time.  Steps run on a shared worker
+pool; waiting for a chain action to land and step deadlines are handled by
+a timer wheel, so thousands of in-flight swaps need no thread of their own.
+Chain actions are submitted with an idempotency key of ``<swap id>:<action>``
+so re-submitting after a crash is safe.
+
+With a ``funds(wallet_id, asset, delta)`` hook, creating a swap debits the
+source wallet (the hook raises ValueError on insufficient funds) and a
+refunded swap credits it back.
+"""
+
+import hashlib
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.timer_wheel import TimerWheel
+
+ASSET_NETWORKS = {
+    'SOL': 'solana',
+    'TEOS': 'teos',
+    'ETH': 'ethereum',
+    'BTC': 'bitcoin'
+}
+
+# state -> (chain action, network field, next state)
+STEPS = {
+    'locking': ('lock', 'from_network', 'bridging'),
+    'bridging': ('bridge', 'to_network', 'releasing'),
+    'releasing': ('release', 'to_network', 'completed'),
+    'refunding': ('refund', 'from_network', 'refunded')
+}
+TERMINAL_STATES = ('completed', 'refunded', 'failed')
+
+
+class SimulatedBridge:
+    """Offline chain endpoint: actions land after a key-derived latency.
+
+    The outcome and ready time are encoded in the handle, so polling keeps
+    working across restarts.
+    """
+
+    def __init__(self, name, latency=(0.2, 2.0), failure_rate=0.0):
+        self.name = name
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    def submit(self, action, swap):
+        key = f"{swap['id']}:{action}"
+        digest = hashlib.sha256(f'{self.name}:{key}'.encode()).digest()
+        low, high = self.latency
+        delay = low + (high - low) * digest[0] / 255
+        ok = action == 'refund' or digest[1] / 255 >= self.failure_rate
+        return f'{key}:{time.time() + delay:.3f}:{int(ok)}'
+
+    def status(self, handle):
+        _, ready_at, ok = handle.rsplit(':', 2)
+        if time.time() < float(ready_at):
+            return 'pending'
+        return 'done' if ok == '1' else 'failed'
+
+
+class SwapEngine:
+    def __init__(self, store, chains, workers=16, step_timeout=120.0, poll_interval=1.0,
+                 max_refund_attempts=5, funds=None):
+        self.store = store
+        self.chains = chains
+        self.funds = funds
+        self.step_timeout = step_timeout
+        self.poll_interval = poll_interval
+        self.max_refund_attempts = max_refund_attempts
+        self.workers = workers
+        self.executor = None
+        self.wheel = None
+        self._started_pid = None
+        self._lock = threading.Lock()
+        self.stats = {'created': 0, 'steps': 0, 'completed': 0, 'refunded': 0, 'failed': 0}
+
+    def start(self):
+        """Start the worker pool and timer wheel (once per process)"""
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='swap-worker')
+            self.wheel = TimerWheel(dispatch=self.executor.submit)
+            self.wheel.start()
+            self._started_pid = pid
+
+    def stop(self):
+        if self._started_pid is None:
+            return
+        self.wheel.stop()
+        self.executor.shutdown(wait=True)
+        self._started_pid = None
+
+    def create(self, from_asset, to_asset, amount, user_id=None, recipient=None, wallet_id=None):
+        if self.funds is not None:
+            if wallet_id is None:
+                raise ValueError('wallet_id is required')
+            self.funds(wallet_id, from_asset, -amount)
+        now = time.time()
+        swap = {
+            'id': secrets.token_hex(16),
+            'from_asset': from_asset,
+            'to_asset': to_asset,
+            'from_network': ASSET_NETWORKS[from_asset],
+            'to_network': ASSET_NETWORKS[to_asset],
+            'amount': amount,
+            'user_id': user_id,
+            'wallet_id': wallet_id,
+            'recipient': recipient,
+            'state': 'locking',
+            'handle': None,
+            'deadline': None,
+            'refund_attempts': 0,
+            'error': None,
+            'history': [{'state': 'locking', 'at': now}],
+            'created_at': now,
+            'updated_at': now
+        }
+        self.store[swap['id']] = swap
+        self.stats['created'] += 1
+        self.start()
+        snapshot = self._copy(swap)
+        self._schedule(swap['id'], 0)
+        return snapshot
+
+    def get(self, swap_id):
+        swap = self.store.get(swap_id)
+        return self._copy(swap) if swap is not None else None
+
+    @staticmethod
+    def _copy(swap):
+        # Workers keep mutating the stored record; hand out a stable copy
+        return dict(swap, history=list(swap['history']))
+
+    def resume(self):
+        """Re-schedule every unfinished swap (after a restart); returns how many"""
+        unfinished = [swap_id for swap_id, swap in self.store.items() if swap['state'] not in TERMINAL_STATES]
+        if unfinished:
+            self.start()
+        for swap_id in unfinished:
+            self._schedule(swap_id, 0)
+        return len(unfinished)
+
+    def _schedule(self, swap_id, delay):
+        if delay <= 0:
+            self.executor.submit(self._step, swap_id)
+        else:
+            self.wheel.schedule(delay, self._step, swap_id)
+
+    def _save(self, swap):
+        swap['updated_at'] = time.time()
+        self.store[swap['id']] = swap
+
+    def _step(self, swap_id):
+        swap = self.store.get(swap_id)
+        if swap is None or swap['state'] not in STEPS:
+            return
+        self.stats['steps'] += 1
+        action, network_field, next_state = STEPS[swap['state']]
+        chain = self.chains[swap[network_field]]
+
+        if swap['handle'] is None:
+            try:
+                swap['handle'] = chain.submit(action, swap)
+            except Exception as e:
+                self._fail_step(swap, f'{action} submit failed: {e}')
+                return
+            swap['deadline'] = time.time() + self.step_timeout
+            self._save(swap)
+            self._schedule(swap_id, self.poll_interval)
+            return
+
+        try:
+            status = chain.status(swap['handle'])
+        except Exception:
+            status = 'pending'  # Transient; the deadline still applies
+        if status == 'done':
+            self._transition(swap, next_state)
+        elif status == 'failed':
+            self._fail_step(swap, f'{action} failed on {swap[network_field]}')
+        elif time.time() > swap['deadline']:
+            self._fail_step(swap, f'{action} timed out on {swap[network_field]}')
+        else:
+            self._schedule(swap_id, self.poll_interval)
+
+    def _transition(self, swap, state):
+        if state == 'refunded' and self.funds is not None and swap.get('wallet_id') is not None:
+            try:
+                self.funds(swap['wallet_id'], swap['from_asset'], swap['amount'])
+            except (KeyError, ValueError) as e:
+                swap['error'] = f'refund credit failed: {e}'
+        swap['state'] = state
+        swap['handle'] = None
+        swap['deadline'] = None
+        swap['history'].append({'state': state, 'at': time.time()})
+        self._save(swap)
+        if state in TERMINAL_STATES:
+            self.stats[state] += 1
+        else:
+            self._schedule(swap['id'], 0)
+
+    def _fail_step(self, swap, reason):
+        swap['error'] = reason
+        if swap['state'] != 'refunding':
+            self._transition(swap, 'refunding')
+            return
+        swap['refund_attempts'] += 1
+        if swap['refund_attempts'] >= self.max_refund_attempts:
+            self._transition(swap, 'failed')
+            return
+        swap['handle'] = None
+        self._save(swap)
+        self._schedule(swap['id'], self.poll_interval * 2 ** swap['refund_attempts'])
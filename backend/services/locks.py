@@ -0,0 +1,32 @@
+"""
+Lock striping for per-wallet critical sections.
+
+A fixed pool of locks is shared by hashing the key, so read-check-write
+sequences on one wallet are atomic while operations on unrelated wallets
+almost always take different locks and proceed in parallel.  Memory stays
+constant no matter how many wallets exist.
+"""
+
+import threading
+import zlib
+from contextlib import contextmanager
+
+
+class StripedLock:
+    def __init__(self, stripes=1024):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def lock_for(self, key):
+        return self._locks[zlib.crc32(key.encode('utf-8')) % len(self._locks)]
+
+    @contextmanager
+    def hold(self, *keys):
+        """Hold the stripes for all ``keys``, acquired in a fixed order to avoid deadlock"""
+        locks = sorted({id(lock): lock for lock in map(self.lock_for, keys)}.items())
+        for _, lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for _, lock in reversed(locks):
+                lock.release()
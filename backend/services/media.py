@@ -0,0 +1,280 @@
+"""
+Content-addressed image store for NFT media.
+
+Originals are stored once under their SHA-256 (``<dir>/<ab>/<digest>.<ext>``),
+so a URL naming a digest always means the same bytes and can be cached
+forever.  WebP thumbnails for each configured size are generated once by a
+background thread pool right after upload (Pillow releases the GIL while
+decoding and resizing) and written next to the original.  Hot thumbnails
+are kept in a byte-bounded LRU so gallery requests are served from memory;
+originals are streamed from disk by the server (``send_file``).
+
+Human-readable names (``pharaoh_001``) are refs: small files under
+``<dir>/refs`` holding a digest, which may be repointed.
+"""
+
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+FORMATS = {'PNG': 'png', 'JPEG': 'jpg', 'GIF': 'gif', 'WEBP': 'webp'}
+CONTENT_TYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'gif': 'image/gif', 'webp': 'image/webp'}
+DIGEST = re.compile(r'^[0-9a-f]{64}$')
+# Not all dots: "." and ".." are directories, not files under refs/
+REF_NAME = re.compile(r'^(?!\.+$)[A-Za-z0-9_.-]{1,64}$')
+# Names that could never be fetched: /api/nft/image/stats is another route
+RESERVED_NAMES = frozenset({'stats'})
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def check_name(name):
+    """Raise ValueError unless ``name`` can be used (and later fetched) as an image name"""
+    if not REF_NAME.match(name):
+        raise ValueError('Image names may only use letters, digits, ".", "_" and "-", and not only dots')
+    if name in RESERVED_NAMES or DIGEST.match(name):
+        # A digest-shaped name would always resolve as the digest itself
+        raise ValueError(f'{name!r} is reserved and cannot name an image')
+
+
+class ByteLRU:
+    """LRU of byte strings bounded by their total size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= len(previous)
+            self._entries[key] = data
+            self.bytes += len(data)
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class MediaStore:
+    def __init__(self, directory, sizes=(128, 256, 512), workers=2, cache_bytes=64 * 2 ** 20, quality=80):
+        self.directory = directory
+        self.sizes = tuple(sorted(sizes))
+        self.workers = workers
+        self.quality = quality
+        self.cache = ByteLRU(cache_bytes)
+        self.pool = None
+        self._pending = {}
+        self._originals = {}  # digest -> path, filled on first lookup
+        self._refs = {}
+        self._started_pid = None
+        self._lock = threading.Lock()
+        self.stats = {'stored': 0, 'deduplicated': 0, 'thumbnails': 0, 'thumbnail_errors': 0}
+
+    def start(self):
+        """Start the thumbnail pool (once per process)"""
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix='thumbnails')
+            self._pending = {}
+            self._started_pid = pid
+
+    def stop(self):
+        if self._started_pid is not None:
+            self.pool.shutdown(wait=True)
+            self._started_pid = None
+
+    # -- paths -------------------------------------------------------------
+
+    def _shard(self, digest):
+        return os.path.join(self.directory, digest[:2])
+
+    def original_path(self, digest):
+        """Path of the original for ``digest``, or None"""
+        path = self._originals.get(digest)
+        if path is not None:
+            return path
+        if not DIGEST.match(digest):
+            return None
+        for extension in CONTENT_TYPES:
+            candidate = os.path.join(self._shard(digest), f'{digest}.{extension}')
+            if os.path.exists(candidate):
+                if len(self._originals) >= 100000:
+                    self._originals.clear()
+                self._originals[digest] = candidate
+                return candidate
+        return None
+
+    def thumbnail_path(self, digest, size):
+        return os.path.join(self._shard(digest), f'{digest}.{size}.webp')
+
+    # -- writes ------------------------------------------------------------
+
+    def put(self, data, name=None):
+        """Store image bytes; returns the digest.  Thumbnails follow in the background."""
+        if name is not None:
+            check_name(name)
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.verify()
+                extension = FORMATS.get(image.format)
+        except Exception:
+            raise InvalidImage('Not a readable image')
+        if extension is None:
+            raise InvalidImage(f'Unsupported image format; expected one of {sorted(FORMATS)}')
+        self.start()
+        digest = hashlib.sha256(data).hexdigest()
+        if self.original_path(digest) is None:
+            path = os.path.join(self._shard(digest), f'{digest}.{extension}')
+            _write_atomic(path, data)
+            self._originals[digest] = path
+            self.stats['stored'] += 1
+        else:
+            self.stats['deduplicated'] += 1
+        self._schedule(digest)
+        if name is not None:
+            self.set_ref(name, digest)
+        return digest
+
+    def _schedule(self, digest, size=None):
+        """Queue one job rendering every missing size (or just ``size``); returns its future"""
+        with self._lock:
+            if size is not None and (digest, size) in self._pending:
+                return self._pending[(digest, size)]
+            missing = [s for s in (self.sizes if size is None else (size,))
+                       if (digest, s) not in self._pending and not os.path.exists(self.thumbnail_path(digest, s))]
+            if not missing:
+                return None
+            future = self.pool.submit(self._render, digest, missing)
+            for s in missing:
+                self._pending[(digest, s)] = future
+        return future
+
+    def _render(self, digest, sizes):
+        # Decode once (JPEG at a reduced DCT scale where possible) and
+        # downscale from the largest size to the smallest
+        rendered = {}
+        try:
+            with Image.open(self.original_path(digest)) as image:
+                largest = max(sizes)
+                image.draft('RGB', (largest, largest))
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.mode else 'RGB')
+                for size in sorted(sizes, reverse=True):
+                    image.thumbnail((size, size))
+                    out = io.BytesIO()
+                    # Fastest encoder effort: about half the time for near-identical size
+                    image.save(out, 'WEBP', quality=self.quality, method=0)
+                    data = rendered[size] = out.getvalue()
+                    _write_atomic(self.thumbnail_path(digest, size), data)
+                    self.cache.put((digest, size), data)
+                    self.stats['thumbnails'] += 1
+            return rendered
+        except Exception:
+            self.stats['thumbnail_errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                for size in sizes:
+                    self._pending.pop((digest, size), None)
+
+    # -- refs --------------------------------------------------------------
+
+    def set_ref(self, name, digest):
+        check_name(name)
+        _write_atomic(os.path.join(self.directory, 'refs', name), digest.encode('ascii'))
+        self._refs[name] = digest
+
+    def resolve(self, image_id):
+        """Digest for a digest or a ref name, or None"""
+        if DIGEST.match(image_id):
+            return image_id
+        digest = self._refs.get(image_id)
+        if digest is None and REF_NAME.match(image_id):
+            try:
+                with open(os.path.join(self.directory, 'refs', image_id), 'rb') as f:
+                    digest = f.read().decode('ascii').strip()
+            except OSError:
+                return None
+            self._refs[image_id] = digest
+        return digest
+
+    # -- reads -------------------------------------------------------------
+
+    def thumbnail(self, digest, size, timeout=30):
+        """Thumbnail bytes, from memory when hot; generated on demand if missing"""
+        key = (digest, size)
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+        try:
+            with open(self.thumbnail_path(digest, size), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            if self.original_path(digest) is None:
+                return None
+            # Upload still being processed (or a size added since): wait for the worker
+            self.start()
+            future = self._schedule(digest, size)
+            if future is None:
+                return self.thumbnail(digest, size, timeout)
+            return future.result(timeout)[size]
+        self.cache.put(key, data)
+        return data
+
+    def performance(self):
+        return {
+            'cache_entries': len(self.cache),
+            'cache_bytes': self.cache.bytes,
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            'pending_thumbnails': len(self._pending),
+            **self.stats
+        }
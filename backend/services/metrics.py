@@ -0,0 +1,332 @@
+"""
+Request and hot-path latency metrics.
+
+Latencies go into HDR-style histograms: log-linear buckets (32 per
+doubling, so about 3% error) over integer microseconds.  That covers a
+microsecond to hours in about a thousand buckets, and the bucket index is
+a couple of bit operations.  Each thread records into its own shard
+(histograms, status counts, started/finished counters), so recording takes
+no lock; a scrape merges the shards.  Shards of threads that have exited
+are folded into one retired shard on the next scrape, so servers that start
+a thread per request don't grow the list.  The number of requests in flight
+is how many started minus how many finished.
+
+``MetricsMiddleware`` times every request from the outermost WSGI layer
+until its body is closed (so streamed responses count in full).  Requests
+are labelled by route template, which the app puts in the environ under
+``ROUTE_KEY``; the fast paths that answer before Flask do the same.
+``timed(name)`` and ``time(name)`` time internal hot paths.  ``render()``
+writes everything in Prometheus text format.
+
+Metrics are per process: with several workers, each reports its own (the
+``worker`` label).
+"""
+
+import functools
+import os
+import threading
+import time
+import weakref
+
+ROUTE_KEY = 'teos.route'
+UNMATCHED = '<unmatched>'
+SUB_BITS = 5
+SUB_BUCKETS = 1 << SUB_BITS
+# Prometheus bucket bounds in seconds; derived from the finer HDR buckets
+EXPORT_BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def bucket_index(micros):
+    if micros < 2 * SUB_BUCKETS:
+        return micros
+    shift = micros.bit_length() - SUB_BITS - 1
+    return (shift << SUB_BITS) + (micros >> shift)
+
+
+def bucket_upper(index):
+    """Exclusive upper bound (in microseconds) of a bucket"""
+    if index < 2 * SUB_BUCKETS:
+        return index + 1
+    shift = (index >> SUB_BITS) - 1
+    return ((index & (SUB_BUCKETS - 1)) + SUB_BUCKETS + 1) << shift
+
+
+class _Series:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = []
+        self.total = 0
+        self.count = 0
+
+
+class _Shard:
+    __slots__ = ('series', 'statuses', 'started', 'finished', 'thread')
+
+    def __init__(self, thread=None):
+        self.series = {}
+        self.statuses = {}
+        self.started = 0
+        self.finished = 0
+        self.thread = thread  # Weak reference to the recording thread
+
+    def alive(self):
+        thread = self.thread()
+        return thread is not None and thread.is_alive()
+
+    def fold(self, other):
+        for key, series in other.series.items():
+            merged = self.series.get(key)
+            if merged is None:
+                merged = self.series[key] = _Series()
+            if len(series.counts) > len(merged.counts):
+                merged.counts.extend([0] * (len(series.counts) - len(merged.counts)))
+            for index, n in enumerate(series.counts):
+                merged.counts[index] += n
+            merged.total += series.total
+            merged.count += series.count
+        for key, count in other.statuses.items():
+            self.statuses[key] = self.statuses.get(key, 0) + count
+        self.started += other.started
+        self.finished += other.finished
+
+
+class Histogram:
+    """Merged bucket counts of one series"""
+
+    def __init__(self, counts, total, count):
+        self.counts = counts
+        self.total = total  # Microseconds
+        self.count = count
+
+    def quantile(self, q):
+        """Upper bound (seconds) of the bucket holding the ``q`` quantile"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return bucket_upper(index) / 1e6
+        return bucket_upper(len(self.counts) - 1) / 1e6
+
+
+class _Timer:
+    __slots__ = ('metrics', 'key', 'start')
+
+    def __init__(self, metrics, key):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.record(self.key, (time.perf_counter_ns() - self.start) // 1000)
+
+
+class Metrics:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard()
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard(weakref.ref(threading.current_thread()))
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _scrape_shards(self):
+        with self._lock:
+            dead = [shard for shard in self._shards if not shard.alive()]
+            if dead:
+                # Nothing records into a dead thread's shard any more.  The retired
+                # shard is replaced, not updated, so a concurrent scrape that
+                # already holds the old list doesn't count the dead shards twice
+                retired = _Shard()
+                for shard in [self._retired] + dead:
+                    retired.fold(shard)
+                self._retired = retired
+                self._shards = [shard for shard in self._shards if shard.alive()]
+            return self._shards + [self._retired]
+
+    def record(self, key, micros, shard=None):
+        """Add one ``micros`` observation to series ``key``"""
+        if shard is None:
+            shard = self._shard()
+        series = shard.series.get(key)
+        if series is None:
+            series = shard.series[key] = _Series()
+        index = bucket_index(micros)
+        counts = series.counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        series.total += micros
+        series.count += 1
+
+    def time(self, name):
+        """Context manager timing a block into the ``name`` timer"""
+        return _Timer(self, ('timer', name))
+
+    def timed(self, name):
+        """Decorator timing every call into the ``name`` timer"""
+        key = ('timer', name)
+
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter_ns()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(key, (time.perf_counter_ns() - start) // 1000)
+            return wrapper
+        return decorator
+
+    # -- reads -------------------------------------------------------------
+
+    def histograms(self):
+        """``{key: Histogram}`` merged across threads"""
+        shards = self._scrape_shards()
+        merged = {}
+        for shard in shards:
+            for key, series in list(shard.series.items()):
+                histogram = merged.get(key)
+                if histogram is None:
+                    histogram = merged[key] = Histogram([], 0, 0)
+                counts = list(series.counts)
+                if len(counts) > len(histogram.counts):
+                    histogram.counts.extend([0] * (len(counts) - len(histogram.counts)))
+                for index, n in enumerate(counts):
+                    histogram.counts[index] += n
+                histogram.total += series.total
+                histogram.count += series.count
+        return merged
+
+    def statuses(self):
+        shards = self._scrape_shards()
+        merged = {}
+        for shard in shards:
+            for key, count in list(shard.statuses.items()):
+                merged[key] = merged.get(key, 0) + count
+        return merged
+
+    def in_flight(self):
+        shards = self._scrape_shards()
+        return sum(shard.started for shard in shards) - sum(shard.finished for shard in shards)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        worker = os.getpid()
+        lines = [
+            '# HELP teos_http_requests_total Requests by route, method and status.',
+            '# TYPE teos_http_requests_total counter'
+        ]
+        for (route, method, status), count in sorted(self.statuses().items()):
+            lines.append(f'teos_http_requests_total{{worker="{worker}",route="{_escape(route)}",'
+                         f'method="{_escape(method)}",status="{status}"}} {count}')
+        lines += [
+            '# HELP teos_http_requests_in_flight Requests started but not finished.',
+            '# TYPE teos_http_requests_in_flight gauge',
+            f'teos_http_requests_in_flight{{worker="{worker}"}} {self.in_flight()}'
+        ]
+        histograms = self.histograms()
+        sections = (
+            ('teos_http_request_duration_seconds', 'Request latency by route and method.', 'http',
+             lambda key: f'route="{_escape(key[1])}",method="{_escape(key[2])}"'),
+            ('teos_timer_duration_seconds', 'Latency of timed internal operations.', 'timer',
+             lambda key: f'name="{_escape(key[1])}"')
+        )
+        for name, help_text, kind, labels in sections:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for key in sorted(k for k in histograms if k[0] == kind):
+                histogram = histograms[key]
+                label = f'worker="{worker}",{labels(key)}'
+                cumulative = 0
+                index = 0
+                for bound in EXPORT_BOUNDS:
+                    limit = bound * 1e6
+                    while index < len(histogram.counts) and bucket_upper(index) <= limit:
+                        cumulative += histogram.counts[index]
+                        index += 1
+                    lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines += [
+                    f'{name}_bucket{{{label},le="+Inf"}} {histogram.count}',
+                    f'{name}_sum{{{label}}} {histogram.total / 1e6}',
+                    f'{name}_count{{{label}}} {histogram.count}'
+                ]
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _TimedBody:
+    # Response iterable that records the request once the server closes it
+    __slots__ = ('body', 'finish')
+
+    def __init__(self, body, finish):
+        self.body = body
+        self.finish = finish
+
+    def __iter__(self):
+        return iter(self.body)
+
+    def close(self):
+        try:
+            if hasattr(self.body, 'close'):
+                self.body.close()
+        finally:
+            self.finish()
+
+
+class MetricsMiddleware:
+    """Outermost WSGI layer: latency, status and in-flight per request"""
+
+    def __init__(self, wsgi_app, metrics):
+        self.wsgi_app = wsgi_app
+        self.metrics = metrics
+
+    def __call__(self, environ, start_response):
+        metrics = self.metrics
+        shard = metrics._shard()
+        shard.started += 1
+        start = time.perf_counter_ns()
+        status = ['500']
+
+        def timed_start_response(status_line, headers, exc_info=None):
+            status[0] = status_line[:3]
+            if exc_info is None:
+                return start_response(status_line, headers)
+            return start_response(status_line, headers, exc_info)
+
+        def finish():
+            micros = (time.perf_counter_ns() - start) // 1000
+            # The body may be closed on another thread; record into that one's shard
+            current = metrics._shard()
+            route = environ.get(ROUTE_KEY) or UNMATCHED
+            method = environ.get('REQUEST_METHOD')
+            metrics.record(('http', route, method), micros, current)
+            key = (route, method, status[0])
+            current.statuses[key] = current.statuses.get(key, 0) + 1
+            current.finished += 1
+
+        try:
+            body = self.wsgi_app(environ, timed_start_response)
+        except BaseException:
+            finish()
+            raise
+        if isinstance(body, list) or type(body) is environ.get('wsgi.file_wrapper'):
+            # Nothing left to produce (or a file the server sends itself)
+            finish()
+            return body
+        return _TimedBody(body, finish)
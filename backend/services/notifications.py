@@ -0,0 +1,260 @@
+"""
+Per-user notification inboxes with live delivery.
+
+Each user has a bounded inbox (oldest notifications fall off) with
+sequential ids, so clients page with "since id X" and a read cursor marks
+everything up to an id as read.  A notification published with a ``key``
+while an unread one with the same key is still in the inbox within the
+coalescing window updates that entry (bumping its ``count``) instead of
+adding another.  The number of inboxes is capped too; the least recently
+active one is dropped first, so memory is bounded by
+``max_inboxes * capacity`` notifications.
+
+Live delivery is a Server-Sent Events endpoint served by a small aiohttp
+server on its own event loop: an open stream is a coroutine waiting on a
+future, not a thread, so one process can hold tens of thousands of them.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from aiohttp import web
+
+
+class _Inbox:
+    __slots__ = ('items', 'next_id', 'read_id', 'keys')
+
+    def __init__(self, capacity):
+        self.items = deque(maxlen=capacity)
+        self.next_id = 1
+        self.read_id = 0
+        self.keys = {}
+
+
+class NotificationCenter:
+    def __init__(self, capacity=100, max_inboxes=100000, coalesce_window=300.0):
+        self.capacity = capacity
+        self.max_inboxes = max_inboxes
+        self.coalesce_window = coalesce_window
+        self.loop = None
+        self._inboxes = OrderedDict()
+        self._waiters = {}
+        self._pending_wakes = set()
+        self._wake_scheduled = False
+        self._lock = threading.Lock()
+        self.stats = {'published': 0, 'coalesced': 0, 'dropped': 0, 'evicted_inboxes': 0}
+
+    def _inbox(self, user_id, create=False):
+        inbox = self._inboxes.get(user_id)
+        if inbox is None:
+            if not create:
+                return None
+            inbox = self._inboxes[user_id] = _Inbox(self.capacity)
+            if len(self._inboxes) > self.max_inboxes:
+                self._inboxes.popitem(last=False)
+                self.stats['evicted_inboxes'] += 1
+        else:
+            self._inboxes.move_to_end(user_id)
+        return inbox
+
+    def publish(self, user_id, type, data, key=None):
+        """Add a notification (or coalesce it into an unread one with the same key)"""
+        now = time.time()
+        with self._lock:
+            inbox = self._inbox(user_id, create=True)
+            notification = inbox.keys.get(key) if key is not None else None
+            if (notification is not None and notification['id'] > inbox.read_id
+                    and now - notification['created_at'] <= self.coalesce_window):
+                # Move it to the head with a new id so cursors see the update
+                inbox.items.remove(notification)
+                notification['count'] += 1
+                notification['data'] = data
+                notification['updated_at'] = now
+                self.stats['coalesced'] += 1
+            else:
+                notification = {
+                    'type': type,
+                    'data': data,
+                    'key': key,
+                    'count': 1,
+                    'created_at': now,
+                    'updated_at': now
+                }
+                if len(inbox.items) == inbox.items.maxlen:
+                    oldest = inbox.items[0]
+                    if inbox.keys.get(oldest['key']) is oldest:
+                        del inbox.keys[oldest['key']]
+                    self.stats['dropped'] += 1
+                if key is not None:
+                    inbox.keys[key] = notification
+            notification['id'] = inbox.next_id
+            inbox.next_id += 1
+            inbox.items.append(notification)
+            self.stats['published'] += 1
+            result = dict(notification)
+            # Wake-ups are batched into one loop callback per burst. Always
+            # hop to the loop: checking for subscribers from this thread
+            # could race with a stream that is about to wait.
+            schedule = self.loop is not None and not self._wake_scheduled
+            if self.loop is not None:
+                self._pending_wakes.add(user_id)
+                self._wake_scheduled = True
+        if schedule:
+            self.loop.call_soon_threadsafe(self._wake_pending)
+        return result
+
+    def since(self, user_id, after_id=0, limit=50, unread_only=False):
+        with self._lock:
+            inbox = self._inbox(user_id)
+            if inbox is None:
+                return []
+            if unread_only:
+                after_id = max(after_id, inbox.read_id)
+            # Ids increase along the deque, so walk back from the newest
+            newer = []
+            for notification in reversed(inbox.items):
+                if notification['id'] <= after_id:
+                    break
+                newer.append(notification)
+            return [dict(notification) for notification in reversed(newer[-limit:])] if newer else []
+
+    def last_id(self, user_id):
+        inbox = self._inboxes.get(user_id)
+        return inbox.next_id - 1 if inbox is not None else 0
+
+    def unread_count(self, user_id):
+        with self._lock:
+            inbox = self._inboxes.get(user_id)
+            if inbox is None:
+                return 0
+            return sum(1 for notification in inbox.items if notification['id'] > inbox.read_id)
+
+    def mark_read(self, user_id, up_to=None):
+        """Move the read cursor (to the newest notification by default)"""
+        with self._lock:
+            inbox = self._inboxes.get(user_id)
+            if inbox is None:
+                return 0
+            newest = inbox.next_id - 1
+            inbox.read_id = max(inbox.read_id, min(newest if up_to is None else up_to, newest))
+            return inbox.read_id
+
+    def memory_stats(self):
+        with self._lock:
+            return {
+                'inboxes': len(self._inboxes),
+                'notifications': sum(len(inbox.items) for inbox in self._inboxes.values()),
+                'max_notifications': self.max_inboxes * self.capacity
+            }
+
+    # -- event-loop side ---------------------------------------------------
+
+    def _wake_pending(self):
+        with self._lock:
+            users, self._pending_wakes = self._pending_wakes, set()
+            self._wake_scheduled = False
+        for user_id in users:
+            for future in self._waiters.pop(user_id, ()):
+                if not future.done():
+                    future.set_result(None)
+
+    async def wait(self, user_id, after_id, timeout):
+        """Wait on ``self.loop`` until the user has something newer than ``after_id``"""
+        if self.last_id(user_id) > after_id:
+            return True
+        future = self.loop.create_future()
+        self._waiters.setdefault(user_id, set()).add(future)
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            waiters = self._waiters.get(user_id)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del self._waiters[user_id]
+
+    @property
+    def subscribers(self):
+        return sum(len(waiters) for waiters in list(self._waiters.values()))
+
+
+class NotificationStreamServer:
+    """``GET /api/notifications/<user_id>/stream`` as Server-Sent Events"""
+
+    def __init__(self, center, host='127.0.0.1', port=5001, keepalive=15.0, reuse_port=False):
+        self.center = center
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.reuse_port = reuse_port
+        self.streams = 0
+        self._runner = None
+        self._started_pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the server on its own event-loop thread (once per process)"""
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='notification-streams', daemon=True).start()
+            asyncio.run_coroutine_threadsafe(self._serve(), loop).result()
+            self.center.loop = loop
+            self._started_pid = pid
+
+    async def _serve(self):
+        app = web.Application()
+        app.router.add_get('/api/notifications/{user_id}/stream', self.stream)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port, backlog=4096, reuse_port=self.reuse_port).start()
+
+    def stop(self):
+        if self._started_pid is None:
+            return
+        loop = self.center.loop
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self.center.loop = None
+        self._started_pid = None
+
+    async def stream(self, request):
+        user_id = request.match_info['user_id']
+        cursor = request.headers.get('Last-Event-ID') or request.query.get('since')
+        cursor = int(cursor) if cursor and cursor.isdigit() else self.center.last_id(user_id)
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+            'Access-Control-Allow-Origin': '*'
+        })
+        await response.prepare(request)
+        self.streams += 1
+        try:
+            await response.write(b'retry: 3000\n\n')
+            while True:
+                notifications = self.center.since(user_id, cursor, limit=100)
+                if notifications:
+                    cursor = notifications[-1]['id']
+                    await response.write(b''.join(
+                        f"id: {notification['id']}\nevent: notification\ndata: {json.dumps(notification)}\n\n".encode('utf-8')
+                        for notification in notifications
+                    ))
+                elif not await self.center.wait(user_id, cursor, self.keepalive):
+                    await response.write(b': keep-alive\n\n')
+        except ConnectionResetError:
+            pass
+        finally:
+            self.streams -= 1
+        return response
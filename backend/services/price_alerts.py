@@ -0,0 +1,204 @@
+"""
+Price-alert matching.
+
+Alerts are one-shot: an "above" alert fires the first time the price
+reaches its target from below, a "below" alert the first time it falls to
+its target.  Per currency, each side keeps its pending targets in a sorted
+array ordered so that the alerts nearest to firing sit at the tail.  Every
+pending alert is still uncrossed, so on a tick the crossed alerts are
+exactly one tail slice, found by a single bisect and removed with a tail
+delete: O(log n + k) per tick for k matches, however many alerts exist.
+"""
+
+import bisect
+import itertools
+import queue
+import threading
+import time
+
+DIRECTIONS = ('above', 'below')
+
+
+class Alert:
+    __slots__ = ('alert_id', 'user_id', 'currency', 'target_price', 'direction', 'created_at')
+
+    def __init__(self, alert_id, user_id, currency, target_price, direction, created_at):
+        self.alert_id = alert_id
+        self.user_id = user_id
+        self.currency = currency
+        self.target_price = target_price
+        self.direction = direction
+        self.created_at = created_at
+
+    def to_dict(self):
+        return {
+            'alert_id': self.alert_id,
+            'user_id': self.user_id,
+            'currency': self.currency,
+            'target_price': self.target_price,
+            'direction': self.direction,
+            'created_at': self.created_at
+        }
+
+
+class _Side:
+    """Parallel sorted arrays of keys and alert ids; matches are a tail slice"""
+
+    __slots__ = ('keys', 'ids', 'sign')
+
+    def __init__(self, sign):
+        # "above" stores -target so the lowest targets (closest to firing on
+        # a rise) are at the tail; "below" stores target as-is
+        self.sign = sign
+        self.keys = []
+        self.ids = []
+
+    def insert(self, target, alert_id):
+        key = self.sign * target
+        index = bisect.bisect_left(self.keys, key)
+        self.keys.insert(index, key)
+        self.ids.insert(index, alert_id)
+
+    def pop_crossed(self, price):
+        index = bisect.bisect_left(self.keys, self.sign * price)
+        if index == len(self.keys):
+            return ()
+        crossed = self.ids[index:]
+        del self.keys[index:]
+        del self.ids[index:]
+        return crossed
+
+    def load(self, entries):
+        """Merge ``(target, alert_id)`` entries in with one sort"""
+        entries = list(zip(self.keys, self.ids)) + [(self.sign * target, alert_id) for target, alert_id in entries]
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.ids = [alert_id for _, alert_id in entries]
+
+    def compact(self, live):
+        kept = [(key, alert_id) for key, alert_id in zip(self.keys, self.ids) if alert_id in live]
+        self.keys = [key for key, _ in kept]
+        self.ids = [alert_id for _, alert_id in kept]
+
+
+class _Book:
+    __slots__ = ('above', 'below', 'last_price')
+
+    def __init__(self):
+        self.above = _Side(-1)
+        self.below = _Side(1)
+        self.last_price = None
+
+
+class PriceAlertEngine:
+    """Matches price ticks against registered alerts.
+
+    Matches are handed to ``notify(matches)`` (a list of dicts) outside the
+    engine lock; without one they are put on the ``triggered`` queue.
+    """
+
+    def __init__(self, notify=None, compact_ratio=0.5):
+        self.notify = notify
+        self.triggered = queue.SimpleQueue()
+        self.compact_ratio = compact_ratio
+        self.alerts = {}
+        self._books = {}
+        self._cancelled = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.stats = {'ticks': 0, 'triggered': 0, 'cancelled': 0}
+
+    def __len__(self):
+        return len(self.alerts)
+
+    def _book(self, currency):
+        book = self._books.get(currency)
+        if book is None:
+            book = self._books[currency] = _Book()
+        return book
+
+    def _direction(self, book, target_price, direction, current_price):
+        if direction is not None:
+            if direction not in DIRECTIONS:
+                raise ValueError(f'direction must be one of {DIRECTIONS}')
+            return direction
+        if current_price is None:
+            current_price = book.last_price
+        if current_price is None:
+            raise ValueError('No current price to infer the alert direction from')
+        return 'above' if target_price > current_price else 'below'
+
+    def add(self, user_id, currency, target_price, direction=None, current_price=None):
+        """Register an alert; the direction defaults to the side of the current price"""
+        target_price = float(target_price)
+        with self._lock:
+            book = self._book(currency)
+            direction = self._direction(book, target_price, direction, current_price)
+            alert = Alert(next(self._ids), user_id, currency, target_price, direction, time.time())
+            self.alerts[alert.alert_id] = alert
+            getattr(book, direction).insert(target_price, alert.alert_id)
+        return alert
+
+    def bulk_load(self, alerts):
+        """Register many ``(user_id, currency, target_price, direction)`` alerts with one sort per side"""
+        created_at = time.time()
+        entries = {}
+        with self._lock:
+            for user_id, currency, target_price, direction in alerts:
+                if direction not in DIRECTIONS:
+                    raise ValueError(f'direction must be one of {DIRECTIONS}')
+                alert = Alert(next(self._ids), user_id, currency, float(target_price), direction, created_at)
+                self.alerts[alert.alert_id] = alert
+                entries.setdefault((currency, direction), []).append((alert.target_price, alert.alert_id))
+            for (currency, direction), side_entries in entries.items():
+                getattr(self._book(currency), direction).load(side_entries)
+        return len(self.alerts)
+
+    def get(self, alert_id):
+        return self.alerts.get(alert_id)
+
+    def cancel(self, alert_id):
+        """Drop an alert; its slot in the sorted arrays is skipped and compacted later"""
+        with self._lock:
+            alert = self.alerts.pop(alert_id, None)
+            if alert is None:
+                return None
+            self.stats['cancelled'] += 1
+            key = (alert.currency, alert.direction)
+            self._cancelled[key] = self._cancelled.get(key, 0) + 1
+            side = getattr(self._books[alert.currency], alert.direction)
+            if self._cancelled[key] > len(side.ids) * self.compact_ratio:
+                side.compact(self.alerts)
+                self._cancelled[key] = 0
+        return alert
+
+    def on_price(self, currency, price):
+        """Apply a price tick; returns the alerts it triggered"""
+        matches = []
+        with self._lock:
+            self.stats['ticks'] += 1
+            book = self._book(currency)
+            book.last_price = price
+            now = time.time()
+            for direction in DIRECTIONS:
+                cancelled = 0
+                for alert_id in getattr(book, direction).pop_crossed(price):
+                    alert = self.alerts.pop(alert_id, None)
+                    if alert is None:
+                        cancelled += 1
+                        continue
+                    match = alert.to_dict()
+                    match['price'] = price
+                    match['triggered_at'] = now
+                    matches.append(match)
+                if cancelled:
+                    # Their slots are gone, so they no longer count towards compaction
+                    key = (currency, direction)
+                    self._cancelled[key] = max(0, self._cancelled.get(key, 0) - cancelled)
+            self.stats['triggered'] += len(matches)
+        if matches:
+            if self.notify is not None:
+                self.notify(matches)
+            else:
+                self.triggered.put(matches)
+        return matches
@@ -0,0 +1,185 @@
+"""
+Background-refreshed price cache.
+
+Each symbol has its own refresher thread that re-fetches shortly before the
+entry expires, so request handlers normally read a fresh in-memory value.
+When an entry has expired but is still within ``stale_ttl`` it is served
+immediately and a revalidation is kicked off; only a cold or badly stale
+symbol makes the caller wait.  All upstream fetches for a symbol go
+through a single-flight slot, so a burst of requests costs one fetch.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+
+
+class StaticPriceSource:
+    """Fixed prices; used when no upstream feed is configured"""
+
+    def __init__(self, prices):
+        self.prices = dict(prices)
+
+    def __call__(self, symbol):
+        return self.prices[symbol]
+
+
+class HttpPriceSource:
+    """Fetches ``GET {base_url}/price/<symbol>`` -> ``{"price": <float>}``"""
+
+    def __init__(self, base_url, timeout=2.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def __call__(self, symbol):
+        response = self.session.get(f'{self.base_url}/price/{symbol}', timeout=self.timeout)
+        response.raise_for_status()
+        return float(response.json()['price'])
+
+
+class _Entry:
+    __slots__ = ('price', 'fetched_at')
+
+    def __init__(self, price, fetched_at):
+        self.price = price
+        self.fetched_at = fetched_at
+
+
+class PriceCache:
+    """TTL cache in front of a ``fetch(symbol) -> price`` callable.
+
+    ``on_update(symbol, price)`` is called after every successful fetch.
+    """
+
+    def __init__(self, fetch, symbols, ttl=10.0, stale_ttl=300.0, refresh_ahead=0.8, autostart=True,
+                 clock=time.monotonic, on_update=None):
+        self.fetch = fetch
+        self.on_update = on_update
+        self.symbols = list(symbols)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_ahead = refresh_ahead
+        self.autostart = autostart
+        self.clock = clock
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refreshers = []
+        self._started_pid = None
+        self._counters = {'hits': 0, 'misses': 0, 'stale': 0, 'fetches': 0, 'errors': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _fetch_single_flight(self, symbol):
+        """Return a Future for the symbol's upstream fetch, starting one if needed"""
+        with self._lock:
+            future = self._inflight.get(symbol)
+            if future is not None:
+                return future, False
+            future = self._inflight[symbol] = Future()
+            self._counters['fetches'] += 1
+        return future, True
+
+    def _run_fetch(self, symbol, future):
+        try:
+            price = self.fetch(symbol)
+        except Exception as e:
+            self._count('errors')
+            with self._lock:
+                del self._inflight[symbol]
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._entries[symbol] = _Entry(price, self.clock())
+            del self._inflight[symbol]
+        future.set_result(price)
+        if self.on_update is not None:
+            try:
+                self.on_update(symbol, price)
+            except Exception:
+                pass  # A broken listener must not stop the refresher
+
+    def refresh(self, symbol):
+        """Fetch ``symbol`` now (coalesced with any fetch already in flight)"""
+        future, owner = self._fetch_single_flight(symbol)
+        if owner:
+            self._run_fetch(symbol, future)
+        return future.result()
+
+    def _revalidate(self, symbol):
+        future, owner = self._fetch_single_flight(symbol)
+        if owner:
+            threading.Thread(target=self._run_fetch, args=(symbol, future), daemon=True).start()
+
+    def get(self, symbol):
+        if self.autostart:
+            self.start()
+        entry = self._entries.get(symbol)
+        if entry is not None:
+            age = self.clock() - entry.fetched_at
+            if age < self.ttl:
+                self._count('hits')
+                return entry.price
+            if age < self.stale_ttl:
+                self._count('stale')
+                self._revalidate(symbol)
+                return entry.price
+        self._count('misses')
+        return self.refresh(symbol)
+
+    def get_all(self):
+        return {symbol: self.get(symbol) for symbol in self.symbols}
+
+    def _refresh_loop(self, symbol):
+        while not self._stop.is_set():
+            entry = self._entries.get(symbol)
+            if entry is None:
+                delay = 0
+            else:
+                delay = entry.fetched_at + self.ttl * self.refresh_ahead - self.clock()
+            if delay > 0 and self._stop.wait(delay):
+                return
+            try:
+                self.refresh(symbol)
+            except Exception:
+                # Keep serving the previous value; retry after a short pause
+                if self._stop.wait(min(self.ttl, 1.0)):
+                    return
+
+    def start(self):
+        """Start one refresher thread per symbol (once per process)"""
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            self._started_pid = pid
+            self._stop.clear()
+            self._refreshers = [
+                threading.Thread(target=self._refresh_loop, args=(symbol,), name=f'price-refresh-{symbol}', daemon=True)
+                for symbol in self.symbols
+            ]
+        for thread in self._refreshers:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._refreshers:
+            thread.join()
+        self._started_pid = None
+
+    def stats(self):
+        now = self.clock()
+        with self._lock:
+            stats = dict(self._counters)
+            stats['age'] = {symbol: now - entry.fetched_at for symbol, entry in self._entries.items()}
+        stats['ttl'] = self.ttl
+        return stats
@@ -0,0 +1,134 @@
+"""
+QR codes for receive addresses.
+
+An address's QR never changes, so rendered images are kept in a
+byte-bounded LRU keyed by ``(address, size, format)`` and served with a
+strong ETag derived from the key.  Cache misses render on a small thread
+pool: a burst of new wallets queues there instead of tying up request
+threads with CPU work, and concurrent requests for the same key share one
+render.
+
+The module matrix is cached per address (mask selection dominates a cold
+render), and every size and format is drawn from it: PNGs as one 1-bit
+image scaled with nearest-neighbour instead of drawing each module, SVGs as
+a single path.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import qrcode
+from PIL import Image
+
+from services.media import ByteLRU
+
+FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+RENDER_VERSION = 1  # Bump when output changes, so clients don't keep stale ETags
+BORDER = 4
+
+
+@lru_cache(maxsize=4096)
+def qr_matrix(data):
+    # Mask selection is most of the cost, so the matrix is shared by every
+    # size and format of an address
+    code = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, border=BORDER)
+    code.add_data(data)
+    code.make(fit=True)
+    return np.array(code.get_matrix(), dtype=bool)
+
+
+def render_png(matrix, size):
+    box = max(1, size // len(matrix))
+    pixels = np.where(matrix, 0, 255).astype(np.uint8)
+    image = Image.fromarray(pixels, 'L').resize((len(matrix) * box,) * 2, Image.NEAREST).convert('1')
+    out = io.BytesIO()
+    image.save(out, 'PNG')
+    return out.getvalue()
+
+
+def render_svg(matrix, size):
+    rows, columns = np.nonzero(matrix)
+    path = ''.join(f'M{x} {y}h1v1h-1z' for y, x in zip(rows.tolist(), columns.tolist()))
+    n = len(matrix)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" viewBox="0 0 {n} {n}" '
+            f'shape-rendering="crispEdges"><rect width="{n}" height="{n}" fill="#fff"/>'
+            f'<path d="{path}" fill="#000"/></svg>').encode('ascii')
+
+
+class QrRenderer:
+    def __init__(self, workers=2, cache_bytes=16 * 2 ** 20, min_size=64, max_size=1024):
+        self.workers = workers
+        self.min_size = min_size
+        self.max_size = max_size
+        self.cache = ByteLRU(cache_bytes)
+        self.pool = None
+        self._pending = {}
+        self._started_pid = None
+        self._lock = threading.Lock()
+        self.stats = {'renders': 0, 'shared_renders': 0}
+
+    def start(self):
+        """Start the render pool (once per process)"""
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix='qr')
+            self._pending = {}
+            self._started_pid = pid
+
+    def stop(self):
+        if self._started_pid is not None:
+            self.pool.shutdown(wait=True)
+            self._started_pid = None
+
+    def etag(self, address, size, image_format):
+        key = f'{RENDER_VERSION}:{image_format}:{size}:{address}'.encode('utf-8')
+        return hashlib.sha256(key).hexdigest()[:32]
+
+    def get(self, address, size=256, image_format='png', timeout=10):
+        """Rendered bytes for ``address``; raises ValueError for a bad size or format"""
+        if image_format not in FORMATS:
+            raise ValueError(f'format must be one of {sorted(FORMATS)}')
+        if not self.min_size <= size <= self.max_size:
+            raise ValueError(f'size must be between {self.min_size} and {self.max_size}')
+        key = (address, size, image_format)
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+        self.start()
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = self.pool.submit(self._render, key)
+            else:
+                self.stats['shared_renders'] += 1
+        return future.result(timeout)
+
+    def _render(self, key):
+        address, size, image_format = key
+        try:
+            matrix = qr_matrix(address)
+            data = render_png(matrix, size) if image_format == 'png' else render_svg(matrix, size)
+            self.cache.put(key, data)
+            self.stats['renders'] += 1
+            return data
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def performance(self):
+        return {
+            'cache_entries': len(self.cache),
+            'cache_bytes': self.cache.bytes,
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            **self.stats
+        }
@@ -0,0 +1,263 @@
+"""
+Token-bucket admission control.
+
+Every request draws a token from two buckets: one for its client and route,
+and one for the client across all routes.  A client that empties either
+bucket gets a 429 with ``Retry-After`` before the request reaches Flask, so
+one noisy caller can't starve the workers.  Limits are ``(rate, burst)``
+pairs: ``burst`` tokens at most, refilled at ``rate`` per second.
+
+Buckets are refilled lazily, when they are next drawn from, so an idle
+bucket costs nothing.  A bucket that would have refilled completely is the
+same as a new one, and is dropped by a periodic sweep of its shard.  The
+in-process table (``LocalBuckets``) splits buckets over shards with a lock
+each, so concurrent requests rarely contend.
+
+Each worker process has its own ``LocalBuckets``, so with N workers a
+client gets about N times the configured rate.  ``RedisBuckets`` keeps the
+buckets in Redis instead (one round trip per bucket, in a Lua script), to
+share them across workers and hosts.  ``FakeRedis`` runs the same algorithm
+in process, so tests and benchmarks can exercise ``RedisBuckets`` without a
+server.  If the shared backend fails, requests are admitted and
+``backend_errors`` is counted.
+"""
+
+import json
+import math
+import re
+import threading
+import time
+
+from services.metrics import ROUTE_KEY
+
+SHARDS = 64
+SWEEP_INTERVAL = 10.0
+
+
+class _Shard:
+    __slots__ = ('buckets', 'lock', 'next_sweep')
+
+    def __init__(self):
+        self.buckets = {}  # key -> [tokens, last refill, time the bucket is full again]
+        self.lock = threading.Lock()
+        self.next_sweep = 0.0
+
+
+class LocalBuckets:
+    """Sharded in-process bucket table"""
+
+    def __init__(self, shards=SHARDS, sweep_interval=SWEEP_INTERVAL, clock=time.monotonic):
+        self._shards = [_Shard() for _ in range(shards)]
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self.evicted = 0
+
+    def __len__(self):
+        return sum(len(shard.buckets) for shard in self._shards)
+
+    def acquire(self, key, rate, burst, cost=1):
+        """Take ``cost`` tokens; returns ``(admitted, seconds until it would be)``"""
+        now = self.clock()
+        shard = self._shards[hash(key) % len(self._shards)]
+        with shard.lock:
+            if now >= shard.next_sweep:
+                self._sweep(shard, now)
+            bucket = shard.buckets.get(key)
+            if bucket is None:
+                tokens = burst
+            else:
+                tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            if tokens >= cost:
+                tokens -= cost
+                shard.buckets[key] = [tokens, now, now + (burst - tokens) / rate]
+                return True, 0.0
+            shard.buckets[key] = [tokens, now, now + (burst - tokens) / rate]
+            return False, (cost - tokens) / rate
+
+    def _sweep(self, shard, now):
+        idle = [key for key, bucket in shard.buckets.items() if bucket[2] <= now]
+        for key in idle:
+            del shard.buckets[key]
+        self.evicted += len(idle)
+        shard.next_sweep = now + self.sweep_interval
+
+
+# KEYS[1]: bucket hash; ARGV: rate, burst, cost.  Uses the server clock, so
+# workers on different hosts agree; the key expires once the bucket is full.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = burst
+if bucket[1] then
+    tokens = math.min(burst, tonumber(bucket[1]) + (now - tonumber(bucket[2])) * rate)
+end
+local admitted = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    admitted = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1000)
+return {admitted, tostring(wait)}
+"""
+
+
+class RedisBuckets:
+    """Buckets shared by every worker through Redis (``redis-py`` client)"""
+
+    def __init__(self, client, prefix='teos:ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_LUA)
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis  # Only needed for shared buckets
+        return cls(redis.Redis.from_url(url, socket_timeout=0.05), **kwargs)
+
+    def acquire(self, key, rate, burst, cost=1):
+        admitted, wait = self._script(keys=[self.prefix + json.dumps(key)], args=[rate, burst, cost])
+        return bool(admitted), float(wait)
+
+
+class FakeRedis:
+    """In-process stand-in for the Redis client used by ``RedisBuckets``.
+
+    Supports only ``register_script(TOKEN_BUCKET_LUA)``, running the same
+    algorithm as the script (keys included, so several ``RedisBuckets`` on
+    one fake share buckets the way workers on one server would).
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.data = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def register_script(self, script):
+        if script != TOKEN_BUCKET_LUA:
+            raise NotImplementedError('FakeRedis only runs the token bucket script')
+        return self._token_bucket
+
+    def _token_bucket(self, keys, args):
+        rate, burst, cost = (float(arg) for arg in args)
+        with self._lock:
+            self.calls += 1
+            now = self.clock()
+            bucket = self.data.get(keys[0])
+            if bucket is not None and bucket[2] <= now:
+                bucket = None  # Expired
+            tokens = burst if bucket is None else min(burst, bucket[0] + (now - bucket[1]) * rate)
+            admitted, wait = 0, 0.0
+            if tokens >= cost:
+                tokens -= cost
+                admitted = 1
+            else:
+                wait = (cost - tokens) / rate
+            self.data[keys[0]] = (tokens, now, now + (math.ceil((burst - tokens) / rate * 1000) + 1000) / 1000)
+            return [admitted, repr(wait)]
+
+
+def _route_pattern(path):
+    # Flask-style placeholders match one path segment
+    return re.compile('^' + re.sub(r'<[^>]+>', '[^/]+', re.escape(path)) + '$')
+
+
+class AdmissionControl:
+    """WSGI middleware applying per-client and per-client-per-route limits.
+
+    ``routes`` maps ``'METHOD /path'`` (Flask-style ``<placeholders>``
+    allowed) to a limit; requests to other routes share the ``default``
+    route bucket.  ``client`` limits a client across all routes.  Clients
+    are identified by address, taken from ``X-Forwarded-For`` when
+    ``trusted_proxies`` proxies sit in front of the app.
+    """
+
+    def __init__(self, wsgi_app, client=(20, 40), default=(10, 20), routes=None, backend=None,
+                 trusted_proxies=0, exempt=('/health', '/metrics')):
+        self.wsgi_app = wsgi_app
+        self.client = client
+        self.default = default
+        self.backend = backend if backend is not None else LocalBuckets()
+        self.trusted_proxies = trusted_proxies
+        self.exempt = frozenset(exempt)
+        self._exact = {}
+        self._patterns = []
+        for rule, limit in (routes or {}).items():
+            method, path = rule.split(' ', 1)
+            if '<' in path:
+                self._patterns.append((method, _route_pattern(path), rule, limit))
+            else:
+                self._exact[(method, path)] = (rule, limit)
+        self.stats = {'admitted': 0, 'rejected': 0, 'backend_errors': 0}
+
+    def client_id(self, environ):
+        if self.trusted_proxies:
+            forwarded = environ.get('HTTP_X_FORWARDED_FOR')
+            if forwarded:
+                hops = forwarded.split(',')
+                if len(hops) >= self.trusted_proxies:
+                    return hops[-self.trusted_proxies].strip()
+        return environ.get('REMOTE_ADDR', '')
+
+    def route(self, method, path):
+        """``(rule, limit)`` for a request; the default bucket if no rule matches"""
+        match = self._exact.get((method, path))
+        if match is not None:
+            return match
+        for rule_method, pattern, rule, limit in self._patterns:
+            if rule_method == method and pattern.match(path):
+                return rule, limit
+        return None, self.default
+
+    def admit(self, client, method, path):
+        """``(admitted, retry_after)`` for one request"""
+        rule, (rate, burst) = self.route(method, path)
+        try:
+            admitted, wait = self.backend.acquire((client, rule), rate, burst)
+            if admitted:
+                rate, burst = self.client
+                admitted, wait = self.backend.acquire((client,), rate, burst)
+        except Exception:
+            # Fail open: a broken shared backend must not take the API down
+            self.stats['backend_errors'] += 1
+            return True, 0.0
+        return admitted, wait
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path in self.exempt or environ['REQUEST_METHOD'] == 'OPTIONS':
+            return self.wsgi_app(environ, start_response)
+        admitted, wait = self.admit(self.client_id(environ), environ['REQUEST_METHOD'], path)
+        if admitted:
+            self.stats['admitted'] += 1
+            return self.wsgi_app(environ, start_response)
+        self.stats['rejected'] += 1
+        rule = self.route(environ['REQUEST_METHOD'], path)[0]
+        if rule is not None:
+            environ[ROUTE_KEY] = rule.split(' ', 1)[1]
+        body = b'{"error":"Too many requests"}\n'
+        headers = [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(body))),
+            ('Retry-After', str(max(1, math.ceil(wait))))
+        ]
+        if 'HTTP_ORIGIN' in environ:
+            # Same as the app's CORS headers, so browsers can read the 429
+            headers += [('Access-Control-Allow-Origin', environ['HTTP_ORIGIN']), ('Vary', 'Origin')]
+        start_response('429 TOO MANY REQUESTS', headers)
+        return [body]
+
+    def performance(self):
+        stats = dict(self.stats)
+        if isinstance(self.backend, LocalBuckets):
+            stats['buckets'] = len(self.backend)
+            stats['evicted'] = self.backend.evicted
+        return stats
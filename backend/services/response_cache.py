@@ -0,0 +1,184 @@
+"""
+Pre-serialized responses for endpoints whose payload rarely changes.
+
+A cached view runs once per version of its data: the JSON body it returns
+is kept as bytes, together with a gzipped copy, a strong ETag for each and
+the finished header lists.  Whoever changes the underlying data calls
+``invalidate(name)`` and the next request rebuilds the entry (one build per
+version, however many requests race for it).  Error responses are passed
+through and never cached.
+
+``middleware`` answers requests for built entries in front of Flask, so a
+poll costs a dict lookup and an ETag comparison instead of a request
+context, routing and the view; a matching ``If-None-Match`` gets a 304.
+Requests with an ``Origin`` header (browsers) still go through Flask for
+its CORS headers, and are answered from the same bytes there.
+"""
+
+import functools
+import gzip
+import hashlib
+import threading
+import time
+
+from flask import Response, request
+from werkzeug.http import parse_accept_header, parse_etags
+
+from services.metrics import ROUTE_KEY
+
+GZIP_MIN_BYTES = 256
+
+
+# Clients send the same few header values over and over, so parses are memoized
+
+@functools.lru_cache(maxsize=256)
+def _gzip_accepted(accept):
+    return parse_accept_header(accept)['gzip'] > 0
+
+
+@functools.lru_cache(maxsize=1024)
+def _etags(if_none_match):
+    return parse_etags(if_none_match)
+
+
+def _accepts_gzip(environ):
+    accept = environ.get('HTTP_ACCEPT_ENCODING')
+    return accept is not None and _gzip_accepted(accept)
+
+
+class _Variant:
+    __slots__ = ('body', 'etag', 'headers', 'not_modified_headers')
+
+    def __init__(self, body, etag, headers, validators):
+        self.body = body
+        self.etag = etag
+        self.not_modified_headers = validators
+        self.headers = headers + validators + [('Content-Length', str(len(body)))]
+
+
+class _Entry:
+    __slots__ = ('mimetype', 'cache_control', 'plain', 'gzipped', 'built_at')
+
+    def __init__(self, body, mimetype, content_type, cache_control):
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        self.gzipped = None
+        # Origin too: browsers get CORS headers that the fast path leaves out
+        vary = [('Vary', 'Origin')]
+        if len(body) >= GZIP_MIN_BYTES:
+            vary = [('Vary', 'Origin, Accept-Encoding')]
+            # A different representation needs a different strong ETag
+            self.gzipped = _Variant(gzip.compress(body, 6, mtime=0), etag + '-gz',
+                                    [('Content-Type', content_type), ('Content-Encoding', 'gzip')],
+                                    [('ETag', f'"{etag}-gz"'), ('Cache-Control', cache_control)] + vary)
+        self.plain = _Variant(body, etag, [('Content-Type', content_type)],
+                              [('ETag', f'"{etag}"'), ('Cache-Control', cache_control)] + vary)
+        self.built_at = time.time()
+
+    def variant(self, environ):
+        if self.gzipped is not None and _accepts_gzip(environ):
+            return self.gzipped
+        return self.plain
+
+
+class ResponseCache:
+    def __init__(self):
+        self._entries = {}
+        self._paths = {}  # request path -> entry name, learned on the first build
+        self._build_locks = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'not_modified': 0, 'builds': 0, 'invalidations': 0}
+
+    def cached(self, name, max_age=0):
+        """Decorate a view whose successful responses are served from the cache.
+
+        ``max_age`` is how long clients may reuse a response without asking;
+        with the default of 0 they revalidate every time (and mostly get 304s).
+        """
+        cache_control = f'public, max-age={max_age}' if max_age else 'no-cache'
+
+        def decorator(view):
+            with self._lock:
+                self._build_locks[name] = threading.Lock()
+
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                entry = self._entries.get(name)
+                if entry is None:
+                    with self._build_locks[name]:
+                        entry = self._entries.get(name)
+                        if entry is None:
+                            response = view(*args, **kwargs)
+                            entry = self._store(name, response, cache_control)
+                            if entry is None:
+                                return response
+                else:
+                    self.stats['hits'] += 1
+                return self._respond(entry)
+            return wrapper
+        return decorator
+
+    def _store(self, name, response, cache_control):
+        if isinstance(response, tuple) or response.status_code != 200:
+            return None
+        entry = _Entry(response.get_data(), response.mimetype, response.content_type, cache_control)
+        with self._lock:
+            self._entries[name] = entry
+            if not request.view_args:
+                self._paths[request.path] = name
+            self.stats['builds'] += 1
+        return entry
+
+    def _respond(self, entry):
+        variant = entry.variant(request.environ)
+        if request.if_none_match.contains_weak(variant.etag):
+            self.stats['not_modified'] += 1
+            response = Response(status=304)
+        else:
+            response = Response(variant.body, mimetype=entry.mimetype)
+            if variant is entry.gzipped:
+                response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(variant.etag)
+        response.headers['Cache-Control'] = entry.cache_control
+        response.vary.add('Origin')
+        if entry.gzipped is not None:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    def invalidate(self, *names):
+        """Drop the cached responses for ``names``; the next request rebuilds them"""
+        with self._lock:
+            for name in names:
+                if self._entries.pop(name, None) is not None:
+                    self.stats['invalidations'] += 1
+
+    def middleware(self, wsgi_app):
+        """Wrap ``wsgi_app`` so built entries are served without entering Flask"""
+        def app(environ, start_response):
+            name = self._paths.get(environ.get('PATH_INFO'))
+            if name is None or environ['REQUEST_METHOD'] not in ('GET', 'HEAD') or 'HTTP_ORIGIN' in environ:
+                return wsgi_app(environ, start_response)
+            entry = self._entries.get(name)
+            if entry is None:
+                return wsgi_app(environ, start_response)
+            environ[ROUTE_KEY] = environ['PATH_INFO']  # These routes have no placeholders
+            variant = entry.variant(environ)
+            if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+            if if_none_match and _etags(if_none_match).contains_weak(variant.etag):
+                self.stats['not_modified'] += 1
+                start_response('304 NOT MODIFIED', variant.not_modified_headers)
+                return []
+            self.stats['hits'] += 1
+            start_response('200 OK', variant.headers)
+            return [] if environ['REQUEST_METHOD'] == 'HEAD' else [variant.body]
+        return app
+
+    def performance(self):
+        return {
+            'entries': {name: {'bytes': len(entry.plain.body),
+                               'gzip_bytes': len(entry.gzipped.body) if entry.gzipped else None,
+                               'etag': entry.plain.etag, 'built_at': entry.built_at}
+                        for name, entry in list(self._entries.items())},
+            **self.stats
+        }
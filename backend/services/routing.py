@@ -0,0 +1,220 @@
+"""
+Multi-hop swap routing over constant-product liquidity pools.
+
+Tokens are graph nodes and pools are edges.  For each token pair the router
+finds a handful of good candidate paths once (a bounded beam search ranked
+by after-fee spot rate) and caches them; quoting then only evaluates those
+few paths against live reserves, optionally splitting the input across
+pool-disjoint routes.  When a pool's reserves change, only the cached pairs
+whose candidate paths touch that pool are dropped.
+"""
+
+import math
+import threading
+
+
+class Pool:
+    """Constant-product (x * y = k) pool"""
+
+    __slots__ = ('pool_id', 'token_a', 'token_b', 'reserve_a', 'reserve_b', 'fee')
+
+    def __init__(self, pool_id, token_a, token_b, reserve_a, reserve_b, fee=0.003):
+        self.pool_id = pool_id
+        self.token_a = token_a
+        self.token_b = token_b
+        self.reserve_a = reserve_a
+        self.reserve_b = reserve_b
+        self.fee = fee
+
+    def other(self, token):
+        return self.token_b if token == self.token_a else self.token_a
+
+    def _reserves(self, token_in):
+        if token_in == self.token_a:
+            return self.reserve_a, self.reserve_b
+        return self.reserve_b, self.reserve_a
+
+    def spot_rate(self, token_in):
+        reserve_in, reserve_out = self._reserves(token_in)
+        return reserve_out / reserve_in * (1 - self.fee)
+
+    def amount_out(self, token_in, amount_in):
+        reserve_in, reserve_out = self._reserves(token_in)
+        effective = amount_in * (1 - self.fee)
+        return reserve_out * effective / (reserve_in + effective)
+
+
+class SwapRouter:
+    """Token graph with cached candidate routes per pair"""
+
+    def __init__(self, max_hops=3, max_routes=4, beam_width=32, split_parts=10):
+        self.max_hops = max_hops
+        self.max_routes = max_routes
+        self.beam_width = beam_width
+        self.split_parts = split_parts
+        self.pools = {}
+        self._adjacency = {}
+        self._routes = {}
+        self._pairs_by_pool = {}
+        self._lock = threading.Lock()
+        self.stats = {'route_hits': 0, 'route_misses': 0, 'invalidations': 0}
+
+    @property
+    def tokens(self):
+        return self._adjacency.keys()
+
+    def add_pool(self, pool):
+        with self._lock:
+            self.pools[pool.pool_id] = pool
+            self._adjacency.setdefault(pool.token_a, []).append(pool.pool_id)
+            self._adjacency.setdefault(pool.token_b, []).append(pool.pool_id)
+            # A new edge can beat any cached route
+            self._routes.clear()
+            self._pairs_by_pool.clear()
+
+    def update_reserves(self, pool_id, reserve_a, reserve_b):
+        """Apply new reserves and drop only the cached pairs that route through this pool"""
+        with self._lock:
+            pool = self.pools[pool_id]
+            pool.reserve_a = reserve_a
+            pool.reserve_b = reserve_b
+            for pair in self._pairs_by_pool.pop(pool_id, ()):
+                if self._routes.pop(pair, None) is not None:
+                    self.stats['invalidations'] += 1
+
+    def _distances_to(self, token, depth):
+        """Hop distance to ``token`` for every token within ``depth`` hops of it"""
+        distances = {token: 0}
+        layer = [token]
+        for hops in range(1, depth + 1):
+            next_layer = []
+            for current in layer:
+                for pool_id in self._adjacency.get(current, ()):
+                    neighbour = self.pools[pool_id].other(current)
+                    if neighbour not in distances:
+                        distances[neighbour] = hops
+                        next_layer.append(neighbour)
+            layer = next_layer
+        return distances
+
+    def _search(self, from_token, to_token):
+        """Beam search for the best ``max_routes`` simple paths by after-fee spot rate.
+
+        Only tokens that can still reach ``to_token`` in the remaining hops
+        are kept, so the beam isn't spent on dead ends around busy hubs.
+        """
+        distances = self._distances_to(to_token, self.max_hops - 1)
+        frontier = [(0.0, from_token, ())]
+        found = []
+        for hop in range(self.max_hops):
+            remaining = self.max_hops - hop - 1
+            expanded = []
+            for cost, token, path in frontier:
+                visited = {from_token}
+                visited.update(self.pools[pool_id].other(t) for pool_id, t in path)
+                for pool_id in self._adjacency.get(token, ()):
+                    pool = self.pools[pool_id]
+                    next_token = pool.other(token)
+                    if next_token in visited or distances.get(next_token, remaining + 1) > remaining:
+                        continue
+                    rate = pool.spot_rate(token)
+                    if rate <= 0:
+                        continue
+                    step = (cost - math.log(rate), next_token, path + ((pool_id, token),))
+                    if next_token == to_token:
+                        found.append(step)
+                    else:
+                        expanded.append(step)
+            expanded.sort(key=lambda entry: entry[0])
+            frontier = expanded[:self.beam_width]
+            if not frontier:
+                break
+        found.sort(key=lambda entry: entry[0])
+        return [path for _, _, path in found[:self.max_routes]]
+
+    def routes(self, from_token, to_token):
+        pair = (from_token, to_token)
+        routes = self._routes.get(pair)
+        if routes is not None:
+            self.stats['route_hits'] += 1
+            return routes
+        self.stats['route_misses'] += 1
+        with self._lock:
+            routes = self._search(from_token, to_token)
+            self._routes[pair] = routes
+            for path in routes:
+                for pool_id, _ in path:
+                    self._pairs_by_pool.setdefault(pool_id, set()).add(pair)
+        return routes
+
+    def _output(self, path, amount):
+        pools = self.pools
+        for pool_id, token_in in path:
+            amount = pools[pool_id].amount_out(token_in, amount)
+        return amount
+
+    def _spot_rate(self, path):
+        rate = 1.0
+        for pool_id, token_in in path:
+            rate *= self.pools[pool_id].spot_rate(token_in)
+        return rate
+
+    def _path_tokens(self, path):
+        tokens = [path[0][1]]
+        for pool_id, token_in in path:
+            tokens.append(self.pools[pool_id].other(token_in))
+        return tokens
+
+    def quote(self, from_token, to_token, amount, split=True):
+        """Best execution for ``amount``; returns None if the pair is unreachable"""
+        routes = self.routes(from_token, to_token)
+        if not routes:
+            return None
+
+        # Splitting is only sound across routes that don't share a pool
+        candidates = [routes[0]]
+        used = {pool_id for pool_id, _ in routes[0]}
+        if split:
+            for path in routes[1:]:
+                pool_ids = {pool_id for pool_id, _ in path}
+                if not pool_ids & used:
+                    candidates.append(path)
+                    used |= pool_ids
+
+        allocation = [0.0] * len(candidates)
+        outputs = [0.0] * len(candidates)
+        parts = self.split_parts if len(candidates) > 1 and amount > 0 else 1
+        chunk = amount / parts
+        for _ in range(parts):
+            best, best_gain, best_output = 0, -1.0, 0.0
+            for i, path in enumerate(candidates):
+                output = self._output(path, allocation[i] + chunk)
+                gain = output - outputs[i]
+                if gain > best_gain:
+                    best, best_gain, best_output = i, gain, output
+            allocation[best] += chunk
+            outputs[best] = best_output
+
+        total_out = sum(outputs)
+        spot = self._spot_rate(routes[0])
+        rate = total_out / amount if amount > 0 else spot
+        kept = 1.0
+        for pool_id, _ in routes[0]:
+            kept *= 1 - self.pools[pool_id].fee
+        return {
+            'output_amount': total_out,
+            'rate': rate,
+            'fee': 1 - kept,
+            'price_impact': max(0.0, 1 - rate / spot) if spot > 0 else 0.0,
+            'routes': [
+                {
+                    'path': self._path_tokens(path),
+                    'pools': [pool_id for pool_id, _ in path],
+                    'input_amount': allocation[i],
+                    'output_amount': outputs[i],
+                    'share': allocation[i] / amount if amount > 0 else (1.0 if i == 0 else 0.0)
+                }
+                for i, path in enumerate(candidates)
+                if allocation[i] > 0 or (amount <= 0 and i == 0)
+            ]
+        }
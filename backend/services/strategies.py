@@ -0,0 +1,222 @@
+"""
+Trading-bot strategies.
+
+Each strategy turns a price stream into a target position signal
+(-1 short, 0 flat, 1 long).  Live bots feed one tick at a time through
+``on_tick(state, price)``, which is O(1) using running sums, except for
+``heavy`` strategies: they only ``record`` ticks, and their decision is a
+pure function (``decide(*decide_args(state))``) so it can run in a worker
+process.
+
+``signals(close)`` is the vectorized form used by backtests: element ``t``
+is the signal ``on_tick`` would return after seeing ``close[:t + 1]``.
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+def _rolling_sum(values, window):
+    # Window sums ending at each index from window - 1 onwards
+    sums = np.cumsum(values)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums[window - 1:]
+
+
+def _number(parameters, name, default, minimum=None, integer=False):
+    value = parameters.get(name, default)
+    try:
+        value = int(value) if integer else float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'Parameter {name} must be a number')
+    if minimum is not None and value < minimum:
+        raise ValueError(f'Parameter {name} must be >= {minimum}')
+    return value
+
+
+class SmaCrossover:
+    """Long when the fast moving average is above the slow one, short below"""
+
+    heavy = False
+
+    def __init__(self, parameters):
+        self.fast = _number(parameters, 'fast', 10, 1, integer=True)
+        self.slow = _number(parameters, 'slow', 30, 2, integer=True)
+        if self.fast >= self.slow:
+            raise ValueError('Parameter fast must be smaller than slow')
+
+    def init_state(self):
+        return {'prices': deque(maxlen=self.slow), 'fast_sum': 0.0, 'slow_sum': 0.0}
+
+    def on_tick(self, state, price):
+        prices = state['prices']
+        if len(prices) == self.slow:
+            state['slow_sum'] -= prices[0]
+        if len(prices) >= self.fast:
+            state['fast_sum'] -= prices[-self.fast]
+        prices.append(price)
+        state['fast_sum'] += price
+        state['slow_sum'] += price
+        if len(prices) < self.slow:
+            return 0
+        return 1 if state['fast_sum'] / self.fast > state['slow_sum'] / self.slow else -1
+
+    def signals(self, close):
+        out = np.zeros(len(close), dtype=np.int8)
+        if len(close) < self.slow:
+            return out
+        # Centre the prices so the running sums stay small
+        centred = close - close[0]
+        fast = _rolling_sum(centred, self.fast)[self.slow - self.fast:] / self.fast
+        slow = _rolling_sum(centred, self.slow) / self.slow
+        out[self.slow - 1:] = np.where(fast > slow, 1, -1)
+        return out
+
+
+class Momentum:
+    """Follow the return over ``lookback`` ticks once it exceeds ``threshold``"""
+
+    heavy = False
+
+    def __init__(self, parameters):
+        self.lookback = _number(parameters, 'lookback', 20, 1, integer=True)
+        self.threshold = _number(parameters, 'threshold', 0.01, 0)
+
+    def init_state(self):
+        return {'prices': deque(maxlen=self.lookback + 1)}
+
+    def on_tick(self, state, price):
+        prices = state['prices']
+        prices.append(price)
+        if len(prices) <= self.lookback:
+            return 0
+        change = price / prices[0] - 1
+        if change > self.threshold:
+            return 1
+        if change < -self.threshold:
+            return -1
+        return 0
+
+    def signals(self, close):
+        out = np.zeros(len(close), dtype=np.int8)
+        if len(close) <= self.lookback:
+            return out
+        change = close[self.lookback:] / close[:-self.lookback] - 1
+        out[self.lookback:] = (change > self.threshold).astype(np.int8) - (change < -self.threshold)
+        return out
+
+
+class MeanReversion:
+    """Fade moves more than ``z`` standard deviations from the rolling mean"""
+
+    heavy = False
+
+    def __init__(self, parameters):
+        self.window = _number(parameters, 'window', 20, 2, integer=True)
+        self.z = _number(parameters, 'z', 2.0, 0)
+
+    def init_state(self):
+        return {'prices': deque(maxlen=self.window), 'sum': 0.0, 'sum_sq': 0.0}
+
+    def on_tick(self, state, price):
+        prices = state['prices']
+        if len(prices) == self.window:
+            oldest = prices[0]
+            state['sum'] -= oldest
+            state['sum_sq'] -= oldest * oldest
+        prices.append(price)
+        state['sum'] += price
+        state['sum_sq'] += price * price
+        if len(prices) < self.window:
+            return 0
+        mean = state['sum'] / self.window
+        variance = max(state['sum_sq'] / self.window - mean * mean, 0.0)
+        if variance == 0:
+            return 0
+        score = (price - mean) / variance ** 0.5
+        if score > self.z:
+            return -1
+        if score < -self.z:
+            return 1
+        return 0
+
+    def signals(self, close):
+        out = np.zeros(len(close), dtype=np.int8)
+        if len(close) < self.window:
+            return out
+        centred = close - close.mean()
+        mean = _rolling_sum(centred, self.window) / self.window
+        variance = np.maximum(_rolling_sum(centred * centred, self.window) / self.window - mean * mean, 0.0)
+        std = np.sqrt(variance)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            score = np.where(std > 0, (centred[self.window - 1:] - mean) / std, 0.0)
+        out[self.window - 1:] = (score < -self.z).astype(np.int8) - (score > self.z)
+        return out
+
+
+class LinearRegression:
+    """Trade the sign of a least-squares trend over a long window (CPU heavy)"""
+
+    heavy = True
+
+    def __init__(self, parameters):
+        self.window = _number(parameters, 'window', 2000, 10, integer=True)
+        self.threshold = _number(parameters, 'threshold', 0.0001, 0)
+
+    def init_state(self):
+        return {'prices': deque(maxlen=self.window)}
+
+    def record(self, state, price):
+        """Append a tick; returns True once there is a full window to decide on"""
+        prices = state['prices']
+        prices.append(price)
+        return len(prices) == self.window
+
+    def decide_args(self, state):
+        prices = state['prices']
+        return np.fromiter(prices, dtype=np.float64, count=len(prices)), self.threshold
+
+    @staticmethod
+    def decide(prices, threshold):
+        x = np.arange(len(prices), dtype=np.float64)
+        slope, _ = np.polyfit(x, prices, 1)
+        trend = slope / prices.mean()
+        if trend > threshold:
+            return 1
+        if trend < -threshold:
+            return -1
+        return 0
+
+    def signals(self, close):
+        # Closed-form rolling least-squares slope: with x = 0..w-1 over each
+        # window, slope = (sum(x*y) - mean(x)*sum(y)) / sum((x - mean(x))**2)
+        # and sum(x*y) = sum(i*y) - start*sum(y) over absolute indexes i.
+        w = self.window
+        out = np.zeros(len(close), dtype=np.int8)
+        if len(close) < w:
+            return out
+        centred = close - close[0]
+        index = np.arange(len(close), dtype=np.float64)
+        sum_y = _rolling_sum(centred, w)
+        sum_iy = _rolling_sum(index * centred, w)
+        start = index[:len(sum_y)]
+        slope = (sum_iy - start * sum_y - (w - 1) / 2 * sum_y) / (w * (w * w - 1) / 12)
+        trend = slope / (sum_y / w + close[0])
+        out[w - 1:] = (trend > self.threshold).astype(np.int8) - (trend < -self.threshold)
+        return out
+
+
+STRATEGIES = {
+    'sma_crossover': SmaCrossover,
+    'momentum': Momentum,
+    'mean_reversion': MeanReversion,
+    'linear_regression': LinearRegression
+}
+
+
+def create_strategy(name, parameters=None):
+    strategy = STRATEGIES.get(name)
+    if strategy is None:
+        raise ValueError(f'Unknown strategy {name!r}; expected one of {sorted(STRATEGIES)}')
+    return strategy(parameters or {})
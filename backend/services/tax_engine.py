@@ -0,0 +1,467 @@
+"""
+Streaming cost-basis engine for realized gains.
+
+Each user's trades are kept in a ``TradeLedger``: packed per-year columns
+(about 35 bytes a trade) in time order.  A report replays trades through a
+lot queue per symbol: FIFO and LIFO are packed arrays with a moving head,
+HIFO is a heap keyed on unit cost.
+
+State is checkpointed per user and method.  The closing lots of every
+finished year are snapshotted, and the live position inside the newest
+year is kept, so:
+
+* a report for a later year resumes from the previous year's close;
+* trades appended after the live position just continue the replay;
+* a back-dated trade only discards checkpoints from its own year onwards.
+
+``close_year`` makes a year final: its checkpoints are computed for every
+method and its trades dropped, so memory is bounded by the open years.
+"""
+
+import heapq
+import operator
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timezone
+
+from services.locks import StripedLock
+
+METHODS = ('fifo', 'lifo', 'hifo')
+BUY, SELL = 1, -1
+LONG_TERM_SECONDS = 365 * 24 * 3600
+
+
+def parse_timestamp(value):
+    """Epoch seconds from a number or an ISO-8601 string (naive means UTC)"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(f'Invalid timestamp {value!r}')
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    raise ValueError('Trade timestamp is required')
+
+
+def year_of(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).year
+
+
+class _YearTrades:
+    # One year of trades as parallel packed columns, sorted by timestamp
+    __slots__ = ('timestamp', 'side', 'symbol', 'quantity', 'price', 'fee')
+
+    def __init__(self):
+        self.timestamp = array('d')
+        self.side = array('b')
+        self.symbol = array('H')
+        self.quantity = array('d')
+        self.price = array('d')
+        self.fee = array('d')
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def insert(self, timestamp, side, symbol, quantity, price, fee):
+        """Insert in time order; returns the position (trades at equal times keep arrival order)"""
+        if not self.timestamp or self.timestamp[-1] <= timestamp:
+            position = len(self.timestamp)
+            for column, value in zip(self._columns(), (timestamp, side, symbol, quantity, price, fee)):
+                column.append(value)
+        else:
+            position = bisect_right(self.timestamp, timestamp)
+            for column, value in zip(self._columns(), (timestamp, side, symbol, quantity, price, fee)):
+                column.insert(position, value)
+        return position
+
+    def _columns(self):
+        return self.timestamp, self.side, self.symbol, self.quantity, self.price, self.fee
+
+    def rows(self, start=0):
+        return zip(*(column[start:] if start else column for column in self._columns()))
+
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in self._columns())
+
+
+class TradeLedger:
+    def __init__(self):
+        self.symbols = []
+        self._symbol_index = {}
+        self.years = {}
+        self.closed_through = None
+        self.count = 0
+
+    def symbol_index(self, symbol):
+        index = self._symbol_index.get(symbol)
+        if index is None:
+            index = self._symbol_index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return index
+
+    def add(self, timestamp, side, symbol, quantity, price, fee):
+        """Record a trade; returns ``(year, position within the year)``"""
+        year = year_of(timestamp)
+        if self.closed_through is not None and year <= self.closed_through:
+            raise ValueError(f'Tax year {year} is closed')
+        trades = self.years.get(year)
+        if trades is None:
+            trades = self.years[year] = _YearTrades()
+        position = trades.insert(timestamp, side, self.symbol_index(symbol), quantity, price, fee)
+        self.count += 1
+        return year, position
+
+    def first_year(self):
+        return min(self.years) if self.years else None
+
+    def nbytes(self):
+        return sum(trades.nbytes() for trades in self.years.values())
+
+
+class FifoLots:
+    """Open lots as packed arrays; disposals consume from the oldest (head)"""
+
+    __slots__ = ('quantity', 'unit_cost', 'acquired', 'head')
+
+    def __init__(self, quantity=None, unit_cost=None, acquired=None):
+        self.quantity = quantity if quantity is not None else array('d')
+        self.unit_cost = unit_cost if unit_cost is not None else array('d')
+        self.acquired = acquired if acquired is not None else array('d')
+        self.head = 0
+
+    def add(self, quantity, unit_cost, acquired):
+        self.quantity.append(quantity)
+        self.unit_cost.append(unit_cost)
+        self.acquired.append(acquired)
+
+    def __len__(self):
+        return len(self.quantity) - self.head
+
+    def _take_index(self):
+        return self.head
+
+    def _drop(self, index):
+        self.head += 1
+        # Compact once the consumed prefix dominates
+        if self.head > 1024 and self.head * 2 > len(self.quantity):
+            for column in (self.quantity, self.unit_cost, self.acquired):
+                del column[:self.head]
+            self.head = 0
+
+    def consume(self, quantity, on_piece):
+        """Match ``quantity`` against open lots, calling ``on_piece(quantity, unit_cost, acquired)``"""
+        while quantity > 0 and len(self):
+            index = self._take_index()
+            available = self.quantity[index]
+            if available > quantity:
+                self.quantity[index] = available - quantity
+                on_piece(quantity, self.unit_cost[index], self.acquired[index])
+                return 0.0
+            on_piece(available, self.unit_cost[index], self.acquired[index])
+            quantity -= available
+            self._drop(index)
+        return quantity
+
+    def totals(self):
+        quantity = self.quantity[self.head:]
+        return sum(quantity), sum(map(operator.mul, quantity, self.unit_cost[self.head:]))
+
+    def snapshot(self):
+        return type(self)(*(array('d', column[self.head:]) for column in (self.quantity, self.unit_cost, self.acquired)))
+
+
+class LifoLots(FifoLots):
+    """Same packing as FIFO; disposals consume from the newest (tail)"""
+
+    __slots__ = ()
+
+    def _take_index(self):
+        return len(self.quantity) - 1
+
+    def _drop(self, index):
+        for column in (self.quantity, self.unit_cost, self.acquired):
+            column.pop()
+
+
+class HifoLots:
+    """Heap of ``(-unit_cost, acquired, quantity)``; disposals consume the dearest lot first"""
+
+    __slots__ = ('heap',)
+
+    def __init__(self, heap=None):
+        self.heap = heap if heap is not None else []
+
+    def add(self, quantity, unit_cost, acquired):
+        heapq.heappush(self.heap, (-unit_cost, acquired, quantity))
+
+    def __len__(self):
+        return len(self.heap)
+
+    def consume(self, quantity, on_piece):
+        heap = self.heap
+        while quantity > 0 and heap:
+            negative_cost, acquired, available = heap[0]
+            if available > quantity:
+                heapq.heapreplace(heap, (negative_cost, acquired, available - quantity))
+                on_piece(quantity, -negative_cost, acquired)
+                return 0.0
+            heapq.heappop(heap)
+            on_piece(available, -negative_cost, acquired)
+            quantity -= available
+        return quantity
+
+    def totals(self):
+        return sum(lot[2] for lot in self.heap), sum(-lot[0] * lot[2] for lot in self.heap)
+
+    def snapshot(self):
+        return HifoLots(list(self.heap))
+
+
+LOT_QUEUES = {'fifo': FifoLots, 'lifo': LifoLots, 'hifo': HifoLots}
+
+
+class _YearTotals:
+    __slots__ = ('by_symbol', 'fees')
+
+    def __init__(self):
+        # symbol index -> [proceeds, cost_basis, short_term, long_term, disposals, unmatched_quantity]
+        self.by_symbol = {}
+        self.fees = 0.0
+
+
+class _Book:
+    """Replay state for one user and method"""
+
+    __slots__ = ('method', 'lots', 'year', 'index', 'totals', 'closing', 'results')
+
+    def __init__(self, method):
+        self.method = method
+        self.lots = None
+        self.year = None  # Year of the live position, None when it must be restored
+        self.index = 0    # Trades of that year already applied
+        self.totals = None
+        self.closing = {}  # year -> {symbol index: lot queue snapshot} at the year's close
+        self.results = {}  # year -> finished report
+
+    def invalidate(self, year, position):
+        for cache in (self.closing, self.results):
+            for stale in [y for y in cache if y >= year]:
+                del cache[stale]
+        if self.year is not None and (self.year > year or (self.year == year and position < self.index)):
+            self.year = None
+
+
+class TaxEngine:
+    def __init__(self, stripes=256):
+        self._ledgers = {}
+        self._books = {}
+        self._locks = StripedLock(stripes)
+        self.stats = {'trades': 0, 'replayed': 0, 'cached_reports': 0, 'resumed_reports': 0}
+
+    def record(self, user_id, trades):
+        """Append trades for a user; raises ValueError (recording none) if any trade is invalid"""
+        parsed = [self._parse(trade) for trade in trades]
+        with self._locks.hold(str(user_id)):
+            ledger = self._ledgers.get(user_id)
+            if ledger is None:
+                ledger = self._ledgers[user_id] = TradeLedger()
+            if ledger.closed_through is not None:
+                for trade in parsed:
+                    if year_of(trade[0]) <= ledger.closed_through:
+                        raise ValueError(f'Tax year {year_of(trade[0])} is closed')
+            books = [self._books[key] for key in ((user_id, method) for method in METHODS) if key in self._books]
+            for trade in parsed:
+                year, position = ledger.add(*trade)
+                for book in books:
+                    book.invalidate(year, position)
+        self.stats['trades'] += len(parsed)
+        return len(parsed)
+
+    @staticmethod
+    def _parse(trade):
+        side = {'buy': BUY, 'sell': SELL}.get(str(trade.get('side', '')).lower())
+        if side is None:
+            raise ValueError("Trade side must be 'buy' or 'sell'")
+        symbol = trade.get('symbol')
+        if not symbol:
+            raise ValueError('Trade symbol is required')
+        try:
+            quantity = float(trade['quantity'])
+            price = float(trade['price'])
+            fee = float(trade.get('fee', 0))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('Trade quantity and price must be numbers')
+        if not quantity > 0 or not price >= 0 or not fee >= 0:
+            raise ValueError('Trade quantity must be positive and price and fee non-negative')
+        return parse_timestamp(trade.get('timestamp')), side, symbol, quantity, price, fee
+
+    def report(self, user_id, year, method='fifo'):
+        if method not in LOT_QUEUES:
+            raise ValueError(f'Unknown method {method!r}; expected one of {list(METHODS)}')
+        year = int(year)
+        with self._locks.hold(str(user_id)):
+            ledger = self._ledgers.get(user_id)
+            if ledger is None:
+                return self._summary(year, method, TradeLedger(), _YearTotals(), {})
+            book = self._books.get((user_id, method))
+            if book is None:
+                book = self._books[(user_id, method)] = _Book(method)
+            return self._advance(ledger, book, year)
+
+    def _advance(self, ledger, book, year):
+        cached = book.results.get(year)
+        if cached is not None:
+            self.stats['cached_reports'] += 1
+            return cached
+        if ledger.closed_through is not None and year <= ledger.closed_through:
+            # A closed year's trades are gone, and one without a report had none:
+            # it only carries the lots of the latest close before it
+            earlier = [y for y in book.closing if y <= year]
+            lots = book.closing[max(earlier)] if earlier else {}
+            report = book.results[year] = self._summary(year, book.method, ledger, _YearTotals(), lots)
+            return report
+        if book.year is None or book.year > year:
+            self._restore(ledger, book, year)
+        else:
+            self.stats['resumed_reports'] += 1
+        queue = LOT_QUEUES[book.method]
+        while True:
+            trades = ledger.years.get(book.year)
+            if trades is not None and book.index < len(trades):
+                self._apply(book, queue, trades.rows(book.index))
+                self.stats['replayed'] += len(trades) - book.index
+                book.index = len(trades)
+            report = self._summary(book.year, book.method, ledger, book.totals, book.lots)
+            if book.year == year:
+                book.results[year] = report
+                return report
+            # Year boundary: checkpoint the closing lots and move on
+            book.results[book.year] = report
+            book.closing[book.year] = {symbol: lots.snapshot() for symbol, lots in book.lots.items() if len(lots)}
+            book.year += 1
+            book.index = 0
+            book.totals = _YearTotals()
+
+    def _restore(self, ledger, book, year):
+        # Resume from the latest checkpoint before ``year``, or replay from the first
+        # trade; never from inside the closed years, whose trades are dropped
+        earlier = [y for y in book.closing if y < year]
+        if earlier:
+            start = max(earlier)
+            book.lots = {symbol: lots.snapshot() for symbol, lots in book.closing[start].items()}
+            book.year = start + 1
+        else:
+            first = ledger.first_year()
+            book.lots = {}
+            book.year = min(first, year) if first is not None else year
+        if ledger.closed_through is not None and book.year <= ledger.closed_through:
+            book.year = ledger.closed_through + 1
+        book.index = 0
+        book.totals = _YearTotals()
+
+    @staticmethod
+    def _apply(book, queue, rows):
+        lots = book.lots
+        totals = book.totals
+        by_symbol = totals.by_symbol
+        fees = 0.0
+        for timestamp, side, symbol, quantity, price, fee in rows:
+            fees += fee
+            symbol_lots = lots.get(symbol)
+            if symbol_lots is None:
+                symbol_lots = lots[symbol] = queue()
+            if side == BUY:
+                # The buy fee is part of the cost basis
+                symbol_lots.add(quantity, (quantity * price + fee) / quantity, timestamp)
+                continue
+            row = by_symbol.get(symbol)
+            if row is None:
+                row = by_symbol[symbol] = [0.0, 0.0, 0.0, 0.0, 0, 0.0]
+            proceeds_per_unit = (quantity * price - fee) / quantity
+            gains = [0.0, 0.0, 0.0]  # cost, short term, long term
+
+            def on_piece(matched, unit_cost, acquired):
+                gain = matched * (proceeds_per_unit - unit_cost)
+                gains[0] += matched * unit_cost
+                if timestamp - acquired > LONG_TERM_SECONDS:
+                    gains[2] += gain
+                else:
+                    gains[1] += gain
+
+            # Disposals without a matching lot are treated as zero-cost, short term
+            unmatched = symbol_lots.consume(quantity, on_piece)
+            if unmatched > 0:
+                gains[1] += unmatched * proceeds_per_unit
+                row[5] += unmatched
+            row[0] += quantity * proceeds_per_unit
+            row[1] += gains[0]
+            row[2] += gains[1]
+            row[3] += gains[2]
+            row[4] += 1
+        totals.fees += fees
+
+    @staticmethod
+    def _summary(year, method, ledger, totals, lots):
+        by_symbol = {}
+        sums = [0.0, 0.0, 0.0, 0.0, 0, 0.0]
+        for symbol, row in totals.by_symbol.items():
+            by_symbol[ledger.symbols[symbol]] = {
+                'proceeds': row[0],
+                'cost_basis': row[1],
+                'short_term_gain': row[2],
+                'long_term_gain': row[3],
+                'realized_gain': row[2] + row[3],
+                'disposals': row[4],
+                'unmatched_quantity': row[5]
+            }
+            sums = [a + b for a, b in zip(sums, row)]
+        open_lots = {}
+        for symbol, symbol_lots in lots.items():
+            if len(symbol_lots):
+                quantity, cost = symbol_lots.totals()
+                open_lots[ledger.symbols[symbol]] = {'lots': len(symbol_lots), 'quantity': quantity, 'cost_basis': cost}
+        return {
+            'year': year,
+            'method': method,
+            'proceeds': sums[0],
+            'cost_basis': sums[1],
+            'short_term_gain': sums[2],
+            'long_term_gain': sums[3],
+            'realized_gain': sums[2] + sums[3],
+            'disposals': sums[4],
+            'unmatched_quantity': sums[5],
+            'fees': totals.fees,
+            'by_symbol': by_symbol,
+            'open_lots': open_lots
+        }
+
+    def close_year(self, user_id, year):
+        """Finalize every year up to ``year``: checkpoint all methods, then drop those trades"""
+        year = int(year)
+        with self._locks.hold(str(user_id)):
+            ledger = self._ledgers.get(user_id)
+            if ledger is None:
+                raise KeyError(user_id)
+            for method in METHODS:
+                book = self._books.get((user_id, method))
+                if book is None:
+                    book = self._books[(user_id, method)] = _Book(method)
+                # Reaching year + 1 checkpoints the close of ``year``
+                self._advance(ledger, book, year + 1)
+            for closed in [y for y in ledger.years if y <= year]:
+                ledger.count -= len(ledger.years.pop(closed))
+            ledger.closed_through = year if ledger.closed_through is None else max(ledger.closed_through, year)
+
+    def ledger_stats(self, user_id):
+        ledger = self._ledgers.get(user_id)
+        if ledger is None:
+            return None
+        return {
+            'trades': ledger.count,
+            'years': sorted(ledger.years),
+            'closed_through': ledger.closed_through,
+            'ledger_bytes': ledger.nbytes()
+        }
@@ -0,0 +1,100 @@
+"""
+Hashed timer wheel.
+
+Timers are dropped into one of ``slots`` buckets by expiry tick, with a
+round counter for delays longer than one revolution.  Scheduling and
+cancelling are O(1) and a single driver thread serves any number of
+timers, so thousands of pending timeouts cost no threads of their own.
+"""
+
+import threading
+import time
+
+
+class Timer:
+    __slots__ = ('rounds', 'callback', 'args', 'cancelled')
+
+    def __init__(self, rounds, callback, args):
+        self.rounds = rounds
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """Fires callbacks after a delay with ``tick`` resolution.
+
+    Callbacks run on the driver thread unless a ``dispatch`` function (for
+    example ``executor.submit``) is given, so slow callbacks should be
+    handed off.
+    """
+
+    def __init__(self, tick=0.05, slots=512, dispatch=None, clock=time.monotonic):
+        self.tick = tick
+        self.slots = [[] for _ in range(slots)]
+        self.dispatch = dispatch
+        self.clock = clock
+        self._cursor = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending = 0
+
+    def __len__(self):
+        return self._pending
+
+    def schedule(self, delay, callback, *args):
+        ticks = max(1, int(round(delay / self.tick)))
+        with self._lock:
+            # The slot after the cursor is one tick away, the cursor's own slot a full revolution
+            rounds, offset = divmod(ticks - 1, len(self.slots))
+            timer = Timer(rounds, callback, args)
+            self.slots[(self._cursor + offset + 1) % len(self.slots)].append(timer)
+            self._pending += 1
+        return timer
+
+    def advance(self):
+        """Move one tick forward and fire everything that expired"""
+        with self._lock:
+            self._cursor = (self._cursor + 1) % len(self.slots)
+            bucket = self.slots[self._cursor]
+            expired, waiting = [], []
+            for timer in bucket:
+                if timer.cancelled:
+                    self._pending -= 1
+                elif timer.rounds > 0:
+                    timer.rounds -= 1
+                    waiting.append(timer)
+                else:
+                    self._pending -= 1
+                    expired.append(timer)
+            self.slots[self._cursor] = waiting
+        for timer in expired:
+            if self.dispatch is not None:
+                self.dispatch(timer.callback, *timer.args)
+            else:
+                timer.callback(*timer.args)
+        return len(expired)
+
+    def _run(self):
+        next_tick = self.clock() + self.tick
+        while not self._stop.is_set():
+            delay = next_tick - self.clock()
+            if delay > 0 and self._stop.wait(delay):
+                return
+            self.advance()
+            next_tick += self.tick
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='timer-wheel', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,83 @@
+"""
+Columnar holdings matrix for batch portfolio valuation.
+
+Balances are mirrored into a ``wallets x symbols`` float64 matrix as they
+change, so valuing thousands of wallets is a row gather and a single
+matrix-vector product against one price snapshot instead of a Python loop
+per wallet per symbol.
+"""
+
+import threading
+
+import numpy as np
+
+
+class HoldingsMatrix:
+    """Dense per-wallet balances, one column per symbol"""
+
+    def __init__(self, symbols=(), capacity=1024):
+        self.symbols = list(symbols)
+        self._columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._rows = {}
+        self._matrix = np.zeros((capacity, max(len(self.symbols), 1)), dtype=np.float64)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _column(self, symbol):
+        column = self._columns.get(symbol)
+        if column is None:
+            column = self._columns[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            if column >= self._matrix.shape[1]:
+                grown = np.zeros((self._matrix.shape[0], column + 1), dtype=np.float64)
+                grown[:, :self._matrix.shape[1]] = self._matrix
+                self._matrix = grown
+        return column
+
+    def _row(self, wallet_id):
+        row = self._rows.get(wallet_id)
+        if row is None:
+            row = self._rows[wallet_id] = len(self._rows)
+            if row >= self._matrix.shape[0]:
+                grown = np.zeros((self._matrix.shape[0] * 2, self._matrix.shape[1]), dtype=np.float64)
+                grown[:self._matrix.shape[0]] = self._matrix
+                self._matrix = grown
+        return row
+
+    def set(self, wallet_id, balances):
+        """Mirror a wallet's full ``{symbol: amount}`` balance map"""
+        with self._lock:
+            row = self._row(wallet_id)
+            columns = [self._column(symbol) for symbol in balances]
+            self._matrix[row, :] = 0.0
+            self._matrix[row, columns] = list(balances.values())
+
+    def rebuild(self, wallets):
+        """Reload from ``{wallet_id: wallet}`` in bulk"""
+        for wallet_id, wallet in wallets.items():
+            self.set(wallet_id, wallet['balance'])
+
+    def price_vector(self, prices):
+        return np.array([prices.get(symbol, 0.0) for symbol in self.symbols], dtype=np.float64)
+
+    def value(self, wallet_ids, prices):
+        """Value ``wallet_ids`` against one ``{symbol: price}`` snapshot.
+
+        Returns ``(found_ids, holdings, values, missing_ids)`` where
+        ``holdings`` is the gathered ``len(found) x symbols`` matrix and
+        ``values`` the matching per-wallet total.
+        """
+        with self._lock:
+            found, rows, missing = [], [], []
+            for wallet_id in wallet_ids:
+                row = self._rows.get(wallet_id)
+                if row is None:
+                    missing.append(wallet_id)
+                else:
+                    found.append(wallet_id)
+                    rows.append(row)
+            holdings = self._matrix[np.asarray(rows, dtype=np.intp), :len(self.symbols)]
+            price_vector = self.price_vector(prices)
+        return found, holdings, holdings @ price_vector, missing
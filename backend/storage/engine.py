@@ -0,0 +1,371 @@
+"""
+Pluggable storage engines for the wallet and transaction maps.
+
+``MemoryEngine`` hands out plain dicts (the original behaviour).
+``JournalEngine`` hands out dict-like tables that are durable: every write is
+appended to a group-committed journal, a background thread periodically
+folds the journal into compact snapshots, and a restart mmaps the latest
+snapshot and replays only the journal records written after it.
+
+Structures derived from a table (indexes, rollups) can be attached as views,
+so a restart doesn't rebuild them from every record.  A view is any object
+with ``apply(key, old, new)`` (fold one change; ``old``/``new`` are the
+decoded values, or None when the record is absent), ``dump()`` (picklable
+state) and ``load(state)``.  Every snapshot also writes the state of each
+view as of that snapshot: the snapshot thread loads the previous state into
+a separate instance and applies only the records that changed since.  On
+start the view loads the state of the latest snapshot and applies the
+journal tail; the app keeps it current after that.
+"""
+
+import gc
+import json
+import os
+import pickle
+import threading
+from collections.abc import MutableMapping
+
+from storage.journal import Journal, fsync_directory, replay
+from storage.snapshot import EmptySnapshot, SnapshotReader, write_snapshot
+
+MANIFEST = 'MANIFEST'
+OP_PUT = 'p'
+OP_DELETE = 'd'
+_TOMBSTONE = object()
+
+
+def encode_value(value):
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def decode_value(raw):
+    return json.loads(raw)
+
+
+class MemoryEngine:
+    """Non-durable engine backed by plain dicts"""
+
+    def __init__(self):
+        self._tables = {}
+
+    def table(self, name):
+        return self._tables.setdefault(name, {})
+
+    def attach_view(self, name, table_name, view, factory):
+        """Fold the records already in ``table_name`` into ``view`` and return it"""
+        for key, value in self.table(table_name).items():
+            view.apply(key, None, value)
+        return view
+
+    def snapshot(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class StoreTable(MutableMapping):
+    """Dict-like view over one table of a ``JournalEngine``.
+
+    Recent writes live in an in-memory overlay of ``(value, encoded)`` pairs;
+    everything older is read from the mmapped snapshot, pinned for the
+    duration of each read so a compaction can't close it underneath.  Values
+    handed out are live objects, so callers that mutate one in place must
+    assign it back (``table[key] = value``) for the change to be journaled.
+    """
+
+    def __init__(self, engine, name, reader):
+        self._engine = engine
+        self.name = name
+        self._reader = reader
+        self._overlay = {}
+        self._count = len(reader)
+
+    def _pin_reader(self):
+        # A retired reader has already been swapped out, so retry on the new one
+        while True:
+            reader = self._reader
+            if reader.pin():
+                return reader
+
+    def _exists(self, key):
+        entry = self._overlay.get(key)
+        if entry is not None:
+            return entry[0] is not _TOMBSTONE
+        reader = self._pin_reader()
+        try:
+            return key in reader
+        finally:
+            reader.unpin()
+
+    def __getitem__(self, key):
+        entry = self._overlay.get(key)
+        if entry is not None:
+            if entry[0] is _TOMBSTONE:
+                raise KeyError(key)
+            return entry[0]
+        reader = self._pin_reader()
+        try:
+            raw = reader.get(key)
+        finally:
+            reader.unpin()
+        if raw is None:
+            raise KeyError(key)
+        return decode_value(raw)
+
+    def __contains__(self, key):
+        return self._exists(key)
+
+    def __setitem__(self, key, value):
+        self._engine._write(self, OP_PUT, key, value)
+
+    def __delitem__(self, key):
+        if not self._exists(key):
+            raise KeyError(key)
+        self._engine._write(self, OP_DELETE, key, None)
+
+    def __iter__(self):
+        overlay = dict(self._overlay)
+        for key, entry in overlay.items():
+            if entry[0] is not _TOMBSTONE:
+                yield key
+        reader = self._pin_reader()
+        try:
+            for key in reader.keys():
+                if key not in overlay:
+                    yield key
+        finally:
+            reader.unpin()
+
+    def __len__(self):
+        return self._count
+
+    def _apply(self, op, key, value, encoded):
+        """Update the overlay and live count; caller holds the engine lock"""
+        existed = self._exists(key)
+        if op == OP_PUT:
+            self._overlay[key] = (value, encoded)
+            if not existed:
+                self._count += 1
+        else:
+            self._overlay[key] = (_TOMBSTONE, None)
+            if existed:
+                self._count -= 1
+
+
+class JournalEngine:
+    """Durable engine: group-committed journal plus periodic mmap snapshots.
+
+    ``sync=True`` makes every write wait for its group commit (fsync) before
+    returning; ``False`` acknowledges as soon as the record is buffered.
+    A snapshot is started in the background once ``snapshot_every`` records
+    have been journaled since the last one.
+    """
+
+    def __init__(self, directory, sync=True, commit_delay=0.0, snapshot_every=500000):
+        self.directory = directory
+        self.sync = sync
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_thread = None
+        self._tables = {}
+        self._views = {}  # view name -> (table name, factory)
+
+        manifest = self._read_manifest()
+        self._snapshot_seq = manifest['seq']
+        self._snapshot_files = manifest['tables']
+        for name, filename in self._snapshot_files.items():
+            reader = SnapshotReader(os.path.join(directory, filename))
+            self._tables[name] = StoreTable(self, name, reader)
+
+        last_seq = self._snapshot_seq
+        for seq, payload in replay(directory, self._snapshot_seq):
+            op, name, key, value, encoded = self._decode_record(payload)
+            self._table(name)._apply(op, key, value, encoded)
+            last_seq = seq
+        self._since_snapshot = last_seq - self._snapshot_seq
+        self._journal = Journal(directory, next_seq=last_seq + 1, commit_delay=commit_delay)
+
+    def _read_manifest(self):
+        path = os.path.join(self.directory, MANIFEST)
+        if not os.path.exists(path):
+            return {'seq': 0, 'tables': {}}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, seq, tables):
+        path = os.path.join(self.directory, MANIFEST)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'seq': seq, 'tables': tables}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        fsync_directory(self.directory)
+
+    @staticmethod
+    def _encode_record(op, name, key, encoded):
+        header = json.dumps([op, name, key], separators=(',', ':')).encode('utf-8')
+        return header + b'\n' + (encoded or b'')
+
+    @staticmethod
+    def _decode_record(payload):
+        header, _, body = payload.partition(b'\n')
+        op, name, key = json.loads(header)
+        if op == OP_PUT:
+            return op, name, key, decode_value(body), body
+        return op, name, key, None, None
+
+    def _table(self, name):
+        table = self._tables.get(name)
+        if table is None:
+            table = self._tables[name] = StoreTable(self, name, EmptySnapshot())
+        return table
+
+    def table(self, name):
+        with self._lock:
+            return self._table(name)
+
+    def _view_path(self, name, seq):
+        return os.path.join(self.directory, f'view-{seq:020d}-{name}.pkl')
+
+    def _load_view(self, name, view, seq, reader):
+        """Load ``view`` as of snapshot ``seq``, building (and saving) it from ``reader`` if needed"""
+        if not seq:
+            return
+        path = self._view_path(name, seq)
+        if os.path.exists(path):
+            # Millions of small acyclic objects: collecting while they are created
+            # only costs time (about half of the load)
+            collecting = gc.isenabled()
+            gc.disable()
+            try:
+                with open(path, 'rb') as f:
+                    view.load(pickle.load(f))
+            finally:
+                if collecting:
+                    gc.enable()
+            return
+        # First start with this view (or its file was lost): one full pass
+        for key, raw in reader.items_raw():
+            view.apply(key.decode('utf-8'), None, decode_value(raw))
+        self._save_view(path, view)
+
+    def _save_view(self, path, view):
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(view.dump(), f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        fsync_directory(self.directory)
+
+    def attach_view(self, name, table_name, view, factory):
+        """Bring ``view`` up to date with ``table_name`` and keep it checkpointed.
+
+        ``factory()`` makes the empty instances the snapshot thread folds
+        changes into.  Attach views before the table is written to; after
+        that the caller applies its own writes to ``view``.
+        """
+        with self._snapshot_lock, self._lock:
+            table = self._table(table_name)
+            self._load_view(name, view, self._snapshot_seq, table._reader)
+            for key, (value, encoded) in table._overlay.items():
+                raw = table._reader.get(key)
+                view.apply(key, None if raw is None else decode_value(raw),
+                           None if value is _TOMBSTONE else value)
+            self._views[name] = (table_name, factory)
+        return view
+
+    def _write(self, table, op, key, value):
+        encoded = encode_value(value) if op == OP_PUT else None
+        payload = self._encode_record(op, table.name, key, encoded)
+        with self._lock:
+            seq = self._journal.append(payload)
+            table._apply(op, key, value, encoded)
+            self._since_snapshot += 1
+            start_snapshot = self._since_snapshot >= self.snapshot_every
+        if start_snapshot:
+            self._start_background_snapshot()
+        if self.sync:
+            self._journal.wait(seq)
+
+    def _start_background_snapshot(self):
+        with self._lock:
+            if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+                return
+            self._snapshot_thread = threading.Thread(target=self.snapshot, name='storage-snapshot', daemon=True)
+            self._snapshot_thread.start()
+
+    def snapshot(self):
+        """Fold everything journaled so far into new snapshot files"""
+        with self._snapshot_lock:
+            with self._lock:
+                boundary = self._journal.rotate()
+                if boundary == self._snapshot_seq:
+                    return
+                frozen = {name: dict(t._overlay) for name, t in self._tables.items()}
+                readers = {name: t._reader for name, t in self._tables.items()}
+                views = dict(self._views)
+                previous_seq = self._snapshot_seq
+                self._since_snapshot = self._journal.last_seq - boundary
+
+            files = {}
+            new_readers = {}
+            for name, overlay in frozen.items():
+                filename = f'snapshot-{boundary:020d}-{name}.db'
+                changes = {key: entry[1] for key, entry in overlay.items()}
+                write_snapshot(os.path.join(self.directory, filename), readers[name], changes)
+                files[name] = filename
+                new_readers[name] = SnapshotReader(os.path.join(self.directory, filename))
+            for name, (table_name, factory) in views.items():
+                view = factory()
+                self._load_view(name, view, previous_seq, readers[table_name])
+                for key, (_, encoded) in frozen[table_name].items():
+                    # The encoded bytes, not the live value, which may have changed since the freeze
+                    raw = readers[table_name].get(key)
+                    view.apply(key, None if raw is None else decode_value(raw),
+                               None if encoded is None else decode_value(encoded))
+                self._save_view(self._view_path(name, boundary), view)
+            self._write_manifest(boundary, files)
+
+            with self._lock:
+                for name, overlay in frozen.items():
+                    table = self._tables[name]
+                    table._reader = new_readers[name]
+                    live = table._overlay
+                    for key, entry in overlay.items():
+                        # Only drop entries nobody has overwritten since the freeze
+                        if live.get(key) is entry:
+                            del live[key]
+                self._snapshot_seq = boundary
+                old_files = self._snapshot_files
+                self._snapshot_files = files
+
+            self._journal.drop_segments_through(boundary)
+            for reader in readers.values():
+                # Closed now, or by the last lookup still using it
+                reader.retire()
+            for name, filename in old_files.items():
+                if filename != files.get(name):
+                    os.remove(os.path.join(self.directory, filename))
+            for name in views:
+                if previous_seq and os.path.exists(self._view_path(name, previous_seq)):
+                    os.remove(self._view_path(name, previous_seq))
+
+    def close(self):
+        thread = self._snapshot_thread
+        if thread is not None:
+            thread.join()
+        self._journal.close()
+        for table in self._tables.values():
+            table._reader.retire()
+
+
+def create_engine(directory=None, **options):
+    """Return a ``JournalEngine`` rooted at ``directory``, or a ``MemoryEngine``"""
+    if directory:
+        return JournalEngine(directory, **options)
+    return MemoryEngine()
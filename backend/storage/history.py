@@ -0,0 +1,198 @@
+"""
+Secondary index over the transaction table, keyed by wallet address.
+
+Every address keeps a timestamp-ordered list of ``(timestamp, hash)`` keys
+for transactions it sent or received, plus one list per filterable field
+value (symbol, network, status).  A page is a bisect to the cursor followed
+by a walk of at most ``limit`` entries, so paging costs O(log n + page)
+regardless of how long the history is.
+
+The index is a storage view of the transaction table (``apply``, ``dump``,
+``load``), so a journaled restart loads it instead of re-reading history.
+"""
+
+import base64
+import threading
+from bisect import bisect_left, insort
+
+FILTER_FIELDS = ('symbol', 'network', 'status')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(key):
+    timestamp, tx_hash = key
+    return base64.urlsafe_b64encode(f'{timestamp}|{tx_hash}'.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        timestamp, tx_hash = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|', 1)
+    except (ValueError, UnicodeError):
+        raise InvalidCursor('Invalid cursor')
+    return timestamp, tx_hash
+
+
+class TransactionIndex:
+    """Per-address, time-ordered transaction index with filter sub-indexes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lists = {}
+
+    def _keys_for(self, transaction):
+        key = (transaction['timestamp'], transaction['hash'])
+        addresses = {transaction.get('from_address'), transaction.get('to_address')}
+        addresses.discard(None)
+        for address in addresses:
+            yield address, None, key
+            for field in FILTER_FIELDS:
+                if transaction.get(field) is not None:
+                    yield address, (field, transaction[field]), key
+
+    def _insert(self, list_id, key):
+        entries = self._lists.setdefault(list_id, [])
+        # Transactions almost always arrive in time order, making this an append
+        if not entries or entries[-1] < key:
+            entries.append(key)
+        else:
+            insort(entries, key)
+
+    def _remove(self, list_id, key):
+        entries = self._lists.get(list_id)
+        if not entries:
+            return
+        i = bisect_left(entries, key)
+        if i < len(entries) and entries[i] == key:
+            del entries[i]
+            if not entries:
+                del self._lists[list_id]
+
+    def add(self, transaction):
+        with self._lock:
+            for address, sub, key in self._keys_for(transaction):
+                self._insert((address, sub), key)
+
+    def update(self, old, new):
+        """Re-index a transaction whose filterable fields changed (either may be None)"""
+        old_ids = set(self._keys_for(old)) if old is not None else set()
+        new_ids = set(self._keys_for(new)) if new is not None else set()
+        with self._lock:
+            for address, sub, key in old_ids - new_ids:
+                self._remove((address, sub), key)
+            for address, sub, key in new_ids - old_ids:
+                self._insert((address, sub), key)
+
+    def rebuild(self, transactions):
+        """Build the index from scratch from an iterable of transactions"""
+        lists = {}
+        for transaction in transactions:
+            for address, sub, key in self._keys_for(transaction):
+                lists.setdefault((address, sub), []).append(key)
+        for entries in lists.values():
+            entries.sort()
+        with self._lock:
+            self._lists = lists
+
+    def apply(self, key, old, new):
+        """Storage view hook: one change of the transaction table"""
+        self.update(old, new)
+
+    def dump(self):
+        with self._lock:
+            return dict(self._lists)
+
+    def load(self, state):
+        with self._lock:
+            self._lists = state
+
+    def hashes_where(self, field, value):
+        """Hashes of every indexed transaction with ``field == value``"""
+        sub = (field, value)
+        with self._lock:
+            lists = [entries for (_, list_sub), entries in self._lists.items() if list_sub == sub]
+            return {tx_hash for entries in lists for _, tx_hash in entries}
+
+    def count(self, address):
+        return len(self._lists.get((address, None), ()))
+
+    def page(self, address, limit=50, cursor=None, **filters):
+        """Return ``(keys, next_cursor, needs_check)``, newest first.
+
+        ``filters`` may name any of ``FILTER_FIELDS``.  The smallest matching
+        sub-index drives the walk; ``needs_check`` is set when more than one
+        filter was given and the rows still have to be checked against the
+        others (see ``fetch_page``).
+        """
+        active = [(f, v) for f, v in filters.items() if v is not None]
+        with self._lock:
+            candidates = [self._lists.get((address, sub), []) for sub in active] or [self._lists.get((address, None), [])]
+            entries = min(candidates, key=len)
+            end = bisect_left(entries, decode_cursor(cursor)) if cursor else len(entries)
+            start = max(0, end - limit)
+            keys = entries[start:end][::-1]
+        next_cursor = encode_cursor(keys[-1]) if keys and start > 0 else None
+        return keys, next_cursor, len(active) > 1
+
+
+def fetch_page(index, transactions, address, limit=50, cursor=None, **filters):
+    """Resolve a page of full transaction records from ``transactions``.
+
+    When several filters are combined the page walks the most selective
+    sub-index and tops up with further bisects until ``limit`` rows match.
+    """
+    results = []
+    active = {f: v for f, v in filters.items() if v is not None}
+    while len(results) < limit:
+        keys, next_cursor, needs_check = index.page(address, limit - len(results), cursor, **active)
+        for _, tx_hash in keys:
+            transaction = transactions.get(tx_hash)
+            if transaction is None:
+                continue
+            if needs_check and any(transaction.get(f) != v for f, v in active.items()):
+                continue
+            results.append(transaction)
+        cursor = next_cursor
+        if cursor is None:
+            break
+    return results, cursor
+
+
+def iter_transactions(index, transactions, address, cursor=None, batch=1000, **filters):
+    """Every matching transaction from ``cursor`` on, newest first, one page at a time.
+
+    The cursor is checked here, so a bad one fails before any rows are read.
+    """
+    if cursor:
+        decode_cursor(cursor)
+    return _iter_pages(index, transactions, address, cursor, batch, filters)
+
+
+def _iter_pages(index, transactions, address, cursor, batch, filters):
+    while True:
+        page, cursor = fetch_page(index, transactions, address, batch, cursor, **filters)
+        yield from page
+        if cursor is None:
+            return
+
+
+def fetch_merged_page(index, transactions, addresses, limit=50, cursor=None):
+    """One newest-first page across several addresses (e.g. a user's wallets).
+
+    Each address contributes at most ``limit`` keys before the cursor and the
+    newest ``limit`` of their union form the page.  A transfer between two of
+    the addresses is indexed under both, so keys are deduplicated.
+    """
+    keys = set()
+    more = False
+    for address in addresses:
+        page, next_cursor, _ = index.page(address, limit, cursor)
+        keys.update(page)
+        more = more or next_cursor is not None
+    ordered = sorted(keys, reverse=True)
+    more = more or len(ordered) > limit
+    ordered = ordered[:limit]
+    results = [transactions[tx_hash] for _, tx_hash in ordered if tx_hash in transactions]
+    return results, encode_cursor(ordered[-1]) if more and ordered else None
@@ -0,0 +1,222 @@
+"""
+Append-only write-ahead journal with group commit.
+
+Records are framed as ``<length, crc32, seq>`` followed by the payload and
+appended to numbered segment files.  Writers only copy their record into a
+shared buffer; a single flusher thread writes the buffer and issues one
+fsync for everything that accumulated while the previous fsync was running.
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+
+RECORD_HEADER = struct.Struct('<IIQ')  # payload length, crc32, sequence number
+SEGMENT_PREFIX = 'journal-'
+SEGMENT_SUFFIX = '.log'
+
+
+def segment_name(start_seq):
+    return f'{SEGMENT_PREFIX}{start_seq:020d}{SEGMENT_SUFFIX}'
+
+
+def list_segments(directory):
+    """Return ``(start_seq, path)`` for every journal segment, oldest first"""
+    segments = []
+    for name in os.listdir(directory):
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+            start = int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            segments.append((start, os.path.join(directory, name)))
+    segments.sort()
+    return segments
+
+
+def read_segment(path):
+    """Return ``(records, valid_length)`` for a segment.
+
+    Reading stops at the first short or corrupt record, which is what a crash
+    in the middle of a group commit leaves behind.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    records = []
+    offset = 0
+    size = len(data)
+    while offset + RECORD_HEADER.size <= size:
+        length, crc, seq = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        end = start + length
+        if end > size:
+            break
+        payload = data[start:end]
+        if zlib.crc32(payload) != crc:
+            break
+        records.append((seq, payload))
+        offset = end
+    return records, offset
+
+
+def replay(directory, after_seq):
+    """Yield ``(seq, payload)`` for every journaled record newer than ``after_seq``.
+
+    A torn tail on the newest segment is truncated; damage anywhere else
+    means acknowledged writes were lost, so it raises instead.
+    """
+    segments = list_segments(directory)
+    for i, (start, path) in enumerate(segments):
+        following = segments[i + 1][0] if i + 1 < len(segments) else None
+        if following is not None and following - 1 <= after_seq:
+            continue
+        records, valid_length = read_segment(path)
+        if valid_length < os.path.getsize(path):
+            if following is not None:
+                raise IOError(f'Corrupt journal segment {path}')
+            with open(path, 'r+b') as f:
+                f.truncate(valid_length)
+                os.fsync(f.fileno())
+        for seq, payload in records:
+            if seq > after_seq:
+                yield seq, payload
+
+
+def fsync_directory(directory):
+    """Persist directory entries (new/renamed files) where the OS supports it"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    """Group-committing append-only log split into rotatable segments"""
+
+    def __init__(self, directory, next_seq=1, commit_delay=0.0):
+        self.directory = directory
+        self.commit_delay = commit_delay
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        self._wakeup = threading.Condition(self._lock)
+        self._io_lock = threading.Lock()
+        self._buffer = bytearray()
+        self._next_seq = next_seq
+        self._buffered_seq = next_seq - 1
+        self._durable_seq = next_seq - 1
+        self._closed = False
+        self._error = None
+        self._file = self._open_segment(next_seq)
+        self._flusher = threading.Thread(target=self._flush_loop, name='journal-flusher', daemon=True)
+        self._flusher.start()
+
+    @property
+    def last_seq(self):
+        return self._next_seq - 1
+
+    @property
+    def durable_seq(self):
+        return self._durable_seq
+
+    def _open_segment(self, start_seq):
+        path = os.path.join(self.directory, segment_name(start_seq))
+        f = open(path, 'ab')
+        fsync_directory(self.directory)
+        return f
+
+    def append(self, payload):
+        """Buffer a record and return its sequence number without waiting"""
+        crc = zlib.crc32(payload)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Journal is closed')
+            seq = self._next_seq
+            self._buffer += RECORD_HEADER.pack(len(payload), crc, seq)
+            self._buffer += payload
+            self._next_seq = seq + 1
+            self._buffered_seq = seq
+            self._wakeup.notify()
+        return seq
+
+    def wait(self, seq):
+        """Block until ``seq`` has been fsynced"""
+        with self._lock:
+            while self._durable_seq < seq:
+                if self._error is not None:
+                    raise self._error
+                self._flushed.wait()
+
+    def _take_buffer(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data, self._buffered_seq
+
+    def _write(self, data, upto):
+        if data:
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        with self._lock:
+            if upto > self._durable_seq:
+                self._durable_seq = upto
+            self._flushed.notify_all()
+
+    def _flush_loop(self):
+        while True:
+            with self._lock:
+                while not self._buffer and not self._closed:
+                    self._wakeup.wait()
+                if self._closed and not self._buffer:
+                    return
+            if self.commit_delay:
+                # Let concurrent writers pile onto this commit
+                time.sleep(self.commit_delay)
+            with self._io_lock:
+                with self._lock:
+                    data, upto = self._take_buffer()
+                try:
+                    self._write(data, upto)
+                except OSError as e:
+                    with self._lock:
+                        self._error = e
+                        self._flushed.notify_all()
+                    return
+
+    def flush(self):
+        """Synchronously write and fsync everything buffered so far"""
+        with self._io_lock:
+            with self._lock:
+                data, upto = self._take_buffer()
+            self._write(data, upto)
+
+    def rotate(self):
+        """Flush and start a new segment; returns the last seq of the old one.
+
+        Callers must prevent concurrent ``append`` calls for the duration so
+        the boundary is exact.
+        """
+        with self._io_lock:
+            with self._lock:
+                data, upto = self._take_buffer()
+            self._write(data, upto)
+            self._file.close()
+            self._file = self._open_segment(self._next_seq)
+            return self._next_seq - 1
+
+    def drop_segments_through(self, seq):
+        """Delete segments whose records are all covered by a snapshot at ``seq``"""
+        segments = list_segments(self.directory)
+        for i, (start, path) in enumerate(segments):
+            following = segments[i + 1][0] if i + 1 < len(segments) else None
+            if following is not None and following - 1 <= seq:
+                os.remove(path)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify_all()
+        self._flusher.join()
+        self.flush()
+        self._file.close()
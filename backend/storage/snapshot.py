@@ -0,0 +1,202 @@
+"""
+Compact, immutable, key-sorted snapshot files.
+
+Layout::
+
+    header  MAGIC | entry count | index offset
+    data    key bytes + value bytes, back to back
+    index   (data offset, key length, value length) per entry, sorted by key
+
+Readers mmap the file and binary-search the index, so opening a snapshot
+costs the same whether it holds a thousand records or tens of millions;
+values are only decoded when they are actually read.
+
+When a compaction replaces a snapshot, lookups on other threads may still be
+using the old reader, so readers are pinned around each read and retired
+rather than closed: the mapping is released when the last pin is dropped.
+"""
+
+import mmap
+import os
+import struct
+import threading
+
+from storage.journal import fsync_directory
+
+MAGIC = b'TEOSSNP1'
+HEADER = struct.Struct('<8sQQ')
+INDEX_ENTRY = struct.Struct('<QII')
+
+
+class SnapshotReader:
+    """Read-only, mmap-backed view over a snapshot file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ) if size else None
+        if self._mm is None or size < HEADER.size:
+            raise IOError(f'Truncated snapshot {path}')
+        magic, self.count, self._index_offset = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise IOError(f'Not a snapshot file: {path}')
+        self._pin_lock = threading.Lock()
+        self._pins = 0
+        self._retired = False
+
+    def pin(self):
+        """Hold the mapping open for a read; False once the reader is retired"""
+        with self._pin_lock:
+            if self._retired:
+                return False
+            self._pins += 1
+            return True
+
+    def unpin(self):
+        with self._pin_lock:
+            self._pins -= 1
+            if self._retired and not self._pins:
+                self.close()
+
+    def retire(self):
+        """Refuse new pins and close as soon as the current ones are dropped"""
+        with self._pin_lock:
+            self._retired = True
+            if not self._pins:
+                self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _entry(self, i):
+        offset, key_len, value_len = INDEX_ENTRY.unpack_from(self._mm, self._index_offset + i * INDEX_ENTRY.size)
+        return offset, key_len, value_len
+
+    def _key_at(self, i):
+        offset, key_len, _ = self._entry(i)
+        return self._mm[offset:offset + key_len]
+
+    def _find(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._key_at(lo) == key:
+            return lo
+        return -1
+
+    def get(self, key):
+        """Return the raw encoded value for ``key`` (str) or None"""
+        i = self._find(key.encode('utf-8'))
+        if i < 0:
+            return None
+        offset, key_len, value_len = self._entry(i)
+        start = offset + key_len
+        return self._mm[start:start + value_len]
+
+    def __contains__(self, key):
+        return self._find(key.encode('utf-8')) >= 0
+
+    def items_raw(self):
+        """Yield ``(key_bytes, value_bytes)`` in key order without decoding"""
+        mm = self._mm
+        for i in range(self.count):
+            offset, key_len, value_len = self._entry(i)
+            yield mm[offset:offset + key_len], mm[offset + key_len:offset + key_len + value_len]
+
+    def keys(self):
+        for key, _ in self.items_raw():
+            yield key.decode('utf-8')
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+
+class EmptySnapshot:
+    """Stand-in reader for a table that has never been snapshotted"""
+
+    path = None
+    count = 0
+
+    def __len__(self):
+        return 0
+
+    def get(self, key):
+        return None
+
+    def __contains__(self, key):
+        return False
+
+    def items_raw(self):
+        return iter(())
+
+    def keys(self):
+        return iter(())
+
+    def pin(self):
+        return True
+
+    def unpin(self):
+        pass
+
+    def retire(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def write_snapshot(path, base, changes):
+    """Merge ``changes`` over ``base`` into a new snapshot at ``path``.
+
+    ``base`` is a reader (already sorted); ``changes`` maps key str to encoded
+    value bytes, or None for a deletion.  The two are merged in one
+    sequential pass so existing records are copied without being decoded.
+    """
+    pending = sorted((k.encode('utf-8'), v) for k, v in changes.items())
+    index = bytearray()
+    count = 0
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, 0, 0))
+        offset = HEADER.size
+
+        def emit(key, value):
+            nonlocal offset, count
+            f.write(key)
+            f.write(value)
+            index.extend(INDEX_ENTRY.pack(offset, len(key), len(value)))
+            offset += len(key) + len(value)
+            count += 1
+
+        j = 0
+        for key, value in base.items_raw():
+            while j < len(pending) and pending[j][0] < key:
+                if pending[j][1] is not None:
+                    emit(*pending[j])
+                j += 1
+            if j < len(pending) and pending[j][0] == key:
+                if pending[j][1] is not None:
+                    emit(*pending[j])
+                j += 1
+            else:
+                emit(bytes(key), bytes(value))
+        for key, value in pending[j:]:
+            if value is not None:
+                emit(key, value)
+
+        f.write(index)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, count, offset))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    fsync_directory(os.path.dirname(path) or '.')
+    return count
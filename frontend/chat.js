@@ -4,6 +4,13 @@ async function fetchChatHistory() {
     document.getElementById('chat').innerHTML = JSON.stringify(chatHistory);
 }
 
+// Receive new messages as they are posted instead of re-fetching history
+function subscribeChat(onMessage, channel = 'general') {
+    const source = new EventSource(`/api/chat/stream?channel=${encodeURIComponent(channel)}`);
+    source.addEventListener('message', (event) => onMessage(JSON.parse(event.data)));
+    return source;
+}
+
 async function sendMessage(userId, message) {
     const response = await fetch('/api/chat', {
         method: 'POST',
@@ -1,9 +1,25 @@
-async function fetchNotifications(userId) {
-    const response = await fetch(`/api/notifications/${userId}`);
-    const notifications = await response.json();
+async function fetchNotifications(userId, since = 0) {
+    const response = await fetch(`/api/notifications/${userId}?since=${since}`);
+    const { notifications, unread_count: unreadCount } = await response.json();
     // Render notifications in the UI
+    return { notifications, unreadCount };
 }
 
-async function markNotificationAsRead(notificationId) {
-    // Logic to mark a notification as read
+// New notifications are pushed over Server-Sent Events; the browser
+// reconnects with Last-Event-ID so nothing is missed
+function subscribeNotifications(userId, onNotification) {
+    const source = new EventSource(`/api/notifications/${userId}/stream`);
+    source.addEventListener('notification', (event) => onNotification(JSON.parse(event.data)));
+    return source;
+}
+
+async function markNotificationAsRead(userId, notificationId) {
+    // Marks this notification and everything before it as read
+    await fetch(`/api/notifications/${userId}/read`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ up_to: notificationId })
+    });
 }